@@ -0,0 +1,191 @@
+# Tryb wsadowy: wiele łamigłówek w jednym uruchomieniu, rozdzielanych na pulę
+# procesów. Każdy proces raz importuje moduły (i ładuje tablice heurystyk),
+# a potem rozwiązuje kolejne rekordy tą samą ścieżką co main() (run_strategy).
+#
+# Format wejścia - jeden rekord na linię:
+#   R C t1 t2 ... tRC                     (jak stdin main.py, ale w jednej linii)
+#   {"id": ..., "R": 4, "C": 4, "tiles": [...]}
+# Puste linie i linie zaczynające się od '#' są pomijane.
+# Wyjście - jedna linia JSON na rekord (kolejność wejścia lub kolejność ukończenia);
+# z --stats rekord zawiera też pełne statystyki przeszukiwania.
+
+
+import io
+import os
+import sys
+import json
+import time
+import signal
+import multiprocessing
+
+from state import pack, goal_state, goal_tiles
+from utils import is_solvable, check_tiles, UnsolvableError
+from stats import SearchStats
+
+
+class _TimeLimit(Exception):
+    pass
+
+
+def parse_record(line):
+    """Zwraca (id, R, C, tiles) albo rzuca ValueError."""
+    line = line.strip()
+    if line.startswith('{'):
+        obj = json.loads(line)
+        R, C, tiles = int(obj['R']), int(obj['C']), [int(x) for x in obj['tiles']]
+        rec_id = obj.get('id')
+    else:
+        nums = [int(x) for x in line.split()]
+        if len(nums) < 2:
+            raise ValueError("oczekiwano R i C")
+        R, C, tiles = nums[0], nums[1], nums[2:]
+        rec_id = None
+    if len(tiles) != R * C:
+        raise ValueError(f"oczekiwano {R * C} liczb planszy, otrzymano {len(tiles)}")
+    return rec_id, R, C, tiles
+
+
+def iter_records(stream):
+    """Strumieniowo: (indeks, linia) dla niepustych rekordów."""
+    index = 0
+    for line in stream:
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        yield index, line
+        index += 1
+
+
+_ARGS = None
+
+
+# goal_pos na (R, C) - jeden obiekt na proces: bez budowania słownika dla
+# każdego rekordu, a patterndb.get_pdb ma szybką ścieżkę po id(goal_pos)
+_GOAL_POS = {}
+
+
+def goal_pos_for(R, C):
+    goal_pos = _GOAL_POS.get((R, C))
+    if goal_pos is None:
+        from main import get_goal_pos
+        goal_pos = _GOAL_POS[(R, C)] = get_goal_pos(goal_tiles(R, C))
+    return goal_pos
+
+
+def _init_worker(args):
+    global _ARGS
+    _ARGS = args
+
+
+def _init_pool_worker(args):
+    _init_worker(args)
+    # Ctrl+C obsługuje proces główny
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _on_alarm(signum, frame):
+    raise _TimeLimit()
+
+
+def solve_record(task):
+    """Rozwiązuje jeden rekord; zwraca słownik gotowy do zapisu jako JSON."""
+    from main import run_strategy
+
+    index, line = task
+    result = {'index': index}
+    try:
+        rec_id, R, C, tiles = parse_record(line)
+    except (ValueError, KeyError, TypeError) as e:
+        result.update(status='error', error=str(e))
+        return result
+    if rec_id is not None:
+        result['id'] = rec_id
+    result.update(R=R, C=C)
+
+    args = _ARGS
+    error = check_tiles(tiles, R, C)
+    if error is not None:
+        result.update(status='error', error=error)
+        return result
+    start = pack(tiles)
+    goal = goal_state(R, C)
+    if not is_solvable(start, R, C, goal):
+        result.update(status='unsolvable', length=-1, moves='')
+        return result
+
+    stats = SearchStats()
+    use_alarm = bool(args.time_limit) and hasattr(signal, 'setitimer')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, args.time_limit)
+    t0 = time.perf_counter()
+    try:
+        try:
+            path = run_strategy(args, start, goal, R, C, goal_pos_for(R, C), log=io.StringIO(), stats=stats)
+            if path is not None:
+                path = str(path)   # strumień (MoveStream) - jedno przejście konstrukcji
+        finally:
+            # zegar wyłączamy jeszcze wewnątrz try - alarm, który przyjdzie
+            # między powrotem a wyłączeniem, trafia do except _TimeLimit niżej
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        status = 'solved' if path is not None else 'no-solution'
+    except _TimeLimit:
+        path = None
+        status = 'timeout'
+    except UnsolvableError:
+        result.update(status='unsolvable', length=-1, moves='')
+        return result
+    except Exception as e:
+        # błąd jednego rekordu (np. heurystyka nie pasuje do planszy) nie
+        # przerywa całego przebiegu
+        result.update(status='error', error=str(e))
+        return result
+    elapsed = time.perf_counter() - t0
+
+    result.update(status=status,
+                  length=len(path) if path is not None else -1,
+                  moves=str(path) if path is not None else '',
+                  time=round(elapsed, 6),
+                  nodes=stats.expanded)
+    if args.stats:
+        stats.solution_length = len(path) if path is not None else None
+        result['stats'] = stats.to_dict()
+    return result
+
+
+def run_batch(args):
+    """Obsługa --batch: czyta rekordy, rozwiązuje je w puli, pisze JSON lines."""
+    source = sys.stdin if args.batch == '-' else open(args.batch, 'r', encoding='utf-8')
+    out = sys.stdout if not args.output else open(args.output, 'w', encoding='utf-8')
+    workers = args.workers or os.cpu_count() or 1
+    tasks = iter_records(source)
+    solved = total = 0
+    t0 = time.perf_counter()
+    pool = None
+    try:
+        if workers == 1:
+            _init_worker(args)
+            results = map(solve_record, tasks)
+        else:
+            pool = multiprocessing.Pool(workers, initializer=_init_pool_worker, initargs=(args,))
+            imap = pool.imap_unordered if args.unordered else pool.imap
+            results = imap(solve_record, tasks, chunksize=args.chunksize)
+        for res in results:
+            total += 1
+            solved += res['status'] == 'solved'
+            out.write(json.dumps(res) + '\n')
+            out.flush()
+        if pool is not None:
+            pool.close()
+            pool.join()
+    except KeyboardInterrupt:
+        if pool is not None:
+            pool.terminate()
+        raise
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - t0
+    print(f"Batch: rozwiązano {solved}/{total} w {elapsed:.3f} s, procesy: {workers}", file=sys.stderr)
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+In-process benchmark suite for the 15-puzzle solver.
+Calls the search functions directly (no subprocess per case), with fixed
+seeds, warm-up rounds and repeated runs. Reports median / p95 wall time,
+nodes expanded, nodes per second and peak memory for every
+algorithm x heuristic x difficulty, as a table and as JSON.
+With --cold-start N it also times N fresh `main.py` processes solving
+a one-move puzzle, i.e. the CLI startup cost paid on every invocation.
+With --hda-scaling it times HDA* at 2, 4, ... workers (up to the CPU
+count) against single-process A* on the same puzzles and reports the
+speedup.
+"""
+
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import zlib
+
+from state import goal_state, goal_tiles, unpack
+from main import get_heuristic_fn, get_goal_pos
+from stats import SearchStats
+from comprehensive_tests import generate_test_case
+from search_bfs import bfs
+from search_bibfs import bibfs
+from search_dfs import dfs
+from search_iddfs import iddfs
+from search_bestfirst import best_first
+from search_astar import astar
+from search_sma import sma_star
+from search_idastar import idastar
+from search_hda import hda_star
+from search_ara import ara_star
+from search_beam import beam_search
+from search_constructive import constructive_solve
+
+R, C = 4, 4
+LOG = open(os.devnull, 'w')   # komunikaty silników (np. HDA* -> A*) nie mieszają się z tabelą
+DIFFICULTIES = ['Easy', 'Medium', 'Hard']
+HEURISTICS = ['0', 'misplaced', 'manhattan', 'linear', 'walking']
+
+# name -> (uses heuristic, runner(start, goal, heur_fn, goal_pos, opts, stats))
+ALGORITHMS = {
+    'BFS': (False, lambda s, g, h, gp, o, st: bfs(s, g, R, C, 'DULR', o.max_nodes, stats=st)),
+    'BiBFS': (False, lambda s, g, h, gp, o, st: bibfs(s, g, R, C, 'DULR', o.max_nodes, stats=st)),
+    'DFS': (False, lambda s, g, h, gp, o, st: dfs(s, g, R, C, 'DULR', o.max_nodes, stats=st)),
+    'IDFS': (False, lambda s, g, h, gp, o, st: iddfs(s, g, R, C, 'DULR', o.max_depth, o.max_nodes, stats=st)),
+    'Constructive': (False, lambda s, g, h, gp, o, st: str(constructive_solve(s, g, R, C, stats=st))),
+    'Best-First': (True, lambda s, g, h, gp, o, st: best_first(s, g, R, C, h, gp, None, o.max_nodes, stats=st, batch_size=o.expand_batch)),
+    'A*': (True, lambda s, g, h, gp, o, st: astar(s, g, R, C, h, gp, None, o.max_nodes, stats=st, batch_size=o.expand_batch)),
+    'SMA*': (True, lambda s, g, h, gp, o, st: sma_star(s, g, R, C, h, gp, None, o.max_nodes, o.max_memory, stats=st)),
+    'IDA*': (True, lambda s, g, h, gp, o, st: idastar(s, g, R, C, h, gp, None, o.max_nodes, stats=st)),
+    'ARA*': (True, lambda s, g, h, gp, o, st: ara_star(s, g, R, C, h, gp, None, o.max_nodes, stats=st)),
+    'Beam': (True, lambda s, g, h, gp, o, st: beam_search(s, g, R, C, h, gp, None, max_nodes=o.max_nodes, stats=st)),
+    'HDA*': (True, lambda s, g, h, gp, o, st: hda_star(s, g, R, C, h, gp, None, o.max_nodes, stats=st, workers=o.workers, log=LOG)),
+}
+
+
+def make_cases(difficulty, count, base_seed):
+    """Fixed, reproducible puzzles (hash() of a str is salted per process, crc32 is not)."""
+    offset = zlib.crc32(difficulty.encode())
+    return [generate_test_case(difficulty, seed=base_seed + offset + i)[0] for i in range(count)]
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, math.ceil(q / 100.0 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def time_run(runner, start, goal, heur_fn, goal_pos, opts):
+    stats = SearchStats()
+    gc.collect()
+    t0 = time.perf_counter()
+    path = runner(start, goal, heur_fn, goal_pos, opts, stats)
+    elapsed = time.perf_counter() - t0
+    return path, elapsed, stats.expanded
+
+
+def peak_memory(runner, start, goal, heur_fn, goal_pos, opts):
+    """Peak traced allocation of one run (separate run - tracing slows the search down)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        runner(start, goal, heur_fn, goal_pos, opts, None)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_group(algo, heur_id, cases, opts):
+    uses_heur, runner = ALGORITHMS[algo]
+    heur_fn = get_heuristic_fn(heur_id) if uses_heur else None
+    goal = goal_state(R, C)
+    goal_pos = get_goal_pos(goal_tiles(R, C))
+
+    times, nodes_per_case, lengths, peaks = [], [], [], []
+    total_nodes = 0
+    total_time = 0.0
+    solved = 0
+    for start in cases:
+        for _ in range(opts.warmup):
+            runner(start, goal, heur_fn, goal_pos, opts, None)
+        for _ in range(opts.repeat):
+            path, elapsed, nodes = time_run(runner, start, goal, heur_fn, goal_pos, opts)
+            times.append(elapsed)
+            total_time += elapsed
+            total_nodes += nodes
+        nodes_per_case.append(nodes)
+        if path is not None:
+            solved += 1
+            lengths.append(len(path))
+        if opts.memory:
+            peaks.append(peak_memory(runner, start, goal, heur_fn, goal_pos, opts))
+
+    return {
+        'algorithm': algo,
+        'heuristic': heur_id if uses_heur else None,
+        'cases': len(cases),
+        'repeat': opts.repeat,
+        'solved': solved,
+        'avg_solution_length': statistics.mean(lengths) if lengths else None,
+        'median_time_s': statistics.median(times),
+        'p95_time_s': percentile(times, 95),
+        'nodes_mean': statistics.mean(nodes_per_case),
+        'nodes_per_s': total_nodes / total_time if total_time > 0 else None,
+        'peak_memory_bytes': max(peaks) if peaks else None,
+    }
+
+
+TRIVIAL_INPUT = "4 4\n1 2 3 4\n5 6 7 8\n9 10 11 12\n13 14 0 15\n"
+
+
+def cold_start(runs, argv=('-a', 'manhattan')):
+    """Wall time of fresh interpreter processes: bare `python -c pass` vs. a trivial CLI solve."""
+    main_py = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+
+    def measure(cmd, stdin):
+        times = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            subprocess.run(cmd, input=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, text=True, check=True)
+            times.append(time.perf_counter() - t0)
+        return {'median_s': statistics.median(times), 'p95_s': percentile(times, 95)}
+
+    return {
+        'runs': runs,
+        'command': ['main.py', *argv],
+        'interpreter': measure([sys.executable, '-c', 'pass'], ''),
+        'cli': measure([sys.executable, main_py, *argv], TRIVIAL_INPUT),
+    }
+
+
+def hda_scaling(cases, heur_id, opts, report):
+    """Median time of A* and of HDA* for each worker count; speedup = A* / HDA*."""
+    heur_fn = get_heuristic_fn(heur_id)
+    goal = goal_state(R, C)
+    goal_pos = get_goal_pos(goal_tiles(R, C))
+
+    def median_time(run):
+        times = []
+        for start in cases:
+            run(start)
+            for _ in range(opts.repeat):
+                gc.collect()
+                t0 = time.perf_counter()
+                run(start)
+                times.append(time.perf_counter() - t0)
+        return statistics.median(times)
+
+    base = median_time(lambda s: astar(s, goal, R, C, heur_fn, goal_pos, None, opts.max_nodes))
+    counts = [w for w in (2, 4, 8, 16, 32, 64) if w <= max(2, os.cpu_count() or 1)]
+    rows = [{'workers': 1, 'engine': 'A*', 'median_time_s': base, 'speedup': 1.0}]
+    print(f"HDA* scaling (h={heur_id}, {len(cases)} puzzles, CPU count {os.cpu_count()}):", file=report)
+    print(f"  A*            median {base * 1000:9.1f} ms", file=report)
+    for w in counts:
+        t = median_time(lambda s: hda_star(s, goal, R, C, heur_fn, goal_pos, None, opts.max_nodes, workers=w, log=LOG))
+        rows.append({'workers': w, 'engine': 'HDA*', 'median_time_s': t, 'speedup': base / t if t else None})
+        print(f"  HDA* x{w:<3}     median {t * 1000:9.1f} ms   speedup {base / t:5.2f}", file=report, flush=True)
+    return rows
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="In-process benchmark of the search engines.")
+    parser.add_argument('--algos', nargs='+', default=list(ALGORITHMS), choices=list(ALGORITHMS), help="Algorithms to run.")
+    parser.add_argument('--heuristics', nargs='+', default=HEURISTICS, help="Heuristic ids for informed algorithms.")
+    parser.add_argument('--difficulties', nargs='+', default=DIFFICULTIES, choices=DIFFICULTIES)
+    parser.add_argument('--cases', type=int, default=5, help="Puzzles per difficulty (default 5).")
+    parser.add_argument('--seed', type=int, default=0, help="Base seed for puzzle generation (default 0).")
+    parser.add_argument('--warmup', type=int, default=1, help="Untimed warm-up runs per puzzle (default 1).")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per puzzle (default 5).")
+    parser.add_argument('--max-nodes', type=int, default=200000, help="Node limit per run (default 200000).")
+    parser.add_argument('--max-depth', type=int, default=50, help="Depth limit for IDFS (default 50).")
+    parser.add_argument('--max-memory', type=int, default=10000, help="Memory limit for SMA* (default 10000).")
+    parser.add_argument('--expand-batch', type=int, default=None, metavar='K', help="Batched expansion with vectorized heuristics for A*/Best-First (needs NumPy).")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes for HDA* (default: CPU count).")
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help="Skip the tracemalloc peak-memory run.")
+    parser.add_argument('--cold-start', type=int, default=0, metavar='N', help="Also time N fresh CLI processes on a trivial puzzle.")
+    parser.add_argument('--hda-scaling', action='store_true', help="Time HDA* at 2, 4, ... workers against A* on the Hard puzzles (manhattan) and report the speedup.")
+    parser.add_argument('--json', type=str, default=None, metavar='PATH', help="Write results as JSON ('-' = stdout).")
+    return parser
+
+
+def main(argv=None):
+    opts = build_parser().parse_args(argv)
+    cases = {d: make_cases(d, opts.cases, opts.seed) for d in opts.difficulties}
+    report = sys.stderr if opts.json == '-' else sys.stdout
+
+    startup = None
+    if opts.cold_start:
+        startup = cold_start(opts.cold_start)
+        print(f"Cold start ({opts.cold_start} runs): CLI median {startup['cli']['median_s'] * 1000:.1f} ms, "
+              f"p95 {startup['cli']['p95_s'] * 1000:.1f} ms; bare interpreter median "
+              f"{startup['interpreter']['median_s'] * 1000:.1f} ms", file=report)
+
+    scaling = None
+    if opts.hda_scaling:
+        scaling = hda_scaling(cases.get('Hard') or make_cases('Hard', opts.cases, opts.seed), 'manhattan', opts, report)
+
+    print(f"{'Algorithm':<12} | {'Heuristic':<10} | {'Difficulty':<10} | {'Solved':<7} | {'Median (ms)':<11} | "
+          f"{'p95 (ms)':<10} | {'Nodes':<10} | {'Nodes/s':<10} | {'Peak KiB':<9}", file=report)
+    print("-" * 110, file=report)
+    results = []
+    for algo in opts.algos:
+        heurs = opts.heuristics if ALGORITHMS[algo][0] else ['-']
+        for heur_id in heurs:
+            for difficulty in opts.difficulties:
+                res = bench_group(algo, heur_id, cases[difficulty], opts)
+                res['difficulty'] = difficulty
+                results.append(res)
+                peak = f"{res['peak_memory_bytes'] / 1024:.0f}" if res['peak_memory_bytes'] is not None else '-'
+                nps = f"{res['nodes_per_s']:.0f}" if res['nodes_per_s'] else '-'
+                print(f"{algo:<12} | {heur_id:<10} | {difficulty:<10} | {res['solved']}/{res['cases']:<5} | "
+                      f"{res['median_time_s'] * 1000:<11.3f} | {res['p95_time_s'] * 1000:<10.3f} | "
+                      f"{res['nodes_mean']:<10.0f} | {nps:<10} | {peak:<9}", file=report, flush=True)
+
+    if opts.json:
+        payload = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'board': [R, C],
+            'settings': {k: getattr(opts, k) for k in ('cases', 'seed', 'warmup', 'repeat', 'max_nodes', 'max_depth', 'max_memory', 'workers', 'expand_batch')},
+            'puzzles': {d: [list(unpack(s, R, C)) for s in cases[d]] for d in opts.difficulties},
+            'results': results,
+        }
+        if startup is not None:
+            payload['cold_start'] = startup
+        if scaling is not None:
+            payload['hda_scaling'] = scaling
+        if opts.json == '-':
+            json.dump(payload, sys.stdout, indent=2)
+            print()
+        else:
+            with open(opts.json, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, indent=2)
+            print(f"Results saved to: {opts.json}", file=report)
+
+
+if __name__ == '__main__':
+    main()
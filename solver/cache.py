@@ -0,0 +1,218 @@
+# Trwały cache rozwiązanych pozycji (SQLite).
+#
+# Kluczem jest (R, C, stan spakowany); wartością - długość optymalnego
+# rozwiązania i pierwszy ruch. Po rozwiązaniu zapisujemy nie tylko start, ale
+# każdy stan na ścieżce: sufiks optymalnej ścieżki też jest optymalny, więc
+# jedno rozwiązanie daje odległości dokładne dla wszystkich jego stanów.
+# Jeden ruch na stan to O(L) zapisu na rozwiązanie (pełne sufiksy byłyby
+# O(L^2)); ścieżkę odtwarzamy, idąc po ruchach do stanu o odległości 0.
+# Łańcuch przerwany przez usunięcie środkowego stanu traktujemy jak brak wpisu.
+# A* i IDA* używają tych odległości jako idealnej heurystyki i odcięcia.
+#
+# Baza działa w trybie WAL - wiele procesów (np. pula trybu wsadowego) może
+# czytać jednocześnie, a zapisy czekają na blokadę (busy_timeout). Rozmiar
+# ograniczamy liczbą wpisów: nadmiar usuwamy od najdawniej używanych.
+# Znacznik LRU przy odczycie jest tylko próbą z krótkim busy_timeout - odczyt
+# nie czeka na cudzy zapis. Nadmiar sprawdzamy co _EVICT_EVERY zapisów procesu
+# (COUNT(*) to przejście po całej tabeli), więc limit może zostać chwilowo
+# przekroczony o wpisy z tych zapisów.
+
+
+import os
+import time
+import sqlite3
+
+from utils import apply_moves
+
+CACHE_PATH = os.environ.get('PUZZLE_CACHE_DB',
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache_data', 'solutions.sqlite'))
+DEFAULT_MAX_ENTRIES = 200000
+_BUSY_TIMEOUT_MS = 30000
+_TOUCH_TIMEOUT_MS = 20
+_EVICT_EVERY = 64
+
+
+def _key(state):
+    return state.to_bytes((state.bit_length() + 7) // 8 or 1, 'big')
+
+
+def _state(key):
+    return int.from_bytes(key, 'big')
+
+
+class SolutionCache:
+    def __init__(self, path=CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=_BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        # dawny format (pełne sufiksy ruchów) - cache można odbudować
+        self.db.execute('DROP TABLE IF EXISTS solutions')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS positions ('
+            ' R INTEGER NOT NULL, C INTEGER NOT NULL, state BLOB NOT NULL,'
+            ' dist INTEGER NOT NULL, move TEXT NOT NULL, used REAL NOT NULL,'
+            ' PRIMARY KEY (R, C, state)) WITHOUT ROWID')
+        self.db.execute('CREATE INDEX IF NOT EXISTS positions_used ON positions (used)')
+        self._exact = {}
+        self._writes = 0
+
+    def close(self):
+        self.db.close()
+
+    def lookup(self, R, C, state):
+        """Zapamiętane optymalne rozwiązanie dla stanu albo None."""
+        keys = []
+        out = []
+        expected = None
+        while True:
+            key = _key(state)
+            row = self.db.execute('SELECT dist, move FROM positions WHERE R = ? AND C = ? AND state = ?',
+                                  (R, C, key)).fetchone()
+            if row is None or (expected is not None and row[0] != expected):
+                return None
+            keys.append(key)
+            dist, move = row
+            if dist == 0:
+                break
+            out.append(move)
+            state = apply_moves(state, R, C, move)
+            expected = dist - 1
+        self.db.execute(f'PRAGMA busy_timeout = {_TOUCH_TIMEOUT_MS}')
+        try:
+            now = time.time()
+            self.db.executemany('UPDATE positions SET used = ? WHERE R = ? AND C = ? AND state = ?',
+                                [(now, R, C, key) for key in keys])
+        except sqlite3.OperationalError:
+            pass  # baza zajęta - pominięcie znacznika LRU niczego nie psuje
+        finally:
+            self.db.execute(f'PRAGMA busy_timeout = {_BUSY_TIMEOUT_MS}')
+        return ''.join(out)
+
+    def store(self, R, C, start, moves):
+        """Zapisuje optymalne `moves` dla `start` i wszystkich stanów na ścieżce."""
+        now = time.time()
+        rows = []
+        state = start
+        for i in range(len(moves) + 1):
+            rows.append((R, C, _key(state), len(moves) - i, moves[i:i + 1], now))
+            if i < len(moves):
+                state = apply_moves(state, R, C, moves[i])
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            # krótsza ścieżka nigdy nie zostanie nadpisana dłuższą
+            self.db.executemany(
+                'INSERT INTO positions (R, C, state, dist, move, used) VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (R, C, state) DO UPDATE SET used = excluded.used, '
+                'dist = min(dist, excluded.dist), '
+                'move = CASE WHEN excluded.dist < dist THEN excluded.move ELSE move END', rows)
+            if self._writes % _EVICT_EVERY == 0:
+                self._evict()
+            self.db.execute('COMMIT')
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+        self._writes += 1
+        entry = self._exact.get((R, C))
+        if entry is not None:
+            table = entry[1].entries
+            for _, _, key, dist, move, _ in rows:
+                old = table.get(_state(key))
+                if old is None or dist < old[0]:
+                    table[_state(key)] = (dist, move)
+
+    def _evict(self):
+        count = self.db.execute('SELECT COUNT(*) FROM positions').fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self.db.execute('DELETE FROM positions WHERE (R, C, state) IN '
+                            '(SELECT R, C, state FROM positions ORDER BY used LIMIT ?)', (excess,))
+
+    def exact_table(self, R, C):
+        """ExactTable (odległości dokładne i ścieżki) dla plansz R x C.
+
+        Ładowana raz na proces i przeładowywana tylko wtedy, gdy bazę zmienił
+        inny proces (PRAGMA data_version).
+        """
+        version = self.db.execute('PRAGMA data_version').fetchone()[0]
+        entry = self._exact.get((R, C))
+        if entry is None or entry[0] != version:
+            rows = self.db.execute('SELECT state, dist, move FROM positions WHERE R = ? AND C = ?', (R, C))
+            entries = {_state(key): (dist, move) for key, dist, move in rows}
+            entry = (version, ExactTable(R, C, _complete(entries, R, C)))
+            self._exact[(R, C)] = entry
+        return entry[1]
+
+
+class ExactTable:
+    """Stan spakowany -> (odległość do celu, pierwszy ruch) z cache.
+
+    `state in table`, dist(state) - odległość albo None, path(state) - ruchy
+    do celu odtworzone po łańcuchu pierwszych ruchów.
+    """
+
+    def __init__(self, R, C, entries):
+        self.R = R
+        self.C = C
+        self.entries = entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, state):
+        return state in self.entries
+
+    def dist(self, state):
+        entry = self.entries.get(state)
+        return entry[0] if entry is not None else None
+
+    def path(self, state):
+        out = []
+        dist, move = self.entries[state]
+        while dist:
+            out.append(move)
+            state = apply_moves(state, self.R, self.C, move)
+            dist, move = self.entries[state]
+        return ''.join(out)
+
+
+def _complete(entries, R, C):
+    """Tylko wpisy, których łańcuch ruchów dochodzi do odległości 0."""
+    good = {}
+    for start in entries:
+        chain = []
+        state = start
+        while True:
+            if state in good:
+                ok = good[state]
+                break
+            dist, move = entries[state]
+            chain.append(state)
+            if dist == 0:
+                ok = True
+                break
+            nxt = apply_moves(state, R, C, move)
+            if nxt not in entries or entries[nxt][0] != dist - 1:
+                ok = False
+                break
+            state = nxt
+        for state in chain:
+            good[state] = ok
+    return {state: entries[state] for state, ok in good.items() if ok}
+
+
+_OPEN = {}
+
+
+def get_cache(path=None, max_entries=None):
+    """Jedno połączenie na proces i ścieżkę."""
+    path = path or CACHE_PATH
+    cache = _OPEN.get(path)
+    if cache is None:
+        cache = _OPEN[path] = SolutionCache(path, max_entries or DEFAULT_MAX_ENTRIES)
+    elif max_entries:
+        cache.max_entries = max_entries
+    return cache
@@ -3,6 +3,8 @@
 Comprehensive test suite for 15-puzzle solver.
 Tests all algorithms with all heuristics across 3 difficulty levels.
 Measures: time, solution length, and optimality.
+Each case runs main.py in a subprocess, so times include interpreter startup;
+for engine timings use benchmark.py (in-process, warm-up, median/p95).
 """
 
 import subprocess
@@ -10,8 +12,9 @@ import sys
 import os
 import time
 import random
-from state import goal_state
-from utils import generate_shuffled, inversion_count
+from state import goal_state, unpack
+from utils import inversion_count
+from scramble import random_walk
 
 class TestResult:
     def __init__(self, algo_name, heur_id, difficulty, shuffle_moves, seed):
@@ -30,8 +33,8 @@ def generate_test_case(difficulty, seed=None):
     Easy: 5-12 moves, Medium: 12-18 moves, Hard: 18-25 moves.
     (Adjusted for practical testing with uninformed search.)"""
     
-    if seed is not None:
-        random.seed(seed)
+    # własny generator: przypadek zależy tylko od seed (scramble.random_walk)
+    rng = random.Random(seed)
     
     difficulty_ranges = {
         'Easy': (5, 12),
@@ -40,16 +43,17 @@ def generate_test_case(difficulty, seed=None):
     }
     
     min_moves, max_moves = difficulty_ranges.get(difficulty, (5, 15))
-    shuffle_count = random.randint(min_moves, max_moves)
+    shuffle_count = rng.randint(min_moves, max_moves)
     
     R, C = 4, 4
     goal = goal_state(R, C)
-    shuffled_state, moves = generate_shuffled(goal, R, C, shuffle_count)
+    shuffled_state, moves = random_walk(goal, R, C, shuffle_count, rng)
     
     return shuffled_state, shuffle_count
 
 def format_puzzle_input(state, R=4, C=4):
-    """Format puzzle state as stdin input."""
+    """Format (packed) puzzle state as stdin input."""
+    state = unpack(state, R, C)
     lines = [f"{R} {C}"]
     for i in range(R):
         row = state[i*C:(i+1)*C]
@@ -98,18 +102,22 @@ def run_tests():
     # Uninformed search algorithms (order_spec = 'DULR')
     uninformed_algos = [
         ('BFS', ['-b', 'DULR']),
+        ('BiBFS', ['-B', 'DULR']),
         ('DFS', ['-d', 'DULR']),
         ('IDFS', ['-i', 'DULR']),
+        ('Constructive', ['-c']),
     ]
     
     # Heuristics for informed search
-    heuristics = ['0', 'misplaced', 'manhattan']
+    heuristics = ['0', 'misplaced', 'manhattan', 'linear', 'walking']
     
     # Informed search algorithms
     informed_algos = [
         ('Best-First', '-f'),
         ('A*', '-a'),
         ('SMA*', '-s'),
+        ('ARA*', '-W'),
+        ('Beam', '-m'),
     ]
     
     main_script = os.path.join(os.path.dirname(__file__), 'main.py')
@@ -1,23 +1,462 @@
-from state import idx_to_rc
+from bisect import bisect_left
+from operator import getitem
+from state import idx_to_rc, pack, unpack
+from patterndb import get_pdb
 
 
+# Wszystkie heurystyki przyjmują stan spakowany (patrz state.pack).
 def h_zero(state, R, C, goal_pos):
     return 0
 
 
 def h_misplaced(state, R, C, goal_pos):
+    by_pos = _cost_by_pos(_table_misplaced, R, C, goal_pos)
+    return sum(map(getitem, by_pos, unpack(state, R, C)))
+
+
+def h_manhattan(state, R, C, goal_pos):
+    by_pos = _cost_by_pos(_table_manhattan, R, C, goal_pos)
+    return sum(map(getitem, by_pos, unpack(state, R, C)))
+
+
+# Addytywne bazy wzorców (patrz patterndb.py); tablice ładowane przy pierwszym użyciu
+def _pdb_value(name, state, R, C, goal_pos):
+    tiles = unpack(state, R, C)
+    pos = [0] * len(tiles)
+    for idx, val in enumerate(tiles):
+        pos[val] = idx
+    return get_pdb(name, R, C, goal_pos).value(pos)
+
+
+def h_pdb555(state, R, C, goal_pos):
+    return _pdb_value('pdb555', state, R, C, goal_pos)
+
+
+def h_pdb663(state, R, C, goal_pos):
+    return _pdb_value('pdb663', state, R, C, goal_pos)
+
+
+# Manhattan + konflikty liniowe oraz walking distance - z tablic liczonych raz
+# na (R, C, cel), patrz _LinearConflictTables i _WalkingDistanceTables.
+def h_linear_conflict(state, R, C, goal_pos):
+    return _tables_for(_LinearConflictTables, R, C, goal_pos).value(unpack(state, R, C))
+
+
+def h_walking_distance(state, R, C, goal_pos):
+    return _tables_for(_WalkingDistanceTables, R, C, goal_pos).value(unpack(state, R, C))
+
+
+PDB_IDS = {
+    h_pdb555: 'pdb555',
+    h_pdb663: 'pdb663',
+}
+
+
+# Tablice kosztów płytek: cost[tile][idx] = wkład płytki `tile` stojącej na polu `idx`.
+# Heurystyki będące sumą takich wkładów można aktualizować w O(1) na ruch.
+def _table_zero(R, C, goal_pos):
+    return [[0] * (R * C) for _ in range(R * C)]
+
+
+def _table_misplaced(R, C, goal_pos):
+    table = [[0] * (R * C) for _ in range(R * C)]
+    for val in range(1, R * C):
+        for idx in range(R * C):
+            table[val][idx] = 0 if goal_pos[val] == idx else 1
+    return table
+
+
+def _table_manhattan(R, C, goal_pos):
+    table = [[0] * (R * C) for _ in range(R * C)]
+    for val in range(1, R * C):
+        gr, gc = idx_to_rc(goal_pos[val], C)
+        for idx in range(R * C):
+            r, c = idx_to_rc(idx, C)
+            table[val][idx] = abs(r - gr) + abs(c - gc)
+    return table
+
+
+# Cache tablic po (R, C, cel) - nowy, równy słownik goal_pos trafia w ten sam
+# wpis, więc cache rośnie z liczbą różnych celów, a nie obiektów goal_pos.
+# Budowa klucza z zawartości celu kosztuje tyle co pół heurystyki Manhattan,
+# więc przed nim jest jedno miejsce na ostatnio użyty obiekt goal_pos (wołania
+# z jednego przeszukiwania); trzymamy referencję, więc porównanie `is` jest pewne.
+_COST_CACHE = {}
+_COST_LAST = {}
+
+
+def _goal_key(R, C, goal_pos):
+    return R, C, tuple(goal_pos.items())
+
+
+def _cost_by_pos(builder, R, C, goal_pos):
+    """Transponowana tablica kosztów (by_pos[idx][tile]), liczona raz na (R, C, cel)."""
+    last = _COST_LAST.get(builder)
+    if last is not None and last[0] is goal_pos and last[1] == R * C:
+        return last[2]
+    key = (builder,) + _goal_key(R, C, goal_pos)
+    by_pos = _COST_CACHE.get(key)
+    if by_pos is None:
+        table = builder(R, C, goal_pos)
+        by_pos = _COST_CACHE[key] = [[table[val][idx] for val in range(R * C)] for idx in range(R * C)]
+    _COST_LAST[builder] = (goal_pos, R * C, by_pos)
+    return by_pos
+
+
+TILE_TABLES = {
+    h_zero: _table_zero,
+    h_misplaced: _table_misplaced,
+    h_manhattan: _table_manhattan,
+}
+
+
+_TABLES_CACHE = {}
+_TABLES_LAST = {}
+
+
+def _tables_for(cls, R, C, goal_pos):
+    """Obiekt z tablicami heurystyki `cls` dla (R, C, cel), z cache procesu."""
+    last = _TABLES_LAST.get(cls)
+    if last is not None and last[0] is goal_pos and last[1] == (R, C):
+        return last[2]
+    key = (cls,) + _goal_key(R, C, goal_pos)
+    tables = _TABLES_CACHE.get(key)
+    if tables is None:
+        tables = _TABLES_CACHE[key] = cls(R, C, goal_pos)
+    _TABLES_LAST[cls] = (goal_pos, (R, C), tables)
+    return tables
+
+
+# Konflikt liniowy: dwie płytki w swoim docelowym wierszu (kolumnie), ustawione
+# w odwrotnej kolejności - jedna musi zejść z linii, co kosztuje 2 ruchy ponad
+# Manhattan. Dla linii liczymy minimalną liczbę płytek do usunięcia, aby reszta
+# stała rosnąco (długość minus najdłuższy podciąg rosnący).
+#
+# Zawartość linii o długości n kodujemy liczbą w systemie (n+1): cyfra pola to
+# docelowa pozycja płytki w linii albo n, gdy płytka do tej linii nie należy
+# (także puste pole). Koszt linii to wtedy zwykłe odczytanie z tablicy.
+def _line_conflicts(key, n):
+    tails = []
     count = 0
-    for idx, val in enumerate(state):
-        if val != 0 and goal_pos[val] != idx:
+    for _ in range(n):
+        key, d = divmod(key, n + 1)
+        if d < n:
             count += 1
-    return count
+            i = bisect_left(tails, d)
+            if i == len(tails):
+                tails.append(d)
+            else:
+                tails[i] = d
+    return count - len(tails)
 
 
-def h_manhattan(state, R, C, goal_pos):
-    s = 0
-    for idx, val in enumerate(state):
-        if val != 0:
+class _LazyLineTable(dict):
+    # dla długich linii (n+1)^n kodów to za dużo - liczymy przy pierwszym użyciu
+    def __init__(self, n):
+        super().__init__()
+        self.n = n
+
+    def __missing__(self, key):
+        value = self[key] = _line_conflicts(key, self.n)
+        return value
+
+
+_LINE_TABLES = {}
+
+
+def _line_table(n):
+    table = _LINE_TABLES.get(n)
+    if table is None:
+        if (n + 1) ** n <= 1 << 17:
+            table = [_line_conflicts(key, n) for key in range((n + 1) ** n)]
+        else:
+            table = _LazyLineTable(n)
+        _LINE_TABLES[n] = table
+    return table
+
+
+class _LinearConflictTables:
+    def __init__(self, R, C, goal_pos):
+        n = R * C
+        self.R = R
+        self.C = C
+        self.manhattan = _table_manhattan(R, C, goal_pos)
+        self.row_of = [idx // C for idx in range(n)]
+        self.col_of = [idx % C for idx in range(n)]
+        # row_w[tile][idx] - wkład płytki na polu idx do kodu jej wiersza
+        self.row_w = [[C * (C + 1) ** (idx % C) for idx in range(n)] for _ in range(n)]
+        self.col_w = [[R * (R + 1) ** (idx // C) for idx in range(n)] for _ in range(n)]
+        for val in range(1, n):
             gr, gc = idx_to_rc(goal_pos[val], C)
+            for idx in range(n):
+                r, c = idx_to_rc(idx, C)
+                if r == gr:
+                    self.row_w[val][idx] = gc * (C + 1) ** c
+                if c == gc:
+                    self.col_w[val][idx] = gr * (R + 1) ** r
+        self.row_lc = _line_table(C)
+        self.col_lc = _line_table(R)
+
+    def keys(self, board):
+        rows = [0] * self.R
+        cols = [0] * self.C
+        row_of, col_of, row_w, col_w = self.row_of, self.col_of, self.row_w, self.col_w
+        for idx, val in enumerate(board):
+            rows[row_of[idx]] += row_w[val][idx]
+            cols[col_of[idx]] += col_w[val][idx]
+        return rows, cols
+
+    def value(self, board):
+        rows, cols = self.keys(board)
+        manhattan = self.manhattan
+        h = sum(manhattan[val][idx] for idx, val in enumerate(board))
+        row_lc, col_lc = self.row_lc, self.col_lc
+        return h + 2 * (sum(row_lc[k] for k in rows) + sum(col_lc[k] for k in cols))
+
+
+# Walking distance (Takahashi): osobno dla wierszy i kolumn liczymy, ile ruchów
+# potrzeba w relaksacji, w której pamiętamy tylko, ile płytek z każdego
+# docelowego wiersza stoi w każdym wierszu (+ wiersz pustego pola), a puste pole
+# może zamienić się z dowolną płytką z sąsiedniego wiersza. Odległości w tym
+# małym grafie liczymy raz BFS-em od konfiguracji docelowej. Ruch pionowy zmienia
+# tylko konfigurację wierszy, poziomy tylko kolumn, a suma obu jest dopuszczalna.
+#
+# Konfigurację kodujemy liczbą: licznik (linia i, docelowa linia j) to cyfra
+# w systemie (W+1) na pozycji i*L + j, a linia pustego pola - cyfra na pozycji L*L.
+_WD_CACHE = {}
+
+
+def _wd_distances(L, W, blank_line):
+    """BFS po konfiguracjach: L linii po W pól, puste pole docelowo w blank_line."""
+    cache_key = (L, W, blank_line)
+    dist = _WD_CACHE.get(cache_key)
+    if dist is not None:
+        return dist
+    B = W + 1
+    blank_w = B ** (L * L)
+    start = blank_line * blank_w
+    for i in range(L):
+        start += (W - (i == blank_line)) * B ** (i * L + i)
+    dist = {start: 0}
+    layer = [start]
+    d = 0
+    while layer:
+        d += 1
+        nxt = []
+        for key in layer:
+            b = key // blank_w
+            for nb in (b - 1, b + 1):
+                if not 0 <= nb < L:
+                    continue
+                for j in range(L):
+                    w_from = B ** (nb * L + j)
+                    if (key // w_from) % B == 0:
+                        continue
+                    # płytka z docelowej linii j przechodzi z linii nb do b
+                    nkey = key - w_from + B ** (b * L + j) + (nb - b) * blank_w
+                    if nkey not in dist:
+                        dist[nkey] = d
+                        nxt.append(nkey)
+        layer = nxt
+    _WD_CACHE[cache_key] = dist
+    return dist
+
+
+class _WalkingDistanceTables:
+    def __init__(self, R, C, goal_pos):
+        n = R * C
+        # liczba konfiguracji rośnie bardzo szybko - dla 5x5 budowa trwa minuty
+        if max(R, C) > 4:
+            raise ValueError(f"Heurystyka walking distance jest dostępna dla plansz do 4x4, nie {R}x{C}.")
+        self.row_of = [idx // C for idx in range(n)]
+        blank_r, blank_c = idx_to_rc(goal_pos[0], C)
+        # wiersze: R linii po C pól; kolumny: C linii po R pól
+        self.row_dist = _wd_distances(R, C, blank_r)
+        self.col_dist = _wd_distances(C, R, blank_c)
+        Br, Bc = C + 1, R + 1
+        self.row_w = [[0] * n for _ in range(n)]
+        self.col_w = [[0] * n for _ in range(n)]
+        for idx in range(n):
             r, c = idx_to_rc(idx, C)
-            s += abs(r - gr) + abs(c - gc)
-    return s
+            self.row_w[0][idx] = r * Br ** (R * R)
+            self.col_w[0][idx] = c * Bc ** (C * C)
+        for val in range(1, n):
+            gr, gc = idx_to_rc(goal_pos[val], C)
+            for idx in range(n):
+                r, c = idx_to_rc(idx, C)
+                self.row_w[val][idx] = Br ** (r * R + gr)
+                self.col_w[val][idx] = Bc ** (c * C + gc)
+
+    def keys(self, board):
+        row_w, col_w = self.row_w, self.col_w
+        return (sum(row_w[val][idx] for idx, val in enumerate(board)),
+                sum(col_w[val][idx] for idx, val in enumerate(board)))
+
+    def value(self, board):
+        rk, ck = self.keys(board)
+        return self.row_dist[rk] + self.col_dist[ck]
+
+
+class IncrementalHeuristic:
+    """Przyrostowe liczenie h na jednej mutowalnej planszy (lista).
+
+    reset(board) zwraca h planszy; push(board, tile, src, dst, h) wywołujemy po
+    przesunięciu płytki `tile` z pola `src` na `dst` i dostajemy nowe h; pop()
+    cofa ostatni push. Gdy heurystyka jest addytywna po płytkach, `table`
+    zawiera tablicę kosztów i silnik może liczyć różnicę bez wywołań metod.
+    Ta klasa bazowa po prostu liczy heurystykę od zera.
+    """
+
+    table = None
+
+    def __init__(self, heur_fn, R, C, goal_pos):
+        self.heur_fn = heur_fn
+        self.R = R
+        self.C = C
+        self.goal_pos = goal_pos
+
+    def reset(self, board):
+        return self.heur_fn(pack(board), self.R, self.C, self.goal_pos)
+
+    def push(self, board, tile, src, dst, h):
+        return self.heur_fn(pack(board), self.R, self.C, self.goal_pos)
+
+    def pop(self):
+        pass
+
+
+class TileTableIncremental(IncrementalHeuristic):
+    def __init__(self, heur_fn, R, C, goal_pos):
+        super().__init__(heur_fn, R, C, goal_pos)
+        self.table = TILE_TABLES[heur_fn](R, C, goal_pos)
+
+    def reset(self, board):
+        table = self.table
+        return sum(table[val][idx] for idx, val in enumerate(board))
+
+    def push(self, board, tile, src, dst, h):
+        return h + self.table[tile][dst] - self.table[tile][src]
+
+
+class PDBIncremental(IncrementalHeuristic):
+    """Po ruchu płytki przeliczamy tylko wzorzec, do którego ona należy."""
+
+    def __init__(self, heur_fn, R, C, goal_pos):
+        super().__init__(heur_fn, R, C, goal_pos)
+        self.pdb = get_pdb(PDB_IDS[heur_fn], R, C, goal_pos)
+        self.stack = []
+
+    def reset(self, board):
+        self.pos = [0] * len(board)
+        for idx, val in enumerate(board):
+            self.pos[val] = idx
+        self.vals = [db.lookup(self.pos) for db in self.pdb.dbs]
+        self.stack = []
+        return sum(self.vals)
+
+    def push(self, board, tile, src, dst, h):
+        self.pos[tile] = dst
+        self.pos[0] = src
+        p = self.pdb.pattern_of.get(tile)
+        if p is None:
+            self.stack.append((tile, src, dst, p, 0))
+            return h
+        old = self.vals[p]
+        new = self.pdb.dbs[p].lookup(self.pos)
+        self.vals[p] = new
+        self.stack.append((tile, src, dst, p, old))
+        return h + new - old
+
+    def pop(self):
+        tile, src, dst, p, old = self.stack.pop()
+        self.pos[tile] = src
+        self.pos[0] = dst
+        if p is not None:
+            self.vals[p] = old
+
+
+class LinearConflictIncremental(IncrementalHeuristic):
+    """Ruch płytki zmienia Manhattan jednej płytki oraz kody co najwyżej dwóch
+    wierszy i dwóch kolumn - przeliczamy tylko je."""
+
+    def __init__(self, heur_fn, R, C, goal_pos):
+        super().__init__(heur_fn, R, C, goal_pos)
+        self.t = _tables_for(_LinearConflictTables, R, C, goal_pos)
+        self.stack = []
+
+    def reset(self, board):
+        self.rows, self.cols = self.t.keys(board)
+        self.stack = []
+        return self.t.value(board)
+
+    def push(self, board, tile, src, dst, h):
+        t = self.t
+        rows, cols = self.rows, self.cols
+        row_lc, col_lc = t.row_lc, t.col_lc
+        rs, rd = t.row_of[src], t.row_of[dst]
+        cs, cd = t.col_of[src], t.col_of[dst]
+        self.stack.append((rs, rows[rs], rd, rows[rd], cs, cols[cs], cd, cols[cd]))
+        before = row_lc[rows[rs]] + col_lc[cols[cs]]
+        before += (row_lc[rows[rd]] if rd != rs else 0) + (col_lc[cols[cd]] if cd != cs else 0)
+        rw, cw = t.row_w, t.col_w
+        # płytka schodzi z src (wchodzi tam puste pole) i staje na dst
+        rows[rs] += rw[0][src] - rw[tile][src]
+        rows[rd] += rw[tile][dst] - rw[0][dst]
+        cols[cs] += cw[0][src] - cw[tile][src]
+        cols[cd] += cw[tile][dst] - cw[0][dst]
+        after = row_lc[rows[rs]] + col_lc[cols[cs]]
+        after += (row_lc[rows[rd]] if rd != rs else 0) + (col_lc[cols[cd]] if cd != cs else 0)
+        manhattan = t.manhattan[tile]
+        return h + manhattan[dst] - manhattan[src] + 2 * (after - before)
+
+    def pop(self):
+        rs, r_old, rd, rd_old, cs, c_old, cd, cd_old = self.stack.pop()
+        self.rows[rd] = rd_old
+        self.rows[rs] = r_old
+        self.cols[cd] = cd_old
+        self.cols[cs] = c_old
+
+
+class WalkingDistanceIncremental(IncrementalHeuristic):
+    """Ruch pionowy zmienia tylko kod wierszy, poziomy tylko kod kolumn."""
+
+    def __init__(self, heur_fn, R, C, goal_pos):
+        super().__init__(heur_fn, R, C, goal_pos)
+        self.t = _tables_for(_WalkingDistanceTables, R, C, goal_pos)
+        self.stack = []
+
+    def reset(self, board):
+        self.rk, self.ck = self.t.keys(board)
+        self.stack = []
+        return self.t.row_dist[self.rk] + self.t.col_dist[self.ck]
+
+    def push(self, board, tile, src, dst, h):
+        t = self.t
+        self.stack.append((self.rk, self.ck))
+        if t.row_of[src] != t.row_of[dst]:
+            rw = t.row_w
+            self.rk += rw[tile][dst] - rw[tile][src] + rw[0][src] - rw[0][dst]
+        else:
+            cw = t.col_w
+            self.ck += cw[tile][dst] - cw[tile][src] + cw[0][src] - cw[0][dst]
+        return t.row_dist[self.rk] + t.col_dist[self.ck]
+
+    def pop(self):
+        self.rk, self.ck = self.stack.pop()
+
+
+INCREMENTAL = {
+    h_linear_conflict: LinearConflictIncremental,
+    h_walking_distance: WalkingDistanceIncremental,
+}
+
+
+def make_incremental(heur_fn, R, C, goal_pos):
+    """Zwraca obiekt IncrementalHeuristic dla dowolnej heurystyki z get_heuristic_fn."""
+    if heur_fn in TILE_TABLES:
+        return TileTableIncremental(heur_fn, R, C, goal_pos)
+    if heur_fn in PDB_IDS:
+        return PDBIncremental(heur_fn, R, C, goal_pos)
+    if heur_fn in INCREMENTAL:
+        return INCREMENTAL[heur_fn](heur_fn, R, C, goal_pos)
+    return IncrementalHeuristic(heur_fn, R, C, goal_pos)
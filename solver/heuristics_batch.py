@@ -0,0 +1,102 @@
+# Wektorowe (NumPy) liczenie heurystyki dla wielu stanów naraz.
+#
+# Silniki rozwijające węzły partiami (astar/best_first z batch_size) zbierają
+# wszystkich następników partii i liczą h jednym wywołaniem: stany spakowane
+# zamieniamy na macierz uint8 (wiersz = stan, kolumna = pole), a heurystykę
+# liczymy indeksowaniem tablic zamiast pętli Pythona po płytkach.
+#   - Manhattan / misplaced / zero: suma cost[pole, płytka] po wierszu,
+#   - bazy wzorców: ranking pozycji płytek wzorca liczony kolumnami.
+# NumPy jest opcjonalny - bez niego make_batch_heuristic zwraca None i silnik
+# zostaje przy zwykłym wywołaniu heur_fn dla każdego stanu.
+
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from state import tile_bits
+from heuristics import h_zero, TILE_TABLES, PDB_IDS, _cost_by_pos
+from patterndb import get_pdb
+
+
+def make_batch_heuristic(heur_fn, R, C, goal_pos):
+    """Zwraca funkcję (lista stanów spakowanych) -> lista h albo None.
+
+    None oznacza: brak NumPy, heurystyka bez wersji wektorowej albo plansza
+    z więcej niż 255 polami (płytki nie mieszczą się w uint8).
+    """
+    if np is None or R * C > 256:
+        return None
+    if heur_fn is h_zero:
+        return _zero_batch
+    if heur_fn in TILE_TABLES:
+        return _TileTableBatch(R, C, _cost_by_pos(TILE_TABLES[heur_fn], R, C, goal_pos))
+    if heur_fn in PDB_IDS:
+        return _PDBBatch(R, C, get_pdb(PDB_IDS[heur_fn], R, C, goal_pos))
+    return None
+
+
+def _zero_batch(states):
+    return [0] * len(states)
+
+
+class _StateMatrix:
+    """Zamiana listy stanów spakowanych na macierz płytek uint8 (k x R*C)."""
+
+    def __init__(self, R, C):
+        self.n = R * C
+        self.bits = tile_bits(R, C)
+        self.nbytes = ((self.n + 1) * self.bits + 7) // 8
+
+    def tiles(self, states):
+        nbytes = self.nbytes
+        raw = np.frombuffer(b''.join([s.to_bytes(nbytes, 'little') for s in states]), dtype=np.uint8)
+        raw = raw.reshape(len(states), nbytes)
+        if self.bits == 8:
+            return raw[:, 1:self.n + 1]
+        # 4 bity na pole: młodsza połówka bajtu to pole parzyste
+        fields = np.empty((len(states), 2 * nbytes), dtype=np.uint8)
+        fields[:, 0::2] = raw & 15
+        fields[:, 1::2] = raw >> 4
+        return fields[:, 1:self.n + 1]
+
+
+class _TileTableBatch(_StateMatrix):
+    def __init__(self, R, C, by_pos):
+        super().__init__(R, C)
+        n = self.n
+        self.cost = np.array(by_pos, dtype=np.uint16).reshape(n * n)
+        self.offsets = np.arange(n, dtype=np.intp) * n
+
+    def __call__(self, states):
+        if not states:
+            return []
+        idx = self.tiles(states) + self.offsets
+        return self.cost[idx].sum(axis=1).tolist()
+
+
+class _PDBBatch(_StateMatrix):
+    def __init__(self, R, C, pdb):
+        super().__init__(R, C)
+        self.patterns = [(db.tiles, np.frombuffer(db.table, dtype=np.uint8)) for db in pdb.dbs]
+        # liczba jedynek dla masek zajętych pól (plansze 4x4 - 16 bitów)
+        self.popcount = np.array([bin(i).count('1') for i in range(1 << self.n)], dtype=np.int64)
+
+    def __call__(self, states):
+        if not states:
+            return []
+        n = self.n
+        # pos[:, t] = pole płytki t (wiersz macierzy płytek to permutacja)
+        pos = np.argsort(self.tiles(states), axis=1).astype(np.int64)
+        total = np.zeros(len(states), dtype=np.int64)
+        for tiles, table in self.patterns:
+            r = np.zeros(len(states), dtype=np.int64)
+            used = np.zeros(len(states), dtype=np.int64)
+            for i, t in enumerate(tiles):
+                p = pos[:, t]
+                bit = np.left_shift(1, p)
+                r = r * (n - i) + p - self.popcount[used & (bit - 1)]
+                used |= bit
+            total += table[r]
+        return total.tolist()
@@ -0,0 +1,33 @@
+# Wspólna historia ruchów dla wszystkich silników: zamiast trzymać w każdym
+# wpisie frontu napis ze ścieżką (path + m), węzeł to indeks w dwóch tablicach
+# (rodzic, ruch). Ścieżkę odtwarzamy raz, po znalezieniu celu.
+
+
+from array import array
+
+
+class MoveHistory:
+    def __init__(self):
+        # węzeł 0 to stan startowy
+        self.parent = array('i', [-1])
+        self.moves = bytearray(b'.')
+
+    def add(self, parent, m):
+        """Dodaje węzeł powstały z `parent` ruchem `m`; zwraca jego indeks."""
+        self.parent.append(parent)
+        self.moves.append(ord(m))
+        return len(self.moves) - 1
+
+    def path(self, node):
+        """Ciąg ruchów od startu do węzła `node`."""
+        parent = self.parent
+        moves = self.moves
+        out = bytearray()
+        while node > 0:
+            out.append(moves[node])
+            node = parent[node]
+        out.reverse()
+        return out.decode('ascii')
+
+    def __len__(self):
+        return len(self.moves)
@@ -2,158 +2,380 @@
 import sys
 import argparse
 import time
-from state import goal_state
-from utils import read_input, is_solvable, generate_shuffled
-from heuristics import h_zero, h_misplaced, h_manhattan
-from search_bfs import bfs
-from search_dfs import dfs
-from search_iddfs import iddfs
-from search_bestfirst import best_first
-from search_astar import astar
-from search_sma import sma_star
+from state import goal_state, goal_tiles, unpack
+from utils import read_input, is_solvable, generate_shuffled, UnsolvableError
+from stats import SearchStats
+
+# Moduły silników i heurystyk ładujemy dopiero po wyborze strategii - CLI jest
+# wywoływane tysiące razy, a import wszystkiego kosztuje więcej niż proste
+# rozwiązanie.
+
+# id heurystyki -> nazwa funkcji w heuristics.py
+HEURISTICS = {
+    '0': 'h_zero',
+    'misplaced': 'h_misplaced',
+    'manhattan': 'h_manhattan',
+    'linear': 'h_linear_conflict',
+    'walking': 'h_walking_distance',
+    'pdb555': 'h_pdb555',
+    'pdb663': 'h_pdb663',
+}
+
 
 def get_heuristic_fn(heuristic_id):
     """Zwraca funkcję heurystyczną na podstawie ID."""
-    if heuristic_id == '0':
-        return h_zero
-    elif heuristic_id == '':
-        return h_misplaced
-    elif heuristic_id == 'manhattan':
-        return h_manhattan
-    else:
-        # Możesz rozszerzyć to o bardziej zaawansowane heurystyki
-        raise ValueError(f"Nieznany identyfikator heurystyki: {heuristic_id}. Użyj '0', 'misplaced', lub 'manhattan'.")
+    name = HEURISTICS.get(heuristic_id)
+    if name is None:
+        ids = ', '.join(f"'{h}'" for h in HEURISTICS)
+        raise ValueError(f"Nieznany identyfikator heurystyki: {heuristic_id}. Użyj jednej z: {ids}.")
+    import heuristics
+    return getattr(heuristics, name)
 
 def get_goal_pos(goal):
-    """Tworzy słownik mapujący wartość płytki na jej docelową pozycję (indeks)."""
+    """Tworzy słownik mapujący wartość płytki na jej docelową pozycję (indeks).
+
+    `goal` to sekwencja płytek (np. goal_tiles(R, C)), nie stan spakowany."""
     return {val: idx for idx, val in enumerate(goal)}
 
-def main():
-    """Główna funkcja programu do rozwiązywania łamigłówki 15."""
-    
-    # 1. Parsowanie Argumentów Wiersza Poleceń
+def build_parser():
+    """Parser argumentów CLI (używany też przez tryb wsadowy)."""
     parser = argparse.ArgumentParser(description="Program rozwiązujący łamigłówkę 15 za pomocą różnych strategii przeszukiwania.")
     
     # Grupa wzajemnie wykluczających się argumentów dla wyboru strategii
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument('-b', '--bfs', type=str, metavar='order', help="Breadth-first search. 'order' definiuje kolejność następców (np. DULR).")
+    group.add_argument('-B', '--bibfs', type=str, metavar='order', help="Bidirectional BFS. 'order' definiuje kolejność następców (np. DULR).")
     group.add_argument('-d', '--dfs', type=str, metavar='order', help="Depth-first search. 'order' definiuje kolejność następców (np. DULR).")
     group.add_argument('-i', '--idfs', type=str, metavar='order', help="Iterative deepenening DFS. 'order' definiuje kolejność następców (np. DULR).")
     group.add_argument('-f', '--bf', type=str, metavar='id_of_heuristic', help="Best-first search. 'id_of_heuristic' to id heurystyki.")   
     group.add_argument('-a', '--astar', type=str, metavar='id_of_heuristic', help="A* search. 'id_of_heuristic' to id heurystyki.")
     group.add_argument('-s', '--sma', type=str, metavar='id_of_heuristic', help="SMA* search. 'id_of_heuristic' to id heurystyki.")
+    group.add_argument('-A', '--idastar', type=str, metavar='id_of_heuristic', help="IDA* search. 'id_of_heuristic' to id heurystyki.")
+    group.add_argument('-W', '--ara', type=str, metavar='id_of_heuristic', help="Anytime ARA*: ważone A* z malejącą wagą (--weight), z limitem czasu --deadline-ms zwraca najlepsze dotąd rozwiązanie. 'id_of_heuristic' to id heurystyki.")
+    group.add_argument('-m', '--beam', type=str, metavar='id_of_heuristic', help="Beam search (--beam-width) - krótkie, nie zawsze optymalne rozwiązania dla dużych plansz; dla 8x8 najlepiej 'linear'. 'id_of_heuristic' to id heurystyki.")
+    group.add_argument('-c', '--constructive', action='store_true', help="Rozwiązanie konstrukcyjne (wiersz po wierszu, kolumna po kolumnie) dla dowolnie dużych plansz; nieoptymalne, czas liniowy w długości rozwiązania.")
+    group.add_argument('-H', '--hda', type=str, metavar='id_of_heuristic', help="Równoległe A* (HDA*) na --workers procesach. 'id_of_heuristic' to id heurystyki.")
+    group.add_argument('--validate', type=str, metavar='PATH', help="Zamiast rozwiązywania: sprawdź plik z rekordami (format jak --batch) - zbiór płytek i rozwiązywalność. Wynik: JSON lines.")
     
     # Argumenty opcjonalne dla Best-first, A*, SMA*
     parser.add_argument('--max-nodes', type=int, default=None, help="Maksymalna liczba węzłów do rozwinięcia (opcjonalne).")
     parser.add_argument('--max-depth', type=int, default=50, help="Maksymalna głębokość dla IDFS (domyślnie 50).")
-    parser.add_argument('--max-memory', type=int, default=10000, help="Maksymalny limit pamięci dla SMA* (domyślnie 10000).")
+    parser.add_argument('--prune-depth', type=int, default=2, metavar='L', help="IDFS: odcinaj zbędne ciągi ruchów do długości L (domyślnie 2 - tylko cofnięcia; np. 8 lub 10).")
+    parser.add_argument('--tie-break', type=str, default='high-g', choices=['high-g', 'lifo', 'fifo', 'heap'], help="Rozstrzyganie remisów f w liście otwartej A*/Best-First (domyślnie high-g; 'heap' wymusza kopiec).")
+    parser.add_argument('--expand-batch', type=int, default=None, metavar='K', help="A*/Best-First: rozwijaj do K węzłów z tej samej warstwy f naraz; heurystyka liczona wektorowo (wymaga NumPy; manhattan, misplaced, pdb).")
+    parser.add_argument('--weight', type=float, default=3.0, help="ARA*: waga początkowa w (f = g + w*h), zmniejszana o 0.5 do 1 (domyślnie 3.0).")
+    parser.add_argument('--deadline-ms', type=int, default=None, metavar='MS', help="ARA*: limit czasu przeszukiwania w milisekundach.")
+    parser.add_argument('--beam-width', type=int, default=1000, help="Beam search: liczba stanów zostawianych w każdej warstwie (domyślnie 1000).")
+    parser.add_argument('--beam-order', type=str, default=None, metavar='order', help="Beam search: kolejność następników (np. DULR); 'R' - losowa kolejność i losowe remisy h.")
+    parser.add_argument('--max-memory', type=int, default=10000, help="Limit pamięci SMA* - maksymalna liczba węzłów drzewa w pamięci (domyślnie 10000).")
     parser.add_argument('-r', '--randomize', type=int, default=None, help="Liczba losowych ruchów do wykonania od stanu docelowego, aby wygenerować startowy (zapewnia wykonalność).")
     parser.add_argument('--save-viewer', type=str, default=None, help="Ścieżka pliku JSON, do którego zapisać dane do viewer (initial, solution).")
+    parser.add_argument('--viewer-keyframes', type=int, default=None, metavar='K', help="Klatka kluczowa viewera co K ruchów (domyślnie ok. sqrt(długość * R*C)); skok do dowolnego kroku kosztuje O(K).")
     parser.add_argument('--open-viewer', action='store_true', help="Otwórz przeglądarkę z viewerem i przekaż dane jako payload (base64).")
+    parser.add_argument('--stats', type=str, default=None, choices=['json', 'text'], help="Wypisz na stderr statystyki przeszukiwania (węzły, duplikaty, rozmiary list, EBF, heurystyka, czasy faz).")
+    parser.add_argument('--profile', type=str, nargs='?', const='cprofile', default=None, choices=['cprofile', 'sample'], help="Uruchom strategię pod profilerem (cprofile - domyślnie, sample - próbkowanie stosu co 1 ms) i wypisz na stderr najgorętsze funkcje oraz liczniki (węzły, heurystyka, lista otwarta/zamknięta). HDA*: tylko proces główny.")
+    parser.add_argument('--profile-out', type=str, default=None, metavar='PATH', help="Plik zrzutu profilu (domyślnie profile.pstats dla cprofile, profile.folded - format flamegraph - dla sample).")
+    parser.add_argument('--cache', type=str, nargs='?', const='', default=None, metavar='PATH', help="Trwały cache rozwiązań (SQLite). Bez ścieżki: cache_data/solutions.sqlite albo $PUZZLE_CACHE_DB.")
+    parser.add_argument('--cache-size', type=int, default=None, help="Maksymalna liczba stanów w cache (domyślnie 200000; nadmiar usuwany od najdawniej używanych).")
+
+    # Tryb wsadowy (batch.py)
+    parser.add_argument('--batch', type=str, default=None, metavar='PATH', help="Rozwiąż wiele łamigłówek: plik z rekordami (jeden na linię, '-' = stdin). Wynik: JSON lines.")
+    parser.add_argument('--workers', type=int, default=None, help="Liczba procesów w trybie wsadowym i dla HDA* (domyślnie liczba rdzeni).")
+    parser.add_argument('--time-limit', type=float, default=None, help="Limit czasu na jedną łamigłówkę w sekundach (tryb wsadowy).")
+    parser.add_argument('--unordered', action='store_true', help="Wypisuj wyniki w kolejności ukończenia zamiast kolejności wejścia.")
+    parser.add_argument('--chunksize', type=int, default=1, help="Liczba rekordów wysyłanych naraz do procesu (domyślnie 1).")
+    parser.add_argument('--output', type=str, default=None, help="Plik wynikowy trybu wsadowego i walidacji (domyślnie stdout).")
+
+    return parser
+
+
+# Rejestr strategii: nazwa flagi CLI -> funkcja uruchamiająca silnik. Każda
+# importuje swój moduł dopiero przy wywołaniu.
+STRATEGIES = {}
+
+# strategie zwracające rozwiązania optymalne (tylko te zapisujemy w cache).
+# Bez SMA*: po dojściu do limitu pamięci zapomina prawdziwe f dzieci (INF) i
+# może zwrócić dłuższą ścieżkę, a cache traktuje każdy sufiks jako dokładny.
+OPTIMAL_STRATEGIES = ('bfs', 'bibfs', 'astar', 'idastar', 'hda')
+
+# strategie korzystające z odległości dokładnych z cache (argument `exact`)
+EXACT_STRATEGIES = ('astar', 'idastar')
+
+
+def strategy(name):
+    def register(fn):
+        STRATEGIES[name] = fn
+        return fn
+    return register
+
+
+@strategy('bfs')
+def _run_bfs(args, start, goal, R, C, goal_pos, log, stats, exact):
+    from search_bfs import bfs
+    print(f"Uruchamiam BFS z kolejnością: {args.bfs}", file=log)
+    return bfs(start, goal, R, C, args.bfs, args.max_nodes, stats=stats)
+
+
+@strategy('bibfs')
+def _run_bibfs(args, start, goal, R, C, goal_pos, log, stats, exact):
+    from search_bibfs import bibfs
+    print(f"Uruchamiam dwukierunkowy BFS z kolejnością: {args.bibfs}", file=log)
+    return bibfs(start, goal, R, C, args.bibfs, args.max_nodes, stats=stats)
+
+
+@strategy('dfs')
+def _run_dfs(args, start, goal, R, C, goal_pos, log, stats, exact):
+    from search_dfs import dfs
+    print(f"Uruchamiam DFS z kolejnością: {args.dfs}", file=log)
+    return dfs(start, goal, R, C, args.dfs, args.max_nodes, stats=stats)
+
+
+@strategy('idfs')
+def _run_idfs(args, start, goal, R, C, goal_pos, log, stats, exact):
+    from search_iddfs import iddfs
+    print(f"Uruchamiam IDFS z kolejnością: {args.idfs}, Max głębokość: {args.max_depth}", file=log)
+    def report(depth, nodes):
+        print(f"Iteracja: głębokość={depth}, węzły={nodes}", file=log)
+    return iddfs(start, goal, R, C, args.idfs, args.max_depth, args.max_nodes, stats=stats, prune_depth=args.prune_depth, report=report)
+
+
+@strategy('bf')
+def _run_bf(args, start, goal, R, C, goal_pos, log, stats, exact):
+    from search_bestfirst import best_first
+    heur_fn = get_heuristic_fn(args.bf)
+    print(f"Uruchamiam Best-First z heurystyką: {args.bf}", file=log)
+    return best_first(start, goal, R, C, heur_fn, goal_pos, None, args.max_nodes, args.tie_break, stats=stats, batch_size=args.expand_batch)
+
+
+@strategy('astar')
+def _run_astar(args, start, goal, R, C, goal_pos, log, stats, exact):
+    from search_astar import astar
+    heur_fn = get_heuristic_fn(args.astar)
+    print(f"Uruchamiam A* z heurystyką: {args.astar}", file=log)
+    return astar(start, goal, R, C, heur_fn, goal_pos, None, args.max_nodes, args.tie_break, stats=stats, exact=exact, batch_size=args.expand_batch)
+
+
+@strategy('sma')
+def _run_sma(args, start, goal, R, C, goal_pos, log, stats, exact):
+    from search_sma import sma_star
+    heur_fn = get_heuristic_fn(args.sma)
+    print(f"Uruchamiam SMA* z heurystyką: {args.sma}, Max pamięć: {args.max_memory}", file=log)
+    return sma_star(start, goal, R, C, heur_fn, goal_pos, None, args.max_nodes, args.max_memory, stats=stats)
+
+
+@strategy('idastar')
+def _run_idastar(args, start, goal, R, C, goal_pos, log, stats, exact):
+    from search_idastar import idastar
+    heur_fn = get_heuristic_fn(args.idastar)
+    print(f"Uruchamiam IDA* z heurystyką: {args.idastar}", file=log)
+    def report(threshold, nodes):
+        print(f"Iteracja: próg={threshold}, węzły={nodes}", file=log)
+    return idastar(start, goal, R, C, heur_fn, goal_pos, None, args.max_nodes, report, stats=stats, exact=exact)
+
+
+@strategy('ara')
+def _run_ara(args, start, goal, R, C, goal_pos, log, stats, exact):
+    from search_ara import ara_star
+    heur_fn = get_heuristic_fn(args.ara)
+    deadline = f"{args.deadline_ms} ms" if args.deadline_ms is not None else 'brak'
+    print(f"Uruchamiam ARA* z heurystyką: {args.ara}, waga: {args.weight}, limit czasu: {deadline}", file=log)
+    def report(w, length, bound):
+        print(f"Rozwiązanie: w={w:g}, długość={length}, ograniczenie suboptymalności={bound:.4f}", file=log)
+    return ara_star(start, goal, R, C, heur_fn, goal_pos, None, args.max_nodes, args.deadline_ms, args.weight, stats=stats, report=report)
+
+
+@strategy('beam')
+def _run_beam(args, start, goal, R, C, goal_pos, log, stats, exact):
+    from search_beam import beam_search
+    heur_fn = get_heuristic_fn(args.beam)
+    print(f"Uruchamiam beam search z heurystyką: {args.beam}, szerokość: {args.beam_width}", file=log)
+    return beam_search(start, goal, R, C, heur_fn, goal_pos, args.beam_order, args.beam_width, None, args.max_nodes, stats=stats)
+
+
+@strategy('constructive')
+def _run_constructive(args, start, goal, R, C, goal_pos, log, stats, exact):
+    from search_constructive import constructive_solve
+    print(f"Uruchamiam rozwiązanie konstrukcyjne dla planszy {R}x{C}", file=log)
+    return constructive_solve(start, goal, R, C, stats=stats)
+
+
+@strategy('hda')
+def _run_hda(args, start, goal, R, C, goal_pos, log, stats, exact):
+    from search_hda import hda_star
+    heur_fn = get_heuristic_fn(args.hda)
+    print(f"Uruchamiam HDA* z heurystyką: {args.hda}, procesy: {args.workers or 'wszystkie rdzenie'}", file=log)
+    return hda_star(start, goal, R, C, heur_fn, goal_pos, None, args.max_nodes, args.tie_break, stats=stats, workers=args.workers, log=log)
+
+
+def selected_strategy(args):
+    """Nazwa strategii wybranej w `args` (pierwsza ustawiona flaga z rejestru)."""
+    for name in STRATEGIES:
+        if getattr(args, name, None):
+            return name
+    return None
+
+
+def run_strategy(args, start_state, goal_packed, R, C, goal_pos, log=None, stats=None):
+    """Uruchamia strategię wybraną w `args` i zwraca ścieżkę (lub None).
+
+    Komunikaty trafiają do `log` (domyślnie stderr); jeśli podano słownik
+    `stats` (SearchStats), silnik wypełni w nim liczniki przeszukiwania.
+    """
+    log = log or sys.stderr
+    name = selected_strategy(args)
+    if name is None:
+        return None
+
+    cache = exact = None
+    if getattr(args, 'cache', None) is not None and name not in OPTIMAL_STRATEGIES:
+        # cache daje rozwiązania optymalne - nie podmieniamy nimi wyniku tej strategii
+        print(f"Cache pominięty: strategia {name} nie jest optymalna", file=log)
+    elif getattr(args, 'cache', None) is not None:
+        from cache import get_cache
+        cache = get_cache(args.cache or None, args.cache_size)
+        cached = cache.lookup(R, C, start_state)
+        if cached is not None:
+            print(f"Rozwiązanie z cache ({len(cached)} ruchów)", file=log)
+            return cached
+        if name in EXACT_STRATEGIES:
+            exact = cache.exact_table(R, C)
+
+    t0 = time.time()
+    solution_path = STRATEGIES[name](args, start_state, goal_packed, R, C, goal_pos, log, stats, exact)
+    elapsed = time.time() - t0
+    print(f"Time taken: {elapsed:.6f} s", file=log)
+
+    # zapisujemy tylko wyniki strategii optymalnych - cache daje odległości dokładne
+    if cache is not None and solution_path is not None and name in OPTIMAL_STRATEGIES:
+        cache.store(R, C, start_state, solution_path)
+
+    return solution_path
+
+
+def print_stats(stats, fmt):
+    """Statystyki na stderr (stdout zostaje dla długości i ścieżki rozwiązania)."""
+    import json
+    data = stats.to_dict()
+    if fmt == 'json':
+        print(json.dumps(data), file=sys.stderr)
+        return
+    for key, value in data.items():
+        if key == 'iterations':
+            value = ', '.join(f"{it['threshold']}:{it['nodes']}" for it in value)
+        print(f"{key}: {value}", file=sys.stderr)
+
+
+def main():
+    """Główna funkcja programu do rozwiązywania łamigłówki 15."""
     
-    args = parser.parse_args()
+    # 1. Parsowanie Argumentów Wiersza Poleceń
+    args = build_parser().parse_args()
+    # --profile potrzebuje liczników silnika, nawet bez --stats
+    stats = SearchStats() if args.stats or args.profile else None
+
+    if args.batch:
+        from batch import run_batch
+        run_batch(args)
+        return
+    if args.validate:
+        from validate import run_validate
+        run_validate(args)
+        return
 
     # 2. Przygotowanie danych: wczytanie lub wygenerowanie losowego startu
+    if stats is not None:
+        stats.begin('input')
     if args.randomize is not None:
         # generujemy 4x4 puzzle od stanu docelowego
         R, C = 4, 4
-        goal_state_tuple = goal_state(R, C)
-        start_state, shuffle_seq = generate_shuffled(goal_state_tuple, R, C, args.randomize)
-        goal_pos = get_goal_pos(goal_state_tuple)
+        goal_packed = goal_state(R, C)
+        start_state, shuffle_seq = generate_shuffled(goal_packed, R, C, args.randomize)
+        goal_pos = get_goal_pos(goal_tiles(R, C))
         # pokażemy użytkownikowi w stderr wygenerowaną planszę i sekwencję mieszania
         print("Shuffled grid (generated from goal by random moves):", file=sys.stderr)
+        start_tiles = unpack(start_state, R, C)
         for i in range(R):
-            row = start_state[i*C:(i+1)*C]
+            row = start_tiles[i*C:(i+1)*C]
             print(' '.join(map(str, row)), file=sys.stderr)
         print(f"Shuffle moves ({len(shuffle_seq)}): {shuffle_seq}", file=sys.stderr)
     else:
         # 2. Wczytanie Danych z wejścia
         R, C, start_state = read_input()
-        goal_state_tuple = goal_state(R, C)
-        goal_pos = get_goal_pos(goal_state_tuple)
+        shuffle_seq = None
+        goal_packed = goal_state(R, C)
+        goal_pos = get_goal_pos(goal_tiles(R, C))
 
     # 3. Sprawdzenie Rozwiązywalności
-    if not is_solvable(start_state, R, C, goal_state_tuple):
+    if stats is not None:
+        stats.begin('solvable')
+    if not is_solvable(start_state, R, C, goal_packed):
         print("0")
         print("")
         print("Puzzle nie jest rozwiązywalne!")
         return
 
     # 4. Wybór i Uruchomienie Strategii
-    
-    solution_path = None
-    
-    if args.bfs:
-        print(f"Uruchamiam BFS z kolejnością: {args.bfs}", file=sys.stderr)
-        t0 = time.time()
-        solution_path = bfs(start_state, goal_state_tuple, R, C, args.bfs, args.max_nodes)
-        elapsed = time.time() - t0
-        print(f"Time taken: {elapsed:.6f} s", file=sys.stderr)
-
-    elif args.dfs:
-        print(f"Uruchamiam DFS z kolejnością: {args.dfs}", file=sys.stderr)
-        t0 = time.time()
-        solution_path = dfs(start_state, goal_state_tuple, R, C, args.dfs, args.max_nodes)
-        elapsed = time.time() - t0
-        print(f"Time taken: {elapsed:.6f} s", file=sys.stderr)
-
-    elif args.idfs:
-        print(f"Uruchamiam IDFS z kolejnością: {args.idfs}, Max głębokość: {args.max_depth}", file=sys.stderr)
-        t0 = time.time()
-        solution_path = iddfs(start_state, goal_state_tuple, R, C, args.idfs, args.max_depth, args.max_nodes)
-        elapsed = time.time() - t0
-        print(f"Time taken: {elapsed:.6f} s", file=sys.stderr)
-
-    elif args.bf:
-        heur_fn = get_heuristic_fn(args.bf)
-        print(f"Uruchamiam Best-First z heurystyką: {args.bf}", file=sys.stderr)
-        t0 = time.time()
-        solution_path = best_first(start_state, goal_state_tuple, R, C, heur_fn, goal_pos, None, args.max_nodes)
-        elapsed = time.time() - t0
-        print(f"Time taken: {elapsed:.6f} s", file=sys.stderr)
-
-    elif args.astar:
-        heur_fn = get_heuristic_fn(args.astar)
-        print(f"Uruchamiam A* z heurystyką: {args.astar}", file=sys.stderr)
-        t0 = time.time()
-        solution_path = astar(start_state, goal_state_tuple, R, C, heur_fn, goal_pos, None, args.max_nodes)
-        elapsed = time.time() - t0
-        print(f"Time taken: {elapsed:.6f} s", file=sys.stderr)
-        
-    elif args.sma:
-        heur_fn = get_heuristic_fn(args.sma)
-        print(f"Uruchamiam SMA* z heurystyką: {args.sma}, Max pamięć: {args.max_memory}", file=sys.stderr)
-        t0 = time.time()
-        solution_path = sma_star(start_state, goal_state_tuple, R, C, heur_fn, goal_pos, None, args.max_nodes, args.max_memory)
-        elapsed = time.time() - t0
-        print(f"Time taken: {elapsed:.6f} s", file=sys.stderr)
-        
+    try:
+        if args.profile:
+            from profiling import run_profiled
+            solution_path = run_profiled(args.profile, args.profile_out, lambda: run_strategy(
+                args, start_state, goal_packed, R, C, goal_pos, stats=stats), stats)
+        else:
+            solution_path = run_strategy(args, start_state, goal_packed, R, C, goal_pos, stats=stats)
+    except UnsolvableError:
+        # parzystość przepuszcza np. planszę 1xN z płytkami w złej kolejności
+        print("0")
+        print("")
+        print("Puzzle nie jest rozwiązywalne!")
+        return
+    if stats is not None:
+        stats.end()
+        stats.solution_length = len(solution_path) if solution_path is not None else None
+        if args.stats:
+            print_stats(stats, args.stats)
+
     # 5. Wypisanie Wyniku
     if solution_path is not None:
         print(len(solution_path))
-        print(solution_path)
+        if isinstance(solution_path, str):
+            print(solution_path)
+        else:
+            # strumień ruchów (search_constructive.MoveStream) - porcjami;
+            # len() wyżej skonstruował go raz, tu czytamy zapisane ruchy
+            for chunk in solution_path:
+                sys.stdout.write(chunk)
+            print()
     else:
         print("-1")
         print("")
 
     # 6. Integracja z viewerem: zapisz JSON i (opcjonalnie) otwórz viewer z payload
+    if args.save_viewer or args.open_viewer:
+        export_viewer(args, R, C, start_state, solution_path, shuffle_seq)
+
+
+def export_viewer(args, R, C, start_state, solution_path, shuffle_seq=None):
+    """Zapisuje dane dla viewera (--save-viewer) i/lub otwiera go w przeglądarce (--open-viewer)."""
     try:
         import json, base64, webbrowser, urllib.parse, os
+        from timeline import build_timeline
+        initial = list(unpack(start_state, R, C))
         viewer_payload = {
             'R': R,
             'C': C,
-            'initial': list(start_state),
-            'solution_moves': solution_path if solution_path is not None else '',
+            'initial': initial,
             'solution_length': len(solution_path) if solution_path is not None else -1,
+            # klatki kluczowe + spakowane ruchy (timeline.py) - bez napisu ruchów
+            'timeline': build_timeline(R, C, initial, solution_path or '', args.viewer_keyframes),
         }
         # include shuffle sequence if present
-        if 'shuffle_seq' in locals():
+        if shuffle_seq is not None:
             viewer_payload['shuffle_seq'] = shuffle_seq
 
         if args.save_viewer:
             try:
                 with open(args.save_viewer, 'w', encoding='utf-8') as f:
-                    json.dump(viewer_payload, f, ensure_ascii=False, indent=2)
+                    json.dump(viewer_payload, f, ensure_ascii=False, separators=(',', ':'))
                 print(f"Viewer JSON saved to: {args.save_viewer}", file=sys.stderr)
             except Exception as e:
                 print(f"Failed to save viewer JSON: {e}", file=sys.stderr)
@@ -174,5 +396,6 @@ def main():
     except Exception:
         pass
 
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,101 @@
+# Automat skończony odcinający zbędne ciągi ruchów pustego pola (Taylor i Korf).
+#
+# Ciąg ruchów jest zbędny, jeśli ten sam efekt (permutację płytek i położenie
+# pustego pola) daje ciąg krótszy albo tej samej długości i wcześniejszy
+# leksykograficznie. Takie ciągi znajdujemy BFS-em po ciągach do długości
+# `depth` na nieograniczonej planszy. Zbędny ciąg odrzucamy tylko wtedy, gdy
+# jego zamiennik odwiedza podzbiór tych samych pól - wtedy zamiennik mieści
+# się na każdej planszy, na której mieści się ciąg odrzucany.
+#
+# Ze zbioru zabronionych ciągów budujemy automat Aho-Corasick: stan automatu
+# zmienia się przy każdym ruchu, a -1 oznacza, że bieżąca ścieżka kończy się
+# zabronionym ciągiem. depth=2 daje tylko zakaz natychmiastowego cofnięcia.
+
+
+from state import MOVES
+
+ALPHABET = 'LRUD'
+
+_AUTOMATA = {}
+
+
+def duplicate_sequences(depth):
+    """Zbiór minimalnych zabronionych ciągów ruchów o długości <= depth."""
+    forbidden = set()
+    # (ciąg, pole pustego, przesunięte płytki {pole: płytka}, odwiedzone pola)
+    layer = [('', (0, 0), {}, frozenset([(0, 0)]))]
+    seen = {((0, 0), frozenset()): [frozenset([(0, 0)])]}
+    for _ in range(depth):
+        nxt = []
+        for seq, (br, bc), moved, foot in layer:
+            for m in ALPHABET:
+                s = seq + m
+                if any(s[i:] in forbidden for i in range(1, len(s) - 1)):
+                    continue
+                dr, dc = MOVES[m]
+                n = (br + dr, bc + dc)
+                after = dict(moved)
+                tile = after.pop(n, n)
+                if tile != (br, bc):
+                    after[(br, bc)] = tile
+                else:
+                    after.pop((br, bc), None)
+                nfoot = foot | {n}
+                key = (n, frozenset(after.items()))
+                feet = seen.setdefault(key, [])
+                if any(f <= nfoot for f in feet):
+                    forbidden.add(s)
+                    continue
+                feet.append(nfoot)
+                nxt.append((s, n, after, nfoot))
+        layer = nxt
+    return forbidden
+
+
+def move_automaton(depth=2):
+    """Tablica przejść: trans[q][ruch] -> nowy stan albo -1 (ścieżka do odcięcia).
+
+    Stan początkowy to 0. Wynik jest liczony raz na proces dla danego `depth`.
+    """
+    trans = _AUTOMATA.get(depth)
+    if trans is not None:
+        return trans
+    # trie zabronionych ciągów
+    children = [{}]
+    dead = [False]
+    for s in duplicate_sequences(max(depth, 2)):
+        q = 0
+        for m in s:
+            nq = children[q].get(m)
+            if nq is None:
+                nq = len(children)
+                children[q][m] = nq
+                children.append({})
+                dead.append(False)
+            q = nq
+        dead[q] = True
+    # dowiązania sufiksowe (BFS) i pełna funkcja przejścia
+    goto = [dict() for _ in children]
+    fail = [0] * len(children)
+    order = [0]
+    for q in order:
+        for m in ALPHABET:
+            c = children[q].get(m)
+            if c is None:
+                goto[q][m] = goto[fail[q]][m] if q else 0
+                continue
+            goto[q][m] = c
+            if q:
+                fail[c] = goto[fail[q]][m]
+                dead[c] = dead[c] or dead[fail[c]]
+            order.append(c)
+    # numerujemy tylko stany żywe; przejście do martwego -> -1
+    ids = {}
+    for q in order:
+        if not dead[q]:
+            ids[q] = len(ids)
+    trans = [None] * len(ids)
+    for q, i in ids.items():
+        trans[i] = {m: ids.get(goto[q][m], -1) for m in ALPHABET}
+    _AUTOMATA[depth] = trans
+    return trans
@@ -0,0 +1,117 @@
+# Listy otwarte dla A* i Best-First.
+#
+# Wartości f (i h) naszych heurystyk to małe liczby całkowite, więc zamiast
+# kopca wystarcza tablica kubełków indeksowana przez f: wstawienie i zdjęcie
+# to O(1) (zamortyzowane), bez porównywania krotek. Remisy w obrębie jednego
+# f rozstrzygamy według `tie_break`:
+#   'high-g' - najpierw węzły z największym g (najgłębsze), LIFO w obrębie g,
+#   'lifo'   - ostatnio wstawiony,
+#   'fifo'   - pierwszy wstawiony (jak dotychczasowy kopiec z licznikiem).
+# Dla heurystyk niecałkowitych (lub tie_break='heap') zostaje kopiec (HeapQueue).
+
+
+import heapq
+from collections import deque
+
+TIE_BREAKS = ('high-g', 'lifo', 'fifo')
+
+
+class BucketQueue:
+    def __init__(self, tie_break='high-g'):
+        if tie_break not in TIE_BREAKS:
+            raise ValueError(f"Nieznana reguła remisów: {tie_break}. Użyj jednej z: {', '.join(TIE_BREAKS)}.")
+        self.by_g = tie_break == 'high-g'
+        self.fifo = tie_break == 'fifo'
+        self.buckets = []
+        self.min_f = 0
+        self.size = 0
+
+    def push(self, f, g, item):
+        buckets = self.buckets
+        if f >= len(buckets):
+            buckets.extend([None] * (f + 1 - len(buckets)))
+        b = buckets[f]
+        if b is None:
+            b = buckets[f] = deque() if self.fifo else []
+        if self.by_g:
+            # podkubełki po g; ostatni podkubełek jest zawsze niepusty
+            if g >= len(b):
+                b.extend([] for _ in range(g + 1 - len(b)))
+            b[g].append(item)
+        else:
+            b.append(item)
+        if f < self.min_f:
+            self.min_f = f
+        self.size += 1
+
+    def pop(self):
+        if not self.size:
+            raise IndexError('pop from empty BucketQueue')
+        buckets = self.buckets
+        f = self.min_f
+        b = buckets[f]
+        while not b:
+            f += 1
+            b = buckets[f]
+        self.min_f = f
+        self.size -= 1
+        if self.by_g:
+            top = b[-1]
+            item = top.pop()
+            if not top:
+                b.pop()
+                while b and not b[-1]:
+                    b.pop()
+            return item
+        if self.fifo:
+            return b.popleft()
+        return b.pop()
+
+    def peek_f(self):
+        """Najmniejsze f na liście (lista niepusta)."""
+        buckets = self.buckets
+        f = self.min_f
+        while not buckets[f]:
+            f += 1
+        self.min_f = f
+        return f
+
+    def __len__(self):
+        return self.size
+
+
+class HeapQueue:
+    """Kopiec (f, licznik, element) - dla dowolnych porównywalnych f."""
+
+    def __init__(self):
+        self.heap = []
+        self.count = 0
+
+    def push(self, f, g, item):
+        self.count += 1
+        heapq.heappush(self.heap, (f, self.count, item))
+
+    def pop(self):
+        return heapq.heappop(self.heap)[2]
+
+    def peek_f(self):
+        return self.heap[0][0]
+
+    def __len__(self):
+        return len(self.heap)
+
+
+# --profile: nakładka licząca operacje (profiling._CountedQueue); sprawdzana raz
+# przy tworzeniu listy, więc bez profilowania push/pop nic nie kosztuje
+PROFILE_WRAP = None
+
+
+def make_open_list(f0, tie_break='high-g'):
+    """Kubełki dla całkowitych f (domyślnie), kopiec dla pozostałych."""
+    if tie_break == 'heap' or not isinstance(f0, int) or f0 < 0:
+        queue = HeapQueue()
+    else:
+        queue = BucketQueue(tie_break)
+    if PROFILE_WRAP is not None:
+        return PROFILE_WRAP(queue)
+    return queue
@@ -0,0 +1,232 @@
+# Addytywne, rozłączne bazy wzorców (pattern databases).
+#
+# Każdy wzorzec to zbiór płytek; tablica przechowuje minimalną liczbę ruchów
+# płytek wzorca potrzebną, by ustawić je na pozycjach docelowych (ruchy pozostałych
+# płytek są darmowe, więc wartości z rozłącznych wzorców można sumować).
+# Tablice liczymy jednorazowo wstecznym BFS-em od stanu docelowego, zapisujemy
+# jako surowe bajty na dysku i mapujemy do pamięci (mmap) - kilka procesów
+# czytających ten sam plik współdzieli strony z cache systemu.
+
+
+import os
+import sys
+import mmap
+from array import array
+from state import idx_to_rc, rc_to_idx, MOVES
+
+
+# Podziały płytek dla 15-tki (cel: 1..15, puste pole w prawym dolnym rogu)
+PARTITIONS = {
+    'pdb555': [(1, 2, 3, 5, 6), (4, 7, 8, 11, 12), (9, 10, 13, 14, 15)],
+    'pdb663': [(1, 5, 6, 9, 10, 13), (7, 8, 11, 12, 14, 15), (2, 3, 4)],
+}
+
+MAGIC = b'PDB1'
+UNKNOWN = 255
+
+PDB_DIR = os.environ.get('PUZZLE_PDB_DIR',
+                         os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pdb_data'))
+
+
+def _num_placements(n, k):
+    count = 1
+    for i in range(k):
+        count *= n - i
+    return count
+
+
+def rank(pos, n):
+    """Ranking k-permutacji: pozycje płytek wzorca -> indeks w tablicy."""
+    r = 0
+    used = 0
+    for i, p in enumerate(pos):
+        r = r * (n - i) + p - (used & ((1 << p) - 1)).bit_count()
+        used |= 1 << p
+    return r
+
+
+def unrank(r, n, k):
+    digits = [0] * k
+    for i in range(k - 1, -1, -1):
+        r, digits[i] = divmod(r, n - i)
+    free = list(range(n))
+    return [free.pop(d) for d in digits]
+
+
+def _neighbors(R, C):
+    nbrs = []
+    for idx in range(R * C):
+        r, c = idx_to_rc(idx, C)
+        lst = []
+        for dr, dc in MOVES.values():
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < R and 0 <= nc < C:
+                lst.append(rc_to_idx(nr, nc, C))
+        nbrs.append(lst)
+    return nbrs
+
+
+def build_table(R, C, tiles, goal_pos, verbose=False):
+    """Wsteczny BFS po (rozmieszczenie płytek wzorca, obszar pustego pola).
+
+    Ruch pustego pola po polach spoza wzorca kosztuje 0 (zalewamy cały obszar),
+    ruch płytki wzorca kosztuje 1. Dla każdego rozmieszczenia zapisujemy
+    minimum po położeniach pustego pola.
+    """
+    n = R * C
+    k = len(tiles)
+    nbrs = _neighbors(R, C)
+    size = _num_placements(n, k)
+    table = bytearray([UNKNOWN]) * size
+    # seen[rank * n + pole]: 1 - w kolejce, 2 - obszar pustego pola już rozwinięty
+    seen = bytearray(size * n)
+
+    goal = [goal_pos[t] for t in tiles]
+    r0 = rank(goal, n)
+    layer = array('q')
+    for b in range(n):
+        if b not in goal:
+            seen[r0 * n + b] = 1
+            layer.append(r0 * n + b)
+
+    d = 0
+    while layer:
+        nxt = array('q')
+        for code in layer:
+            if seen[code] == 2:
+                continue
+            r, blank = divmod(code, n)
+            base = r * n
+            pos = unrank(r, n, k)
+            where = {p: i for i, p in enumerate(pos)}
+            if table[r] == UNKNOWN:
+                table[r] = d
+            # obszar osiągalny dla pustego pola bez ruszania płytek wzorca
+            region = [blank]
+            seen[code] = 2
+            for b in region:
+                for nb in nbrs[b]:
+                    if nb not in where and seen[base + nb] != 2:
+                        seen[base + nb] = 2
+                        region.append(nb)
+            for b in region:
+                for nb in nbrs[b]:
+                    i = where.get(nb)
+                    if i is None:
+                        continue
+                    pos[i] = b
+                    ncode = rank(pos, n) * n + nb
+                    pos[i] = nb
+                    if not seen[ncode]:
+                        seen[ncode] = 1
+                        nxt.append(ncode)
+        if verbose:
+            print(f"PDB {tiles}: głębokość {d}, stanów w warstwie {len(layer)}", file=sys.stderr)
+        layer = nxt
+        d += 1
+    return table
+
+
+def table_path(R, C, tiles, goal_pos):
+    goal = '-'.join(str(goal_pos[t]) for t in tiles)
+    name = f"pdb_{R}x{C}_{'-'.join(map(str, tiles))}_g{goal}.bin"
+    return os.path.join(PDB_DIR, name)
+
+
+def _header(R, C, tiles, goal_pos):
+    return MAGIC + bytes([R, C, len(tiles)]) + bytes(tiles) + bytes(goal_pos[t] for t in tiles)
+
+
+def save_table(path, R, C, tiles, goal_pos, table):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + f".{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(_header(R, C, tiles, goal_pos))
+        f.write(table)
+    # zapis atomowy - inne procesy nie zobaczą niepełnego pliku
+    os.replace(tmp, path)
+
+
+class PatternDB:
+    """Jedna tablica wzorca zmapowana do pamięci."""
+
+    def __init__(self, R, C, tiles, goal_pos, build=True):
+        self.R = R
+        self.C = C
+        self.n = R * C
+        self.tiles = tuple(tiles)
+        path = table_path(R, C, tiles, goal_pos)
+        if not os.path.exists(path):
+            if not build:
+                raise FileNotFoundError(path)
+            print(f"Budowanie bazy wzorców {self.tiles} (jednorazowo) -> {path}", file=sys.stderr)
+            save_table(path, R, C, tiles, goal_pos, build_table(R, C, tiles, goal_pos, verbose=True))
+        header = _header(R, C, tiles, goal_pos)
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(header)] != header:
+            raise ValueError(f"Niezgodny nagłówek pliku bazy wzorców: {path}")
+        self.table = memoryview(self._mm)[len(header):]
+
+    def lookup(self, pos):
+        """pos[tile] -> indeks pola; zwraca wartość dla płytek wzorca."""
+        n = self.n
+        r = 0
+        used = 0
+        i = 0
+        for t in self.tiles:
+            p = pos[t]
+            r = r * (n - i) + p - (used & ((1 << p) - 1)).bit_count()
+            used |= 1 << p
+            i += 1
+        return self.table[r]
+
+
+class AdditivePDB:
+    """Suma rozłącznych wzorców - dopuszczalna heurystyka."""
+
+    def __init__(self, R, C, partition, goal_pos, build=True):
+        tiles = [t for pattern in partition for t in pattern]
+        if len(set(tiles)) != len(tiles) or 0 in tiles or max(tiles) >= R * C:
+            raise ValueError(f"Niepoprawny podział płytek dla planszy {R}x{C}: {partition}")
+        self.dbs = [PatternDB(R, C, pattern, goal_pos, build) for pattern in partition]
+        self.pattern_of = {}
+        for i, pattern in enumerate(partition):
+            for t in pattern:
+                self.pattern_of[t] = i
+
+    def value(self, pos):
+        return sum(db.lookup(pos) for db in self.dbs)
+
+
+_LOADED = {}
+_BY_GOAL_ID = {}
+
+
+def get_pdb(name, R, C, goal_pos):
+    """Zwraca (z cache procesu) addytywną bazę wzorców o danym id."""
+    # szybka ścieżka dla wywołań z heurystyki: ten sam obiekt goal_pos
+    entry = _BY_GOAL_ID.get((name, id(goal_pos)))
+    if entry is not None and entry[0] is goal_pos:
+        return entry[1]
+    key = (name, R, C, tuple(sorted(goal_pos.items())))
+    db = _LOADED.get(key)
+    if db is None:
+        if name not in PARTITIONS:
+            raise ValueError(f"Nieznana baza wzorców: {name}")
+        if (R, C) != (4, 4):
+            raise ValueError(f"Baza wzorców {name} jest zdefiniowana tylko dla planszy 4x4.")
+        db = AdditivePDB(R, C, PARTITIONS[name], goal_pos)
+        _LOADED[key] = db
+    _BY_GOAL_ID[(name, id(goal_pos))] = (goal_pos, db)
+    return db
+
+
+if __name__ == '__main__':
+    # python patterndb.py pdb555 pdb663 - budowa tablic z wyprzedzeniem
+    from state import goal_tiles
+    goal = goal_tiles(4, 4)
+    goal_pos = {val: idx for idx, val in enumerate(goal)}
+    for name in sys.argv[1:] or list(PARTITIONS):
+        get_pdb(name, 4, 4, goal_pos)
+        print(f"{name}: gotowe ({PDB_DIR})", file=sys.stderr)
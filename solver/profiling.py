@@ -0,0 +1,154 @@
+# Tryb --profile: uruchomienie strategii pod profilerem i raport najgorętszych
+# miejsc.
+#
+#   cprofile - deterministyczny cProfile; zrzut .pstats (python -m pstats,
+#              snakeviz, flameprof),
+#   sample   - próbkowanie stosu co 1 ms sygnałem SIGPROF (tylko Unix), dużo
+#              mniejszy narzut; zrzut w formacie "folded" (stos;stos;... liczba)
+#              dla flamegraph.pl / speedscope.
+#
+# Liczniki ścieżki krytycznej pochodzą z tych samych miejsc co --stats:
+# rozwinięcia, następniki i sprawdzenia zbioru zamkniętego silniki liczą
+# w zmiennych lokalnych (SearchStats), heurystykę opakowuje stats.counted.
+# Operacje listy otwartej liczy nakładka _CountedQueue, którą make_open_list
+# zakłada tylko w tym trybie (openlist.PROFILE_WRAP) - bez --profile pętle
+# silników wołają metody kolejki bezpośrednio i nic nie jest sprawdzane.
+
+
+import os
+import sys
+from collections import Counter
+from time import perf_counter
+import openlist
+
+_TOP = 15
+
+
+class _CountedQueue:
+    """Lista otwarta z licznikami push/pop."""
+
+    def __init__(self, queue, counts):
+        self.queue = queue
+        self.counts = counts
+
+    def push(self, f, g, item):
+        self.counts['push'] += 1
+        self.queue.push(f, g, item)
+
+    def pop(self):
+        self.counts['pop'] += 1
+        return self.queue.pop()
+
+    def peek_f(self):
+        self.counts['peek'] += 1
+        return self.queue.peek_f()
+
+    def __len__(self):
+        return len(self.queue)
+
+
+def run_profiled(mode, out, fn, stats, log=None):
+    """Wywołuje fn() pod profilerem `mode`, zapisuje zrzut do `out` i wypisuje raport."""
+    log = log or sys.stderr
+    counts = Counter()
+    openlist.PROFILE_WRAP = lambda queue: _CountedQueue(queue, counts)
+    t0 = perf_counter()
+    try:
+        if mode == 'sample':
+            result, ranking = _run_sampled(fn, out or 'profile.folded')
+            out = out or 'profile.folded'
+        else:
+            result, ranking = _run_cprofile(fn, out or 'profile.pstats')
+            out = out or 'profile.pstats'
+    finally:
+        openlist.PROFILE_WRAP = None
+    elapsed = perf_counter() - t0
+    _report(mode, elapsed, ranking, counts, stats, out, log)
+    return result
+
+
+def _run_cprofile(fn, out):
+    import cProfile
+    import pstats
+    prof = cProfile.Profile()
+    result = prof.runcall(fn)
+    prof.dump_stats(out)
+    # (czas własny, czas łączny, wywołania, funkcja) malejąco po czasie własnym
+    rows = []
+    for (filename, line, name), (cc, nc, tt, ct, _) in pstats.Stats(prof).stats.items():
+        where = f"{os.path.basename(filename)}:{line}({name})" if line else name
+        rows.append((tt, ct, nc, where))
+    rows.sort(reverse=True)
+    return result, rows[:_TOP]
+
+
+def _run_sampled(fn, out, interval=0.001):
+    import signal
+    if not hasattr(signal, 'setitimer'):
+        raise RuntimeError("--profile sample wymaga sygnału SIGPROF (Unix); użyj --profile cprofile")
+    stacks = Counter()
+    top = sys._getframe()
+
+    def on_sample(signum, frame):
+        names = []
+        while frame is not None and frame is not top:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        names.reverse()
+        stacks[';'.join(names)] += 1
+
+    previous = signal.signal(signal.SIGPROF, on_sample)
+    signal.setitimer(signal.ITIMER_PROF, interval, interval)
+    try:
+        result = fn()
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, previous)
+    with open(out, 'w', encoding='utf-8') as f:
+        for stack, n in stacks.items():
+            f.write(f"{stack} {n}\n")
+    # czas własny = próbki, w których funkcja jest na szczycie stosu
+    own = Counter()
+    total = Counter()
+    for stack, n in stacks.items():
+        names = stack.split(';')
+        own[names[-1]] += n
+        for name in set(names):
+            total[name] += n
+    rows = [(own[name] * interval, total[name] * interval, None, name) for name in total]
+    rows.sort(reverse=True)
+    return result, rows[:_TOP]
+
+
+def _report(mode, elapsed, ranking, counts, stats, out, log):
+    print(f"--- Profil ({mode}, {elapsed:.3f} s) ---", file=log)
+    print(f"{'#':>3} {'własny [s]':>11} {'%':>6} {'łącznie [s]':>12} {'wywołania':>10}  funkcja", file=log)
+    for i, (own, total, calls, where) in enumerate(ranking, 1):
+        share = 100.0 * own / elapsed if elapsed else 0.0
+        calls = '-' if calls is None else calls
+        print(f"{i:>3} {own:>11.4f} {share:>5.1f}% {total:>12.4f} {calls:>10}  {where}", file=log)
+    print("Liczniki ścieżki krytycznej:", file=log)
+    search = stats.phases.get('search', 0.0) if stats is not None else 0.0
+    if stats is not None:
+        rate = f" ({stats.expanded / search:.0f}/s)" if search else ''
+        print(f"  rozwinięte węzły:         {stats.expanded}{rate}", file=log)
+        print(f"  wygenerowani następnicy:  {stats.generated}", file=log)
+        print(f"  odrzucone duplikaty:      {stats.duplicates}", file=log)
+        print(f"  heurystyka:               {stats.heuristic_calls} wywołań, {_heuristic_time(stats, elapsed)}", file=log)
+        if stats.peak_closed is not None:
+            print(f"  lista zamknięta:          szczyt {stats.peak_closed}", file=log)
+    if counts:
+        print(f"  lista otwarta:            push {counts['push']}, pop {counts['pop']}, "
+              f"peek {counts['peek']}, szczyt {stats.peak_open if stats is not None else '-'}", file=log)
+    print(f"Zrzut: {out}", file=log)
+
+
+def _heuristic_time(stats, elapsed):
+    # wyliczenia przyrostowe (z tablicy kosztów) są liczone, ale nie mierzone
+    if not stats.heuristic_timed:
+        return "czas -"
+    share = f" ({100.0 * stats.heuristic_time / elapsed:.1f}% czasu)" if elapsed else ''
+    if stats.heuristic_timed < stats.heuristic_calls:
+        return f"{stats.heuristic_time:.4f} s dla {stats.heuristic_timed} z nich{share}"
+    return f"{stats.heuristic_time:.4f} s{share}"
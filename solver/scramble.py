@@ -0,0 +1,177 @@
+# Szybkie generowanie instancji do korpusów testowych i benchmarków.
+#
+#   - random_walk: błądzenie losowe o zadanej długości bez natychmiastowych
+#     cofnięć, na mutowalnej liście płytek. Dla każdego (pole pustego, ostatni
+#     ruch) dozwolone kroki są policzone z góry, więc jeden ruch to jedno
+#     losowanie i dwa przypisania - bez budowania i tasowania list następników.
+#   - random_solvable: losowa rozwiązywalna permutacja z rozkładu jednostajnego.
+#     Tasujemy płytki, a przy złej parzystości zamieniamy dwie niezerowe płytki
+#     (bijekcja między połową nierozwiązywalną a rozwiązywalną). Na planszy
+#     1xN / Nx1 rozwiązywalne są tylko stany z płytkami w kolejności celu, więc
+#     losujemy samo położenie pustego pola.
+#
+# Instancja nr i zależy tylko od (seed, i): ma własny generator
+# random.Random(f"{seed}:{i}"), a ziarno tekstowe Pythona jest liczone z SHA-512,
+# więc wynik jest ten sam w każdym procesie i przy dowolnym podziale zakresu
+# (--first) między procesy.
+#
+# Zapis: jsonl/text w formacie rekordów batch.py (--batch, --validate) albo
+# zwarty plik binarny: nagłówek MAGIC, R, C (uint16) i liczba instancji (uint64),
+# potem R*C bajtów na instancję (uint16 little-endian dla plansz > 256 pól).
+
+
+import sys
+import json
+import struct
+import random
+from array import array
+from state import pack, unpack, goal_tiles, INVERSE
+from utils import neighbor_table, permutation_parity
+
+MAGIC = b'PZS1'
+_HEADER = struct.Struct('<4sHHQ')
+
+_WALK_TABLES = {}
+
+
+def _walk_table(R, C):
+    """table[z][ostatni ruch] -> krotka (ruch, pole) kroków bez cofnięcia."""
+    table = _WALK_TABLES.get((R, C))
+    if table is None:
+        table = []
+        for lst in neighbor_table(R, C):
+            opts = {None: lst}
+            for m in 'LRUD':
+                # na końcu planszy 1xN cofnięcie jest jedynym ruchem
+                opts[m] = tuple(p for p in lst if p[0] != INVERSE[m]) or lst
+            table.append(opts)
+        _WALK_TABLES[(R, C)] = table
+    return table
+
+
+def random_walk(goal, R, C, length, rng=random):
+    """Stan po `length` losowych ruchach od `goal` (bez cofnięć); zwraca (stan, ruchy)."""
+    table = _walk_table(R, C)
+    board = list(unpack(goal, R, C))
+    z = board.index(0)
+    rnd = rng.random
+    prev = None
+    seq = []
+    for _ in range(length):
+        opts = table[z][prev]
+        prev, n = opts[int(rnd() * len(opts))]
+        board[z] = board[n]
+        board[n] = 0
+        z = n
+        seq.append(prev)
+    return pack(board), seq
+
+
+def random_solvable(R, C, rng=random):
+    """Lista płytek: jednostajnie losowy stan rozwiązywalny względem goal_state(R, C)."""
+    n = R * C
+    if R == 1 or C == 1:
+        tiles = list(range(1, n))
+        tiles.insert(int(rng.random() * n), 0)
+        return tiles
+    tiles = list(range(n))
+    rng.shuffle(tiles)
+    perm = [t - 1 if t else n - 1 for t in tiles]
+    zr, zc = divmod(tiles.index(0), C)
+    if permutation_parity(perm) != ((R - 1 - zr) + (C - 1 - zc)) & 1:
+        # wśród pierwszych trzech pól co najwyżej jedno jest puste
+        i, j = [k for k in range(3) if tiles[k]][:2]
+        tiles[i], tiles[j] = tiles[j], tiles[i]
+    return tiles
+
+
+def generate(R, C, count, seed=0, walk=None, first=0):
+    """Generator list płytek instancji first .. first+count-1.
+
+    `walk` - długość błądzenia losowego od celu, None - stan jednostajnie losowy.
+    """
+    goal = pack(goal_tiles(R, C))
+    for i in range(first, first + count):
+        rng = random.Random(f"{seed}:{i}")
+        if walk is None:
+            yield random_solvable(R, C, rng)
+        else:
+            yield list(unpack(random_walk(goal, R, C, walk, rng)[0], R, C))
+
+
+def write_instances(out, instances, R, C, fmt='jsonl', first=0, count=None):
+    """Zapisuje instancje do strumienia `out` (tekstowego albo binarnego dla 'bin')."""
+    if fmt == 'bin':
+        out.write(_HEADER.pack(MAGIC, R, C, count or 0))
+        code = 'B' if R * C <= 256 else 'H'
+        buf = array(code)
+        for tiles in instances:
+            buf.extend(tiles)
+            if len(buf) >= 1 << 20:
+                _write_array(out, buf)
+                buf = array(code)
+        _write_array(out, buf)
+        return
+    head = f"{R} {C} "
+    for i, tiles in enumerate(instances, first):
+        if fmt == 'jsonl':
+            out.write(json.dumps({'id': i, 'R': R, 'C': C, 'tiles': tiles}) + '\n')
+        else:
+            out.write(head + ' '.join(map(str, tiles)) + '\n')
+
+
+def _write_array(out, buf):
+    if sys.byteorder != 'little':
+        buf.byteswap()
+    buf.tofile(out)
+
+
+def read_instances(path):
+    """Odczyt pliku binarnego: (R, C, generator list płytek)."""
+    f = open(path, 'rb')
+    magic, R, C, count = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != MAGIC:
+        f.close()
+        raise ValueError(f"{path}: to nie jest plik instancji ({MAGIC!r})")
+    n = R * C
+    code = 'B' if n <= 256 else 'H'
+    size = n * array(code).itemsize
+
+    def records():
+        with f:
+            for _ in range(count):
+                buf = array(code, f.read(size))
+                if sys.byteorder != 'little':
+                    buf.byteswap()
+                yield buf.tolist()
+    return R, C, records()
+
+
+def build_parser():
+    import argparse
+    parser = argparse.ArgumentParser(description="Generator losowych instancji łamigłówki (korpusy testowe).")
+    parser.add_argument('-R', type=int, default=4, help="Liczba wierszy (domyślnie 4).")
+    parser.add_argument('-C', type=int, default=4, help="Liczba kolumn (domyślnie 4).")
+    parser.add_argument('-n', '--count', type=int, default=1000, help="Liczba instancji (domyślnie 1000).")
+    parser.add_argument('--walk', type=int, default=None, metavar='K', help="Błądzenie losowe K ruchów od celu (bez cofnięć); bez tej opcji - jednostajnie losowe stany rozwiązywalne.")
+    parser.add_argument('--seed', type=int, default=0, help="Ziarno; instancja i zależy tylko od (seed, i).")
+    parser.add_argument('--first', type=int, default=0, help="Numer pierwszej instancji (podział zakresu między procesy).")
+    parser.add_argument('--format', type=str, default='jsonl', choices=['jsonl', 'text', 'bin'], help="Format wyjścia: rekordy batch.py (jsonl, text) albo zwarty plik binarny.")
+    parser.add_argument('-o', '--output', type=str, default=None, help="Plik wynikowy (domyślnie stdout).")
+    return parser
+
+
+if __name__ == '__main__':
+    # python scramble.py -n 1000000 --walk 60 --format bin -o corpus.bin
+    args = build_parser().parse_args()
+    instances = generate(args.R, args.C, args.count, args.seed, args.walk, args.first)
+    binary = args.format == 'bin'
+    if args.output:
+        out = open(args.output, 'wb' if binary else 'w', encoding=None if binary else 'utf-8')
+    else:
+        out = sys.stdout.buffer if binary else sys.stdout
+    try:
+        write_instances(out, instances, args.R, args.C, args.format, args.first, args.count)
+    finally:
+        if args.output:
+            out.close()
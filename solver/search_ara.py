@@ -0,0 +1,156 @@
+# ARA* (Anytime Repairing A*): seria przeszukiwań ważonym A* z f = g + w*h
+# przy malejącym w. Pierwsze rozwiązanie (duże w) przychodzi szybko, każde
+# kolejne jest nie gorsze, a wartości g, rodzice i h z poprzednich iteracji
+# zostają - stan, któremu poprawiono g po zamknięciu, trafia do INCONS i wraca
+# na listę otwartą dopiero w następnej iteracji, więc iteracja nie rozwija
+# ponownie tego, co już było spójne.
+#
+# Ograniczenie suboptymalności: koszt optymalny >= min(g + h) po OPEN i INCONS
+# (o ile cel nie jest jeszcze spójny), więc długość najlepszego rozwiązania
+# podzielona przez to minimum ogranicza jego nadmiar. Przerwanie przez
+# deadline_ms lub max_nodes zwraca najlepsze dotąd rozwiązanie z aktualnym
+# ograniczeniem.
+
+
+import heapq
+from time import perf_counter
+from utils import move_table
+from history import MoveHistory
+
+# co tyle rozwinięć sprawdzamy zegar
+_CLOCK_EVERY = 256
+
+
+def ara_star(start, goal, R, C, heur_fn, goal_pos, order_spec=None, max_nodes=None, deadline_ms=None,
+             weight=3.0, weight_step=0.5, stats=None, report=None):
+    """ARA* z wagami weight, weight - weight_step, ..., 1.
+
+    Zwraca najlepszą znalezioną ścieżkę (None, jeśli przed limitem nie było
+    żadnej). `report(w, length, bound)` jest wołane po każdym nowym
+    rozwiązaniu i po każdej iteracji; ostatnie ograniczenie trafia do
+    stats.extra['bound'], a kolejne rozwiązania do stats.extra['solutions'].
+    """
+    if start == goal:
+        return ''
+    t_start = perf_counter()
+    deadline = t_start + deadline_ms / 1000.0 if deadline_ms is not None else None
+    if stats is not None:
+        stats.begin('setup')
+        heur_fn = stats.counted(heur_fn)
+    moves, mask = move_table(R, C, order_spec)
+    inf = float('inf')
+    w = max(1.0, weight)
+
+    hist = MoveHistory()
+    add = hist.add
+    h0 = heur_fn(start, R, C, goal_pos)
+    g_of = {start: 0}
+    h_of = {start: h0}
+    node_of = {start: 0}
+    open_g = {start: 0}        # OPEN: stan -> g w chwili wstawienia
+    heap = [(w * h0, 0, start)]
+    closed = set()
+    incons = set()
+
+    best = None
+    bound = inf
+    solutions = []
+    nodes = 0
+    dups = 0
+    peak_open = 1
+    max_depth = 0
+
+    def lower_bound():
+        lb = g_of.get(goal, inf)
+        for s in open_g:
+            v = g_of[s] + h_of[s]
+            if v < lb:
+                lb = v
+        for s in incons:
+            v = g_of[s] + h_of[s]
+            if v < lb:
+                lb = v
+        return lb
+
+    def publish(w_used, complete):
+        # pełna iteracja z wagą w gwarantuje koszt <= w * optimum; wcześniejsze
+        # ograniczenie zostaje ważne, bo rozwiązania tylko się poprawiają
+        nonlocal best, bound
+        g_goal = g_of.get(goal)
+        if g_goal is None:
+            return
+        if best is None or g_goal < len(best):
+            best = hist.path(node_of[goal])
+            solutions.append({'weight': w_used, 'length': g_goal, 'time_s': round(perf_counter() - t_start, 6)})
+        lb = lower_bound()
+        bound = min(bound, g_goal / lb if lb > 0 else 1.0)
+        if complete:
+            bound = min(bound, w_used)
+        if report:
+            report(w_used, g_goal, bound)
+
+    if stats is not None:
+        stats.begin('search')
+    try:
+        while True:
+            # ImprovePath: ważone A* aż f celu <= najmniejsze f na OPEN
+            stopped = False
+            while heap:
+                f, neg_g, state = heap[0]
+                if open_g.get(state) != -neg_g:
+                    heapq.heappop(heap)   # wpis nieaktualny
+                    continue
+                if g_of.get(goal, inf) <= f:
+                    break
+                nodes += 1
+                if (max_nodes and nodes > max_nodes) or (
+                        deadline is not None and not nodes % _CLOCK_EVERY and perf_counter() >= deadline):
+                    # stan zostaje na OPEN - liczy się do ograniczenia
+                    stopped = True
+                    break
+                heapq.heappop(heap)
+                del open_g[state]
+                closed.add(state)
+                g = -neg_g
+                if g > max_depth:
+                    max_depth = g
+                node = node_of[state]
+                ng = g + 1
+                for m, shift, coef, dz in moves[state & mask]:
+                    ns = state + ((state >> shift) & mask) * coef + dz
+                    if ng >= g_of.get(ns, inf):
+                        dups += 1
+                        continue
+                    g_of[ns] = ng
+                    node_of[ns] = add(node, m)
+                    h = h_of.get(ns)
+                    if h is None:
+                        h = h_of[ns] = heur_fn(ns, R, C, goal_pos)
+                    if ns in closed:
+                        incons.add(ns)
+                    else:
+                        open_g[ns] = ng
+                        heapq.heappush(heap, (ng + w * h, -ng, ns))
+                if len(open_g) > peak_open:
+                    peak_open = len(open_g)
+            publish(w, not stopped)
+            if stopped or w <= 1.0 or bound <= 1.0 or (not heap and not incons):
+                return best
+            # następna iteracja: mniejsze w, INCONS wraca na OPEN, nowe klucze
+            w = max(1.0, w - weight_step)
+            open_g.update((s, g_of[s]) for s in incons)
+            incons.clear()
+            closed.clear()
+            heap = [(g_of[s] + w * h_of[s], -g_of[s], s) for s in open_g]
+            heapq.heapify(heap)
+    finally:
+        if stats is not None:
+            stats.expanded = nodes
+            stats.generated = len(hist) - 1 + dups
+            stats.duplicates = dups
+            stats.peak_open = peak_open
+            stats.peak_closed = len(g_of)
+            stats.max_depth = max_depth
+            stats.extra['bound'] = round(bound, 4) if bound != inf else None
+            stats.extra['solutions'] = solutions
+            stats.end()
@@ -1,35 +1,197 @@
-import heapq
-from utils import gen_successors
+from utils import move_table
+from history import MoveHistory
+from openlist import make_open_list
 
 
-def astar(start, goal, R, C, heur_fn, goal_pos, order_spec=None, max_nodes=None):
+def astar(start, goal, R, C, heur_fn, goal_pos, order_spec=None, max_nodes=None, tie_break='high-g', stats=None, exact=None, batch_size=None):
+    """A*. `exact` (opcjonalnie): cache.ExactTable - odległości dokładne do celu;
+    dla tych stanów h jest dokładne, a zdjęcie takiego stanu kończy przeszukiwanie.
+
+    `batch_size` > 1 włącza rozwijanie partiami z wektorową heurystyką
+    (heuristics_batch); bez NumPy albo dla heurystyki bez wersji wektorowej
+    zostaje zwykła pętla.
+    """
     if start == goal:
         return ''
-    open_heap = []
+    batch_h = None
+    if batch_size and batch_size > 1:
+        from heuristics_batch import make_batch_heuristic
+        batch_h = make_batch_heuristic(heur_fn, R, C, goal_pos)
+    if exact:
+        if start in exact:
+            return exact.path(start)
+        heur_fn = _with_exact(heur_fn, exact)
+        if batch_h is not None:
+            batch_h = _with_exact_batch(batch_h, exact)
+    else:
+        exact = None
+    if stats is not None:
+        stats.begin('setup')
+        heur_fn = stats.counted(heur_fn)
+        if batch_h is not None:
+            batch_h = stats.counted_batch(batch_h)
+    if batch_h is not None:
+        return _astar_batched(start, goal, R, C, batch_h, order_spec, max_nodes, tie_break, stats, exact, batch_size)
+    moves, mask = move_table(R, C, order_spec)
     g_scores = {start: 0}
     f0 = heur_fn(start, R, C, goal_pos)
-    heapq.heappush(open_heap, (f0, 0, start, ""))
+    hist = MoveHistory()
+    add = hist.add
+    open_list = make_open_list(f0, tie_break)
+    push = open_list.push
+    pop = open_list.pop
+    push(f0, 0, (start, 0))
     closed = {}
-    tie = 0
     nodes = 0
-    while open_heap:
-        f, _, state, path = heapq.heappop(open_heap)
-        nodes += 1
-        if max_nodes and nodes > max_nodes:
-            return None
-        if state == goal:
-            return path
-        g = g_scores.get(state, float('inf'))
-        if state in closed and closed[state] <= g:
-            continue
-        closed[state] = g
-        for m, ns in gen_successors(state, R, C, order_spec):
-            tentative_g = g + 1
-            if ns in closed and tentative_g >= closed.get(ns, float('inf')):
+    dups = 0
+    peak_open = 1
+    max_depth = 0
+    if stats is not None:
+        stats.begin('search')
+    try:
+        while open_list:
+            if len(open_list) > peak_open:
+                peak_open = len(open_list)
+            state, node = pop()
+            nodes += 1
+            if max_nodes and nodes > max_nodes:
+                return None
+            if state == goal:
+                if stats is not None:
+                    stats.begin('path')
+                return hist.path(node)
+            if exact is not None and state in exact:
+                # f tego węzła jest dokładne i najmniejsze na liście - optimum
+                if stats is not None:
+                    stats.begin('path')
+                return hist.path(node) + exact.path(state)
+            g = g_scores.get(state, float('inf'))
+            if state in closed and closed[state] <= g:
+                dups += 1
                 continue
-            if tentative_g < g_scores.get(ns, float('inf')):
-                g_scores[ns] = tentative_g
-                tie += 1
-                fscore = tentative_g + heur_fn(ns, R, C, goal_pos)
-                heapq.heappush(open_heap, (fscore, tie, ns, path + m))
-    return None
\ No newline at end of file
+            closed[state] = g
+            if g > max_depth:
+                max_depth = g
+            for m, shift, coef, dz in moves[state & mask]:
+                ns = state + ((state >> shift) & mask) * coef + dz
+                tentative_g = g + 1
+                if ns in closed and tentative_g >= closed.get(ns, float('inf')):
+                    dups += 1
+                    continue
+                if tentative_g < g_scores.get(ns, float('inf')):
+                    g_scores[ns] = tentative_g
+                    fscore = tentative_g + heur_fn(ns, R, C, goal_pos)
+                    push(fscore, tentative_g, (ns, add(node, m)))
+                else:
+                    dups += 1
+        return None
+    finally:
+        if stats is not None:
+            stats.expanded = nodes
+            stats.generated = len(hist) - 1 + dups
+            stats.duplicates = dups
+            stats.peak_open = peak_open
+            stats.peak_closed = len(closed)
+            stats.max_depth = max_depth
+            stats.end()
+
+
+def _with_exact(heur_fn, exact):
+    def heuristic(state, R, C, goal_pos):
+        dist = exact.dist(state)
+        return dist if dist is not None else heur_fn(state, R, C, goal_pos)
+    return heuristic
+
+
+def _with_exact_batch(batch_h, exact):
+    def heuristic(states):
+        values = batch_h(states)
+        for i, state in enumerate(states):
+            dist = exact.dist(state)
+            if dist is not None:
+                values[i] = dist
+        return values
+    return heuristic
+
+
+def _astar_batched(start, goal, R, C, batch_h, order_spec, max_nodes, tie_break, stats, exact, batch_size):
+    """A* rozwijające naraz do `batch_size` węzłów z jednej warstwy f.
+
+    Heurystykę wszystkich następników partii liczymy jednym wywołaniem
+    `batch_h`. Każdy węzeł partii zdejmujemy, gdy jego f jest minimum listy
+    (dzieci wstawiamy dopiero po partii), więc test celu jest taki jak w astar.
+    """
+    moves, mask = move_table(R, C, order_spec)
+    g_scores = {start: 0}
+    f0 = batch_h([start])[0]
+    hist = MoveHistory()
+    add = hist.add
+    open_list = make_open_list(f0, tie_break)
+    push = open_list.push
+    pop = open_list.pop
+    peek_f = open_list.peek_f
+    push(f0, 0, (start, 0))
+    closed = {}
+    inf = float('inf')
+    nodes = 0
+    dups = 0
+    peak_open = 1
+    max_depth = 0
+    if stats is not None:
+        stats.begin('search')
+    try:
+        while open_list:
+            if len(open_list) > peak_open:
+                peak_open = len(open_list)
+            layer = peek_f()
+            batch_states = []
+            batch_g = []
+            batch_nodes = []
+            taken = 0
+            while taken < batch_size and open_list and peek_f() == layer:
+                state, node = pop()
+                nodes += 1
+                if max_nodes and nodes > max_nodes:
+                    return None
+                if state == goal:
+                    if stats is not None:
+                        stats.begin('path')
+                    return hist.path(node)
+                if exact is not None and state in exact:
+                    if stats is not None:
+                        stats.begin('path')
+                    return hist.path(node) + exact.path(state)
+                g = g_scores.get(state, inf)
+                if state in closed and closed[state] <= g:
+                    dups += 1
+                    continue
+                closed[state] = g
+                taken += 1
+                if g > max_depth:
+                    max_depth = g
+                ng = g + 1
+                for m, shift, coef, dz in moves[state & mask]:
+                    ns = state + ((state >> shift) & mask) * coef + dz
+                    if ns in closed and ng >= closed[ns]:
+                        dups += 1
+                        continue
+                    if ng < g_scores.get(ns, inf):
+                        g_scores[ns] = ng
+                        batch_states.append(ns)
+                        batch_g.append(ng)
+                        batch_nodes.append(add(node, m))
+                    else:
+                        dups += 1
+            if batch_states:
+                for ns, ng, child, h in zip(batch_states, batch_g, batch_nodes, batch_h(batch_states)):
+                    push(ng + h, ng, (ns, child))
+        return None
+    finally:
+        if stats is not None:
+            stats.expanded = nodes
+            stats.generated = len(hist) - 1 + dups
+            stats.duplicates = dups
+            stats.peak_open = peak_open
+            stats.peak_closed = len(closed)
+            stats.max_depth = max_depth
+            stats.end()
@@ -0,0 +1,99 @@
+# Beam search: przeszukiwanie warstwami (jak BFS), ale z każdej warstwy
+# zostaje tylko `width` stanów o najmniejszym h (g w warstwie jest wspólne,
+# więc to też najmniejsze f). Rozwiązanie nie musi być optymalne, za to czas
+# i pamięć są ograniczone: historia ruchów i zbiór odwiedzonych trzymają co
+# najwyżej width stanów na warstwę (width x głębokość), a kandydaci - tylko
+# następną warstwę (do 4 x width). Zbiór odwiedzonych obejmuje wszystkie
+# warstwy, bo z samą poprzednią wiązka krąży po tych samych stanach. Dzięki
+# temu strategia działa dla plansz 6x6-8x8, gdzie pozostałe silniki wyczerpują
+# pamięć.
+#
+# Dla heurystyk addytywnych po płytkach (TILE_TABLES) h następnika liczymy
+# przyrostowo z tablicy kosztów. Kolejność 'R...' losuje kolejność ruchów
+# i rozstrzyga remisy h losowo, więc kolejne uruchomienia dają różne ścieżki.
+
+
+import heapq
+import random
+from utils import move_table
+from history import MoveHistory
+from heuristics import TILE_TABLES
+
+
+def beam_search(start, goal, R, C, heur_fn, goal_pos, order_spec=None, width=1000, max_depth=None, max_nodes=None, stats=None):
+    """Beam search o szerokości `width`; przerywa po `max_depth` warstwach
+    (domyślnie 20 * R * C) albo `max_nodes` rozwinięciach."""
+    if start == goal:
+        return ''
+    if max_depth is None:
+        max_depth = 20 * R * C
+    if stats is not None:
+        stats.begin('setup')
+    table = TILE_TABLES[heur_fn](R, C, goal_pos) if heur_fn in TILE_TABLES else None
+    if stats is not None:
+        heur_fn = stats.counted(heur_fn)
+    moves, mask = move_table(R, C, order_spec)
+    randomize = bool(order_spec) and order_spec[0] == 'R'
+    rnd = random.random
+    hist = MoveHistory()
+    add = hist.add
+    beam = [(heur_fn(start, R, C, goal_pos), start, 0)]
+    visited = {start}
+    nodes = 0
+    generated = 0
+    dups = 0
+    inc_calls = 0     # h liczone przyrostowo z tablicy (poza stats.counted)
+    peak_open = 1
+    depth = 0
+    if stats is not None:
+        stats.begin('search')
+    try:
+        while beam and depth < max_depth:
+            # kandydaci następnej warstwy: stan -> (h, węzeł rodzica, ruch)
+            layer = {}
+            for h, state, node in beam:
+                nodes += 1
+                if max_nodes and nodes > max_nodes:
+                    return None
+                z = state & mask
+                for m, shift, coef, dz in moves[z]:
+                    tile = (state >> shift) & mask
+                    ns = state + tile * coef + dz
+                    generated += 1
+                    if ns in layer or ns in visited:
+                        dups += 1
+                        continue
+                    if ns == goal:
+                        if stats is not None:
+                            stats.begin('path')
+                        return hist.path(add(node, m))
+                    if table is not None:
+                        nh = h + table[tile][z] - table[tile][z + dz]
+                        inc_calls += 1
+                    else:
+                        nh = heur_fn(ns, R, C, goal_pos)
+                    layer[ns] = (nh, node, m)
+            depth += 1
+            if len(layer) > peak_open:
+                peak_open = len(layer)
+            if len(layer) > width:
+                if randomize:
+                    chosen = heapq.nsmallest(width, layer.items(), key=lambda item: (item[1][0], rnd()))
+                else:
+                    chosen = heapq.nsmallest(width, layer.items(), key=lambda item: item[1][0])
+            else:
+                chosen = layer.items()
+            beam = [(nh, ns, add(node, m)) for ns, (nh, node, m) in chosen]
+            visited.update(ns for _, ns, _ in beam)
+        return None
+    finally:
+        if stats is not None:
+            stats.expanded = nodes
+            stats.generated = generated
+            stats.duplicates = dups
+            stats.heuristic_calls += inc_calls
+            stats.peak_open = peak_open
+            # historia ruchów - jedyna struktura rosnąca z głębokością
+            stats.peak_closed = len(hist)
+            stats.max_depth = depth
+            stats.end()
@@ -1,30 +1,139 @@
-import heapq
-from utils import gen_successors
+from utils import move_table
+from history import MoveHistory
+from openlist import make_open_list
 
 
-def best_first(start, goal, R, C, heur_fn, goal_pos, order_spec=None, max_nodes=None):
+def best_first(start, goal, R, C, heur_fn, goal_pos, order_spec=None, max_nodes=None, tie_break='high-g', stats=None, batch_size=None):
+    """Zachłanne Best-First po h. `batch_size` > 1: rozwijanie partiami
+    z wektorową heurystyką (patrz astar)."""
     if start == goal:
         return ''
-    heap = []
+    batch_h = None
+    if batch_size and batch_size > 1:
+        from heuristics_batch import make_batch_heuristic
+        batch_h = make_batch_heuristic(heur_fn, R, C, goal_pos)
+    if stats is not None:
+        stats.begin('setup')
+        heur_fn = stats.counted(heur_fn)
+        if batch_h is not None:
+            batch_h = stats.counted_batch(batch_h)
+    if batch_h is not None:
+        return _best_first_batched(start, goal, R, C, batch_h, order_spec, max_nodes, tie_break, stats, batch_size)
+    moves, mask = move_table(R, C, order_spec)
     h0 = heur_fn(start, R, C, goal_pos)
-    heapq.heappush(heap, (h0, 0, start, ""))
+    hist = MoveHistory()
+    add = hist.add
+    open_list = make_open_list(h0, tie_break)
+    push = open_list.push
+    pop = open_list.pop
+    # priorytetem jest samo h; g (głębokość) służy tylko do remisów
+    push(h0, 0, (start, 0, 0))
     visited = set()
-    tie = 0
     nodes = 0
-    while heap:
-        hval, _, state, path = heapq.heappop(heap)
-        nodes += 1
-        if max_nodes and nodes > max_nodes:
-            return None
-        if state == goal:
-            return path
-        if state in visited:
-            continue
-        visited.add(state)
-        for m, ns in gen_successors(state, R, C, order_spec):
-            if ns in visited:
+    dups = 0
+    peak_open = 1
+    max_depth = 0
+    if stats is not None:
+        stats.begin('search')
+    try:
+        while open_list:
+            if len(open_list) > peak_open:
+                peak_open = len(open_list)
+            state, node, g = pop()
+            nodes += 1
+            if max_nodes and nodes > max_nodes:
+                return None
+            if state == goal:
+                if stats is not None:
+                    stats.begin('path')
+                return hist.path(node)
+            if state in visited:
+                dups += 1
                 continue
-            tie += 1
-            hv = heur_fn(ns, R, C, goal_pos)
-            heapq.heappush(heap, (hv, tie, ns, path + m))
-    return None
\ No newline at end of file
+            visited.add(state)
+            if g > max_depth:
+                max_depth = g
+            for m, shift, coef, dz in moves[state & mask]:
+                ns = state + ((state >> shift) & mask) * coef + dz
+                if ns in visited:
+                    dups += 1
+                    continue
+                hv = heur_fn(ns, R, C, goal_pos)
+                push(hv, g + 1, (ns, add(node, m), g + 1))
+        return None
+    finally:
+        if stats is not None:
+            stats.expanded = nodes
+            stats.generated = len(hist) - 1 + dups
+            stats.duplicates = dups
+            stats.peak_open = peak_open
+            stats.peak_closed = len(visited)
+            stats.max_depth = max_depth
+            stats.end()
+
+
+def _best_first_batched(start, goal, R, C, batch_h, order_spec, max_nodes, tie_break, stats, batch_size):
+    """Best-First rozwijające naraz do `batch_size` węzłów o tym samym
+    (najmniejszym) h; h następników liczone jednym wywołaniem `batch_h`."""
+    moves, mask = move_table(R, C, order_spec)
+    h0 = batch_h([start])[0]
+    hist = MoveHistory()
+    add = hist.add
+    open_list = make_open_list(h0, tie_break)
+    push = open_list.push
+    pop = open_list.pop
+    peek_f = open_list.peek_f
+    push(h0, 0, (start, 0, 0))
+    visited = set()
+    nodes = 0
+    dups = 0
+    peak_open = 1
+    max_depth = 0
+    if stats is not None:
+        stats.begin('search')
+    try:
+        while open_list:
+            if len(open_list) > peak_open:
+                peak_open = len(open_list)
+            layer = peek_f()
+            batch_states = []
+            batch_g = []
+            batch_nodes = []
+            taken = 0
+            while taken < batch_size and open_list and peek_f() == layer:
+                state, node, g = pop()
+                nodes += 1
+                if max_nodes and nodes > max_nodes:
+                    return None
+                if state == goal:
+                    if stats is not None:
+                        stats.begin('path')
+                    return hist.path(node)
+                if state in visited:
+                    dups += 1
+                    continue
+                visited.add(state)
+                taken += 1
+                if g > max_depth:
+                    max_depth = g
+                for m, shift, coef, dz in moves[state & mask]:
+                    ns = state + ((state >> shift) & mask) * coef + dz
+                    if ns in visited:
+                        dups += 1
+                        continue
+                    batch_states.append(ns)
+                    batch_g.append(g + 1)
+                    batch_nodes.append(add(node, m))
+            if batch_states:
+                for ns, ng, child, hv in zip(batch_states, batch_g, batch_nodes, batch_h(batch_states)):
+                    push(hv, ng, (ns, child, ng))
+        return None
+    finally:
+        if stats is not None:
+            stats.expanded = nodes
+            stats.generated = len(hist) - 1 + dups
+            stats.duplicates = dups
+            stats.peak_open = peak_open
+            stats.peak_closed = len(visited)
+            stats.max_depth = max_depth
+            stats.end()
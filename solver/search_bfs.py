@@ -1,24 +1,51 @@
 from collections import deque
-from utils import gen_successors
+from utils import move_table
+from history import MoveHistory
 
 
-def bfs(start, goal, R, C, order_spec=None, max_nodes=None):
+def bfs(start, goal, R, C, order_spec=None, max_nodes=None, stats=None):
     if start == goal:
         return ''
+    if stats is not None:
+        stats.begin('setup')
+    moves, mask = move_table(R, C, order_spec)
+    hist = MoveHistory()
+    add = hist.add
     q = deque()
-    q.append((start, ""))
+    q.append((start, 0))
     visited = {start}
     nodes = 0
-    while q:
-        state, path = q.popleft()
-        nodes += 1
-        if max_nodes and nodes > max_nodes:
-            return None
-        for m, ns in gen_successors(state, R, C, order_spec):
-            if ns in visited:
-                continue
-            if ns == goal:
-                return path + m
-            visited.add(ns)
-            q.append((ns, path + m))
-    return None
\ No newline at end of file
+    dups = 0
+    peak_open = 1
+    node = 0
+    if stats is not None:
+        stats.begin('search')
+    try:
+        while q:
+            if len(q) > peak_open:
+                peak_open = len(q)
+            state, node = q.popleft()
+            nodes += 1
+            if max_nodes and nodes > max_nodes:
+                return None
+            for m, shift, coef, dz in moves[state & mask]:
+                ns = state + ((state >> shift) & mask) * coef + dz
+                if ns in visited:
+                    dups += 1
+                    continue
+                if ns == goal:
+                    if stats is not None:
+                        stats.begin('path')
+                    return hist.path(add(node, m))
+                visited.add(ns)
+                q.append((ns, add(node, m)))
+        return None
+    finally:
+        if stats is not None:
+            stats.expanded = nodes
+            stats.generated = len(hist) - 1 + dups
+            stats.duplicates = dups
+            stats.peak_open = peak_open
+            stats.peak_closed = len(visited)
+            stats.max_depth = len(hist.path(len(hist) - 1))
+            stats.end()
@@ -0,0 +1,75 @@
+# Dwukierunkowy BFS: fronty rosną od startu i od celu, zawsze rozwijamy
+# całą warstwę mniejszego frontu. Spotkanie w warstwie daje ścieżkę
+# optymalną, jeśli wybierzemy najkrótsze z połączeń znalezionych w tej warstwie.
+
+
+from utils import move_table
+from history import MoveHistory
+from state import INVERSE
+
+
+def bibfs(start, goal, R, C, order_spec=None, max_nodes=None, stats=None):
+    if start == goal:
+        return ''
+    if stats is not None:
+        stats.begin('setup')
+    moves, mask = move_table(R, C, order_spec)
+    hists = (MoveHistory(), MoveHistory())
+    seen = ({start: 0}, {goal: 0})
+    layers = ([start], [goal])
+    nodes = 0
+    dups = 0
+    depth = 0
+    peak_open = 2
+    if stats is not None:
+        stats.begin('search')
+    try:
+        while layers[0] and layers[1]:
+            side = 0 if len(layers[0]) <= len(layers[1]) else 1
+            own = seen[side]
+            other = seen[1 - side]
+            hist = hists[side]
+            add = hist.add
+            nxt = []
+            best = None
+            for state in layers[side]:
+                nodes += 1
+                if max_nodes and nodes > max_nodes:
+                    return None
+                node = own[state]
+                for m, shift, coef, dz in moves[state & mask]:
+                    ns = state + ((state >> shift) & mask) * coef + dz
+                    if ns in own:
+                        dups += 1
+                        continue
+                    child = add(node, m)
+                    own[ns] = child
+                    if ns in other:
+                        meet = (child, other[ns]) if side == 0 else (other[ns], child)
+                        path = _join(hists, *meet)
+                        if best is None or len(path) < len(best):
+                            best = path
+                    nxt.append(ns)
+            depth += 1
+            if best is not None:
+                return best
+            layers = (nxt, layers[1]) if side == 0 else (layers[0], nxt)
+            if len(layers[0]) + len(layers[1]) > peak_open:
+                peak_open = len(layers[0]) + len(layers[1])
+        return None
+    finally:
+        if stats is not None:
+            stats.expanded = nodes
+            stats.generated = len(hists[0]) + len(hists[1]) - 2 + dups
+            stats.duplicates = dups
+            stats.peak_open = peak_open
+            stats.peak_closed = len(seen[0]) + len(seen[1])
+            stats.max_depth = depth
+            stats.end()
+
+
+def _join(hists, fwd_node, bwd_node):
+    # ruchy wstecz prowadzą od celu do punktu spotkania - odwracamy kolejność
+    # i każdy ruch zamieniamy na przeciwny
+    back = hists[1].path(bwd_node)
+    return hists[0].path(fwd_node) + ''.join(INVERSE[m] for m in reversed(back))
@@ -0,0 +1,357 @@
+# Rozwiązanie konstrukcyjne dla dowolnie dużych plansz (bez przeszukiwania).
+#
+# Jak człowiek: układamy górny wiersz pozostałego obszaru, potem lewą kolumnę
+# (zawsze dłuższy bok), aż zostanie prostokąt co najwyżej 3x3 w prawym dolnym
+# rogu - ten kończymy optymalnie IDA* z heurystyką Manhattan.
+#   - Zwykłą płytkę prowadzimy krok po kroku do celu: puste pole obchodzi
+#     płytkę (zachłannie, a blisko przeszkód BFS-em w małym oknie) i wchodzi na
+#     jej miejsce.
+#   - Dwie ostatnie płytki wiersza wstawiamy razem: prawą na jej pole, lewą
+#     tuż pod jej pole, a końcówkę znajduje BFS po położeniach (puste pole,
+#     obie płytki) w oknie 3x3 - to omija znane pułapki w narożniku.
+# Kolumnę układamy tym samym kodem na planszy transponowanej (widok), więc
+# każdy krok to O(1), a czas i pamięć są liniowe w liczbie wypisanych ruchów
+# (plus O(R*C) na planszę). Ruchy wypływają porcjami z generatora.
+
+
+import tempfile
+from collections import deque
+from state import unpack, pack, goal_tiles, goal_state
+from utils import UnsolvableError
+
+_CHUNK = 1 << 16
+
+# ruch pustego pola w widoku -> ruch na planszy (widok transponowany zamienia osie)
+_VIEW_MOVES = {
+    False: {(-1, 0): 'U', (1, 0): 'D', (0, -1): 'L', (0, 1): 'R'},
+    True: {(-1, 0): 'L', (1, 0): 'R', (0, -1): 'U', (0, 1): 'D'},
+}
+_STEPS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+class MoveStream:
+    """Leniwy ciąg ruchów: iteracja daje kolejne porcje, str() je skleja.
+
+    Konstrukcja działa raz: pierwsza pełna iteracja (albo len()) zapisuje ruchy
+    do pliku tymczasowego i zapamiętuje długość, kolejne iteracje czytają ten
+    plik. W pamięci jest więc zawsze tylko jedna porcja, a wypisanie wyniku
+    i zapis dla viewera nie rozwiązują planszy ponownie.
+    """
+
+    def __init__(self, start, goal, R, C):
+        self.start = start
+        self.goal = goal
+        self.R = R
+        self.C = C
+        self.length = None
+        self._spool = None
+
+    def __iter__(self):
+        if self._spool is not None:
+            return self._replay()
+        return self._construct()
+
+    def _construct(self):
+        spool = tempfile.TemporaryFile()
+        total = 0
+        try:
+            for chunk in constructive_moves(self.start, self.goal, self.R, self.C):
+                spool.write(chunk.encode('ascii'))
+                total += len(chunk)
+                yield chunk
+        except BaseException:
+            spool.close()
+            raise
+        if self._spool is None:
+            self._spool = spool
+            self.length = total
+        else:
+            spool.close()
+
+    def _replay(self):
+        # własna pozycja odczytu - kilka iteracji naraz się nie zakłóca
+        pos = 0
+        while True:
+            self._spool.seek(pos)
+            chunk = self._spool.read(_CHUNK)
+            if not chunk:
+                return
+            pos += len(chunk)
+            yield chunk.decode('ascii')
+
+    def __len__(self):
+        if self.length is None:
+            for _ in self:
+                pass
+        return self.length
+
+    def __str__(self):
+        return ''.join(self)
+
+
+def constructive_solve(start, goal, R, C, stats=None):
+    """Rozwiązanie (nieoptymalne) dowolnej rozwiązywalnej planszy jako MoveStream.
+
+    Ruchy powstają dopiero przy iteracji. UnsolvableError od razu dla planszy
+    1xN / Nx1 z płytkami w złej kolejności (parzystość tego nie wykrywa).
+    """
+    if stats is not None:
+        stats.begin('search')
+    try:
+        if R == 1 or C == 1:
+            tiles = [t for t in unpack(start, R, C) if t]
+            if tiles != [t for t in unpack(goal, R, C) if t]:
+                raise UnsolvableError("Plansza nie jest rozwiązywalna.")
+        return MoveStream(start, goal, R, C)
+    finally:
+        if stats is not None:
+            stats.end()
+
+
+def constructive_moves(start, goal, R, C):
+    """Generator porcji ruchów (napisów) prowadzących ze `start` do `goal`.
+
+    Cel musi mieć puste pole w prawym dolnym rogu (jak goal_state); ValueError
+    przy innym celu, UnsolvableError, gdy stan nie daje się rozwiązać.
+    """
+    n = R * C
+    goal_board = unpack(goal, R, C)
+    if goal_board[n - 1] != 0:
+        raise ValueError("Rozwiązanie konstrukcyjne wymaga celu z pustym polem w prawym dolnym rogu.")
+    target = [0] * n
+    for idx, t in enumerate(goal_board):
+        target[t] = idx
+    b = _Board(list(unpack(start, R, C)), R, C, target)
+
+    if R == 1 or C == 1:
+        # jeden wiersz/kolumna: płytek nie da się przestawić, tylko przesunąć puste pole
+        b.transposed = C == 1
+        b.route_line()
+    else:
+        top = left = 0
+        while R - top > 3 or C - left > 3:
+            if R - top >= C - left:
+                b.transposed = False
+                yield from b.solve_line(top, left)
+                top += 1
+            else:
+                b.transposed = True
+                yield from b.solve_line(left, top)
+                left += 1
+        b.transposed = False
+        b.solve_rest(top, left)
+    if b.board != list(goal_board):
+        raise UnsolvableError("Plansza nie jest rozwiązywalna.")
+    if b.out:
+        yield ''.join(b.out)
+
+
+class _Board:
+    """Mutowalna plansza z widokiem (transposed) i buforem wypisanych ruchów."""
+
+    def __init__(self, board, R, C, target):
+        self.board = board
+        self.R = R
+        self.C = C
+        self.target = target
+        self.pos = [0] * (R * C)
+        for idx, t in enumerate(board):
+            self.pos[t] = idx
+        self.tile_at = [0] * (R * C)    # pole docelowe -> płytka
+        for t in range(1, R * C):
+            self.tile_at[target[t]] = t
+        self.out = []
+        self.locked = set()
+        self.transposed = False
+        self.top = 0
+        self.left = 0
+
+    # --- widok: (r, c) w widoku <-> indeks pola ---
+    def dims(self):
+        return (self.C, self.R) if self.transposed else (self.R, self.C)
+
+    def cell(self, r, c):
+        return c * self.C + r if self.transposed else r * self.C + c
+
+    def rc(self, idx):
+        r, c = divmod(idx, self.C)
+        return (c, r) if self.transposed else (r, c)
+
+    def free(self, r, c, avoid):
+        VR, VC = self.dims()
+        if not (self.top <= r < VR and self.left <= c < VC):
+            return False
+        idx = self.cell(r, c)
+        return idx != avoid and idx not in self.locked
+
+    def step(self, dr, dc):
+        """Przesuwa puste pole o (dr, dc) w widoku."""
+        z = self.pos[0]
+        r, c = self.rc(z)
+        nidx = self.cell(r + dr, c + dc)
+        tile = self.board[nidx]
+        self.board[z] = tile
+        self.board[nidx] = 0
+        self.pos[tile] = z
+        self.pos[0] = nidx
+        self.out.append(_VIEW_MOVES[self.transposed][(dr, dc)])
+
+    # --- prowadzenie pustego pola ---
+    def route(self, tr, tc, avoid):
+        """Puste pole na (tr, tc), omijając pole `avoid` i pola zablokowane."""
+        br, bc = self.rc(self.pos[0])
+        while abs(br - tr) + abs(bc - tc) > 2:
+            dr = (tr > br) - (tr < br)
+            dc = (tc > bc) - (tc < bc)
+            cand = ((dr, 0), (0, dc)) if abs(tr - br) >= abs(tc - bc) else ((0, dc), (dr, 0))
+            for sr, sc in cand:
+                if (sr or sc) and self.free(br + sr, bc + sc, avoid):
+                    self.step(sr, sc)
+                    br += sr
+                    bc += sc
+                    break
+            else:
+                break
+        if (br, bc) != (tr, tc):
+            VR, VC = self.dims()
+            window = (max(self.top, min(br, tr) - 2), min(VR, max(br, tr) + 3),
+                      max(self.left, min(bc, tc) - 2), min(VC, max(bc, tc) + 3))
+            path = self._bfs((br, bc), (tr, tc), avoid, window)
+            if path is None:
+                path = self._bfs((br, bc), (tr, tc), avoid, (self.top, VR, self.left, VC))
+            for sr, sc in path:
+                self.step(sr, sc)
+
+    def _bfs(self, src, dst, avoid, window):
+        r0, r1, c0, c1 = window
+        prev = {src: None}
+        q = deque([src])
+        while q:
+            cur = q.popleft()
+            if cur == dst:
+                path = []
+                while prev[cur] is not None:
+                    p, d = prev[cur]
+                    path.append(d)
+                    cur = p
+                path.reverse()
+                return path
+            r, c = cur
+            for dr, dc in _STEPS:
+                nr, nc = r + dr, c + dc
+                if (nr, nc) not in prev and r0 <= nr < r1 and c0 <= nc < c1 and self.free(nr, nc, avoid):
+                    prev[(nr, nc)] = (cur, (dr, dc))
+                    q.append((nr, nc))
+        return None
+
+    def move_tile(self, tile, tr, tc):
+        """Prowadzi płytkę na (tr, tc): najpierw w dół, potem w poziomie, na koniec w górę."""
+        while True:
+            r, c = self.rc(self.pos[tile])
+            if (r, c) == (tr, tc):
+                return
+            if r < tr:
+                nr, nc = r + 1, c
+            elif c != tc:
+                nr, nc = r, c + (1 if tc > c else -1)
+            else:
+                nr, nc = r - 1, c
+            self.route(nr, nc, self.pos[tile])
+            self.step(r - nr, c - nc)
+
+    # --- układanie wiersza (w widoku) ---
+    def solve_line(self, row, left):
+        """Układa górny wiersz `row` obszaru zaczynającego się w kolumnie `left`
+        (widok); generator - oddaje pełne porcje ruchów po drodze."""
+        self.top = row
+        self.left = left
+        VR, VC = self.dims()
+        for c in range(left, VC - 2):
+            idx = self.cell(row, c)
+            self.move_tile(self.tile_at[idx], row, c)
+            self.locked.add(idx)
+            if len(self.out) >= _CHUNK:
+                yield ''.join(self.out)
+                self.out.clear()
+        a = self.cell(row, VC - 2)
+        b = self.cell(row, VC - 1)
+        x = self.tile_at[a]
+        y = self.tile_at[b]
+        if self.pos[x] != a or self.pos[y] != b:
+            self.move_tile(y, row, VC - 1)
+            self.locked.add(b)
+            self.move_tile(x, row + 1, VC - 2)
+            br, bc = self.rc(self.pos[0])
+            if br > row + 2 or bc < VC - 3:
+                # puste pole musi być w oknie BFS (bywa już w nim, także
+                # zamknięte na polu a - wtedy route by nie przeszło)
+                self.route(row + 1, VC - 1, self.pos[x])
+            self.locked.discard(b)
+            self._finish_pair(x, y, row, VC)
+        self.locked.clear()
+
+    def _finish_pair(self, x, y, row, VC):
+        """BFS po (puste pole, x, y) w oknie 3 wiersze x (do) 3 kolumny."""
+        c0 = max(self.left, VC - 3)
+        cells = [(r, c) for r in range(row, row + 3) for c in range(c0, VC)
+                 if self.free(r, c, None) or self.cell(r, c) in (self.pos[x], self.pos[y])]
+        inside = set(cells)
+        goal = ((row, VC - 2), (row, VC - 1))
+        src = (self.rc(self.pos[0]), self.rc(self.pos[x]), self.rc(self.pos[y]))
+        prev = {src: None}
+        q = deque([src])
+        while q:
+            cur = q.popleft()
+            (br, bc), px, py = cur
+            if (px, py) == goal:
+                path = []
+                while prev[cur] is not None:
+                    cur, d = prev[cur]
+                    path.append(d)
+                path.reverse()
+                for dr, dc in path:
+                    self.step(dr, dc)
+                return
+            for dr, dc in _STEPS:
+                nb = (br + dr, bc + dc)
+                if nb not in inside:
+                    continue
+                nx = (br, bc) if nb == px else px
+                ny = (br, bc) if nb == py else py
+                nxt = (nb, nx, ny)
+                if nxt not in prev:
+                    prev[nxt] = (cur, (dr, dc))
+                    q.append(nxt)
+        raise ValueError("Nie udało się ułożyć końca wiersza.")
+
+    # --- jeden wiersz/kolumna i końcowy prostokąt ---
+    def route_line(self):
+        VR, VC = self.dims()
+        r, c = self.rc(self.pos[0])
+        for _ in range(c, VC - 1):
+            self.step(0, 1)
+
+    def solve_rest(self, top, left):
+        """Prostokąt [top:, left:] (co najwyżej 3x3) - optymalnie przez IDA*."""
+        from search_idastar import idastar
+        from heuristics import h_manhattan
+        from utils import is_solvable
+        R, C = self.R, self.C
+        sr, sc = R - top, C - left
+        sub_of = {}
+        for r in range(top, R):
+            for c in range(left, C):
+                sub_of[r * C + c] = (r - top) * sc + (c - left)
+        tiles = [0] * (sr * sc)
+        for idx, s in sub_of.items():
+            t = self.board[idx]
+            tiles[s] = sub_of[self.target[t]] + 1 if t else 0
+        sub_goal = goal_tiles(sr, sc)
+        sub_goal_pos = {val: i for i, val in enumerate(sub_goal)}
+        sub_start = pack(tiles)
+        if not is_solvable(sub_start, sr, sc, goal_state(sr, sc)):
+            raise UnsolvableError("Plansza nie jest rozwiązywalna.")
+        path = idastar(sub_start, goal_state(sr, sc), sr, sc, h_manhattan, sub_goal_pos)
+        moves = {'U': (-1, 0), 'D': (1, 0), 'L': (0, -1), 'R': (0, 1)}
+        for m in path:
+            self.step(*moves[m])
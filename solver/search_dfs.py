@@ -1,21 +1,49 @@
-from utils import gen_successors
+from utils import move_table
+from history import MoveHistory
 
 
-def dfs(start, goal, R, C, order_spec=None, max_nodes=None):
+def dfs(start, goal, R, C, order_spec=None, max_nodes=None, stats=None):
+    if stats is not None:
+        stats.begin('setup')
+    moves, mask = move_table(R, C, order_spec)
     nodes = 0
-    stack = [(start, "")]
+    dups = 0
+    peak_open = 1
+    max_depth = 0
+    hist = MoveHistory()
+    add = hist.add
+    stack = [(start, 0, 0)]
     visited_global = set()
-    while stack:
-        state, path = stack.pop()
-        nodes += 1
-        if max_nodes and nodes > max_nodes:
-            return None
-        if state == goal:
-            return path
-        succs = gen_successors(state, R, C, order_spec)
-        for m, ns in reversed(succs):
-            if ns in visited_global:
-                continue
-            stack.append((ns, path + m))
-        visited_global.add(state)
-    return None
\ No newline at end of file
+    if stats is not None:
+        stats.begin('search')
+    try:
+        while stack:
+            if len(stack) > peak_open:
+                peak_open = len(stack)
+            state, node, d = stack.pop()
+            nodes += 1
+            if max_nodes and nodes > max_nodes:
+                return None
+            if d > max_depth:
+                max_depth = d
+            if state == goal:
+                if stats is not None:
+                    stats.begin('path')
+                return hist.path(node)
+            for m, shift, coef, dz in reversed(moves[state & mask]):
+                ns = state + ((state >> shift) & mask) * coef + dz
+                if ns in visited_global:
+                    dups += 1
+                    continue
+                stack.append((ns, add(node, m), d + 1))
+            visited_global.add(state)
+        return None
+    finally:
+        if stats is not None:
+            stats.expanded = nodes
+            stats.generated = len(hist) - 1 + dups
+            stats.duplicates = dups
+            stats.peak_open = peak_open
+            stats.peak_closed = len(visited_global)
+            stats.max_depth = max_depth
+            stats.end()
@@ -0,0 +1,263 @@
+# HDA* (Hash Distributed A*): równoległe A* na kilku procesach.
+#
+# Każdy stan ma właściciela wyznaczonego z hasza stanu; właściciel trzyma dla
+# swoich stanów listę otwartą, najlepsze g i wskaźnik na rodzica. Następników
+# należących do innych procesów zbieramy w paczki i wysyłamy do skrzynek
+# (multiprocessing.Queue) właścicieli.
+#
+# Optymalność: znalezienie celu daje tylko rozwiązanie tymczasowe (incumbent) -
+# inne procesy mogą wciąż mieć węzły o mniejszym f. Procesy odcinają węzły
+# z f >= incumbent, a koniec następuje dopiero, gdy wszystkie są bezczynne
+# (brak węzłów z f < incumbent) i żadna paczka nie jest w drodze: suma
+# wysłanych paczek równa się sumie odebranych w dwóch kolejnych odczytach.
+# Wtedy incumbent jest optymalny (heurystyka dopuszczalna).
+# Ścieżkę odtwarzamy, pytając kolejnych właścicieli o rodzica stanu.
+#
+# Koszt komunikacji: pełne paczki idą od razu, a niepełne dopiero co
+# _FLUSH_SLICES porcji rozwinięć albo gdy proces nie ma już pracy (zanim zgłosi
+# bezczynność), więc przy długich listach otwartych nie płacimy za Queue.put
+# z kilkoma stanami po każdej porcji. Przyspieszenie względem A* mierzy
+# benchmark.py --hda-scaling (wymaga kilku rdzeni).
+
+
+import os
+import sys
+import time
+import multiprocessing
+from queue import Empty
+
+from utils import move_table
+from openlist import make_open_list
+from search_astar import astar
+
+_MIX = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+_BATCH = 64       # maks. liczba stanów w jednej paczce
+_SLICE = 256      # węzłów rozwijanych między sprawdzeniami skrzynki
+_FLUSH_SLICES = 4  # co tyle porcji wysyłamy też niepełne paczki
+_NO_SOLUTION = 1 << 30
+
+# indeksy w tablicy liczników każdego procesu (współdzielona RawArray)
+_SENT, _RECV, _IDLE, _EXPANDED, _GENERATED, _DUPS, _HCALLS = range(7)
+_NCOUNT = 7
+
+
+# Mnożenie przenosi bity tylko w górę, więc bity iloczynu zależą od młodszych
+# bitów stanu (puste pole i pierwsze płytki). hash() liczby całkowitej to reszta
+# modulo 2^61 - 1, w której uczestniczą wszystkie bity stanu i jest taki sam we
+# wszystkich procesach; właściciela bierzemy z górnej połowy 64-bitowego iloczynu.
+def owner_of(state, workers):
+    return (((hash(state) * _MIX) & _MASK64) >> 32) % workers
+
+
+def hda_star(start, goal, R, C, heur_fn, goal_pos, order_spec=None, max_nodes=None, tie_break='high-g', stats=None, workers=None, log=None):
+    """A* rozproszone na `workers` procesów (domyślnie liczba rdzeni).
+
+    Dla jednego procesu (albo wewnątrz procesu-demona, np. puli trybu
+    wsadowego, który nie może mieć dzieci) wywołuje zwykłe `astar` i pisze
+    o tym do `log` (domyślnie stderr).
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or multiprocessing.current_process().daemon:
+        reason = "jeden proces" if workers <= 1 else "proces-demon nie może tworzyć procesów"
+        print(f"HDA*: {reason} - uruchamiam zwykłe A*", file=log or sys.stderr)
+        if stats is not None:
+            stats.extra['workers'] = 1
+        return astar(start, goal, R, C, heur_fn, goal_pos, order_spec, max_nodes, tie_break, stats=stats)
+    if start == goal:
+        return ''
+    if stats is not None:
+        stats.begin('setup')
+
+    counters = multiprocessing.RawArray('q', _NCOUNT * (workers + 1))  # ostatni slot: proces główny
+    incumbent = multiprocessing.Value('i', _NO_SOLUTION)
+    inboxes = [multiprocessing.Queue() for _ in range(workers)]
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=_worker, daemon=True,
+                                     args=(wid, workers, goal, R, C, heur_fn, goal_pos, order_spec, tie_break,
+                                           inboxes, results, counters, incumbent))
+             for wid in range(workers)]
+    for p in procs:
+        p.start()
+
+    master = _NCOUNT * workers
+    counters[master + _SENT] += 1
+    inboxes[owner_of(start, workers)].put(('nodes', [(start, 0, None, None)]))
+    if stats is not None:
+        stats.begin('search')
+    path = None
+    try:
+        last = None
+        while True:
+            time.sleep(0.002)
+            snap = _snapshot(counters, workers)
+            expanded = snap[1]
+            if max_nodes and expanded > max_nodes:
+                break
+            if snap[0] and snap == last:
+                # wszyscy bezczynni, nic w drodze - koniec
+                if incumbent.value != _NO_SOLUTION:
+                    if stats is not None:
+                        stats.begin('path')
+                    path = _trace(goal, workers, inboxes, results)
+                break
+            last = snap
+        return path
+    finally:
+        for box in inboxes:
+            box.put(('stop',))
+        for p in procs:
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+        if stats is not None:
+            stats.expanded = sum(counters[w * _NCOUNT + _EXPANDED] for w in range(workers))
+            stats.generated = sum(counters[w * _NCOUNT + _GENERATED] for w in range(workers))
+            stats.duplicates = sum(counters[w * _NCOUNT + _DUPS] for w in range(workers))
+            stats.heuristic_calls = sum(counters[w * _NCOUNT + _HCALLS] for w in range(workers))
+            stats.extra['workers'] = workers
+            stats.extra['batches_sent'] = sum(counters[w * _NCOUNT + _SENT] for w in range(workers + 1))
+            stats.end()
+
+
+def _snapshot(counters, workers):
+    """(wszyscy bezczynni i wysłane == odebrane, rozwinięte, wysłane, odebrane)."""
+    sent = recv = expanded = 0
+    idle = True
+    for w in range(workers):
+        base = w * _NCOUNT
+        idle = idle and counters[base + _IDLE] == 1
+        sent += counters[base + _SENT]
+        recv += counters[base + _RECV]
+        expanded += counters[base + _EXPANDED]
+    sent += counters[workers * _NCOUNT + _SENT]
+    return (idle and sent == recv, expanded, sent, recv)
+
+
+def _trace(goal, workers, inboxes, results):
+    moves = []
+    state = goal
+    while True:
+        inboxes[owner_of(state, workers)].put(('trace', state))
+        state, m = results.get()
+        if state is None:
+            break
+        moves.append(m)
+    moves.reverse()
+    return ''.join(moves)
+
+
+def _worker(wid, workers, goal, R, C, heur_fn, goal_pos, order_spec, tie_break,
+            inboxes, results, counters, incumbent):
+    moves, mask = move_table(R, C, order_spec)
+    base = wid * _NCOUNT
+    inbox = inboxes[wid]
+    best_g = {}
+    parent = {}
+    closed = {}
+    open_list = None
+    out = [[] for _ in range(workers)]
+    bound = _NO_SOLUTION
+    expanded = generated = dups = hcalls = 0
+    slices = 0
+
+    def flush(dest):
+        counters[base + _SENT] += 1
+        inboxes[dest].put(('nodes', out[dest]))
+        out[dest] = []
+
+    def accept(batch):
+        # stany, których jesteśmy właścicielem: (stan, g, rodzic, ruch)
+        nonlocal open_list, bound, dups, hcalls
+        for state, g, pstate, m in batch:
+            if g >= best_g.get(state, _NO_SOLUTION):
+                dups += 1
+                continue
+            best_g[state] = g
+            parent[state] = (pstate, m)
+            if state == goal:
+                with incumbent.get_lock():
+                    if g < incumbent.value:
+                        incumbent.value = g
+                bound = incumbent.value
+                continue
+            f = g + heur_fn(state, R, C, goal_pos)
+            hcalls += 1
+            if f >= bound:
+                continue
+            if open_list is None:
+                open_list = make_open_list(f, tie_break)
+            open_list.push(f, g, (state, g, f))
+
+    while True:
+        # 1. skrzynka: nowe stany, zapytania o ścieżkę, koniec
+        busy = open_list is not None and len(open_list) > 0
+        while True:
+            try:
+                msg = inbox.get_nowait() if busy else inbox.get(timeout=0.05)
+            except Empty:
+                break
+            kind = msg[0]
+            if kind == 'nodes':
+                counters[base + _IDLE] = 0
+                accept(msg[1])
+                counters[base + _RECV] += 1
+            elif kind == 'trace':
+                pstate, m = parent[msg[1]]
+                results.put((pstate, m))
+            else:
+                # nieodebrane paczki w cudzych skrzynkach nie mogą blokować wyjścia
+                for box in inboxes:
+                    box.cancel_join_thread()
+                return
+            busy = True
+
+        # 2. porcja rozwinięć
+        bound = incumbent.value
+        steps = 0
+        while open_list and steps < _SLICE:
+            state, g, f = open_list.pop()
+            if f >= bound:
+                # lista jest uporządkowana po f - reszta też odpada
+                open_list = None
+                break
+            if best_g.get(state) != g or closed.get(state, _NO_SOLUTION) <= g:
+                dups += 1
+                continue
+            closed[state] = g
+            expanded += 1
+            steps += 1
+            ng = g + 1
+            pstate = parent[state][0]
+            local = []
+            for m, shift, coef, dz in moves[state & mask]:
+                ns = state + ((state >> shift) & mask) * coef + dz
+                if ns == pstate:
+                    dups += 1
+                    continue
+                generated += 1
+                dest = owner_of(ns, workers)
+                if dest == wid:
+                    local.append((ns, ng, state, m))
+                else:
+                    buf = out[dest]
+                    buf.append((ns, ng, state, m))
+                    if len(buf) >= _BATCH:
+                        flush(dest)
+            if local:
+                accept(local)
+        counters[base + _EXPANDED] = expanded
+        counters[base + _GENERATED] = generated
+        counters[base + _DUPS] = dups
+        counters[base + _HCALLS] = hcalls
+
+        # 3. niepełne paczki co _FLUSH_SLICES porcji (inni nie mogą czekać na
+        #    pełną paczkę w nieskończoność), a zawsze przed zgłoszeniem
+        #    bezczynności - bez pracy nic nie może zostać w buforach
+        slices += 1
+        if not open_list or slices % _FLUSH_SLICES == 0:
+            for dest in range(workers):
+                if out[dest]:
+                    flush(dest)
+        if not open_list:
+            counters[base + _IDLE] = 1
@@ -0,0 +1,165 @@
+# IDA*: iteracyjne pogłębianie po progu f = g + h. Przeszukiwanie w głąb na
+# jednej mutowalnej planszy, bez zbiorów odwiedzonych - pamięć to tylko
+# bieżąca ścieżka, niezależnie od liczby rozwiniętych węzłów.
+
+
+import random
+from time import perf_counter
+from state import unpack, tile_bits
+from utils import neighbor_table
+from heuristics import make_incremental
+
+
+def idastar(start, goal, R, C, heur_fn, goal_pos, order_spec=None, max_nodes=None, report=None, stats=None, exact=None):
+    """IDA*. `report(threshold, nodes)` jest wołane po każdej iteracji.
+
+    `exact` (opcjonalnie): cache.ExactTable - odległości dokładne do celu
+    dla stanów spakowanych. Dla tych stanów f jest dokładne: jeśli mieści się w progu,
+    kończymy, a jeśli nie - odcinamy gałąź.
+    """
+    if start == goal:
+        return ''
+    if exact:
+        if start in exact:
+            return exact.path(start)
+        # stan spakowany liczony przyrostowo: płytka t z pola n na z
+        weight = [1 << tile_bits(R, C) * (i + 1) for i in range(R * C)]
+    else:
+        exact = None
+    if stats is not None:
+        stats.begin('setup')
+    randomize = bool(order_spec) and order_spec[0] == 'R'
+    if randomize:
+        # tasujemy raz na iterację, nie przy każdym wejściu do węzła
+        nbrs = [list(lst) for lst in neighbor_table(R, C)]
+    else:
+        nbrs = neighbor_table(R, C, order_spec)
+
+    board = list(unpack(start, R, C))
+    goal_board = list(unpack(goal, R, C))
+    inc = make_incremental(heur_fn, R, C, goal_pos)
+    table = inc.table
+    if stats is not None and table is None:
+        inc.push = _timed(inc.push, stats)
+        inc.reset = _timed(inc.reset, stats)
+
+    h0 = inc.reset(board)
+    bound = h0
+    nodes = 0
+    generated = 0
+    dups = 0
+    max_depth = 0
+    iterations = []
+    if stats is not None:
+        stats.begin('search')
+    try:
+        while True:
+            if randomize:
+                for lst in nbrs:
+                    random.shuffle(lst)
+            iter_nodes = 0
+            next_bound = None
+            moves = []
+            blanks = [board.index(0)]
+            packed = [start]
+            hs = [h0]
+            pos = [0]
+            while True:
+                d = len(moves)
+                z = blanks[d]
+                nb = nbrs[z]
+                i = pos[d]
+                if i == len(nb):
+                    # wszystkie ruchy z tego węzła sprawdzone - cofamy się
+                    if d == 0:
+                        break
+                    pz = blanks[d - 1]
+                    board[z] = board[pz]
+                    board[pz] = 0
+                    if table is None:
+                        inc.pop()
+                    moves.pop()
+                    blanks.pop()
+                    if exact is not None:
+                        packed.pop()
+                    hs.pop()
+                    pos.pop()
+                    continue
+                pos[d] = i + 1
+                m, n = nb[i]
+                if d and n == blanks[d - 1]:
+                    dups += 1
+                    continue  # natychmiastowe cofnięcie ruchu
+                generated += 1
+                tile = board[n]
+                board[z] = tile
+                board[n] = 0
+                if table is not None:
+                    h = hs[d] + table[tile][z] - table[tile][n]
+                else:
+                    h = inc.push(board, tile, n, z, hs[d])
+                f = d + 1 + h
+                if exact is not None:
+                    ns = packed[d] + tile * (weight[z] - weight[n]) + n - z
+                    rest = exact.dist(ns)
+                    if rest is not None:
+                        f = d + 1 + rest
+                        if f <= bound:
+                            nodes += 1
+                            iter_nodes += 1
+                            iterations.append({'threshold': bound, 'nodes': iter_nodes})
+                            if report:
+                                report(bound, iter_nodes)
+                            return ''.join(moves) + m + exact.path(ns)
+                if f > bound:
+                    board[n] = tile
+                    board[z] = 0
+                    if table is None:
+                        inc.pop()
+                    if next_bound is None or f < next_bound:
+                        next_bound = f
+                    continue
+                nodes += 1
+                iter_nodes += 1
+                if max_nodes and nodes > max_nodes:
+                    return None
+                moves.append(m)
+                if d >= max_depth:
+                    max_depth = d + 1
+                if h == 0 and board == goal_board:
+                    iterations.append({'threshold': bound, 'nodes': iter_nodes})
+                    if report:
+                        report(bound, iter_nodes)
+                    return ''.join(moves)
+                blanks.append(n)
+                if exact is not None:
+                    packed.append(ns)
+                hs.append(h)
+                pos.append(0)
+            iterations.append({'threshold': bound, 'nodes': iter_nodes})
+            if report:
+                report(bound, iter_nodes)
+            if next_bound is None:
+                return None
+            bound = next_bound
+    finally:
+        if stats is not None:
+            stats.expanded = nodes
+            stats.generated = generated
+            stats.duplicates = dups
+            stats.peak_open = max_depth
+            stats.max_depth = max_depth
+            # h liczymy raz dla każdego wygenerowanego następnika (+ start)
+            stats.heuristic_calls = generated + 1
+            stats.extra['iterations'] = iterations
+            stats.end()
+
+
+def _timed(fn, stats):
+    def timed(*args):
+        t0 = perf_counter()
+        value = fn(*args)
+        stats.heuristic_time += perf_counter() - t0
+        stats.heuristic_timed += 1
+        return value
+    return timed
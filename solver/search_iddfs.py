@@ -1,33 +1,118 @@
-from utils import gen_successors
+# IDDFS: iteracyjne pogłębianie z jawnym stosem na jednej mutowalnej planszy
+# (jak IDA*), więc głębokość nie zależy od limitu rekursji. Zamiast zbioru
+# odwiedzonych ścieżkę przycina automat ruchów (movefsm): zawsze odrzuca
+# natychmiastowe cofnięcie, a dla prune_depth > 2 także dłuższe zbędne ciągi.
 
 
-def iddfs(start, goal, R, C, order_spec=None, max_depth=50, max_nodes=None):
-    nodes = 0
-    def dls(state, depth, path, visited_set):
-        nonlocal nodes
-        nodes += 1
-        if max_nodes and nodes > max_nodes:
-            return None, True
-        if state == goal:
-            return path, True
-        if depth == 0:
-            return None, False
-        cutoff = False
-        for m, ns in gen_successors(state, R, C, order_spec):
-            if ns in visited_set:
-                continue
-            visited_set.add(ns)
-            res, finished = dls(ns, depth-1, path + m, visited_set)
-            visited_set.remove(ns)
-            if finished:
-                return res, True
-            if res is None:
-                cutoff = True
-        return None, False if not cutoff else (None, False)
+import random
+from state import unpack
+from utils import neighbor_table
+from movefsm import move_automaton
+
 
+def iddfs(start, goal, R, C, order_spec=None, max_depth=50, max_nodes=None, stats=None, prune_depth=2, report=None):
+    """IDDFS do głębokości `max_depth`. `report(depth, nodes)` jest wołane po
+    każdej iteracji; te same liczby (próg = limit głębokości) trafiają do
+    stats.extra['iterations']."""
+    if stats is not None:
+        stats.begin('setup')
+    randomize = bool(order_spec) and order_spec[0] == 'R'
+    if randomize:
+        nbrs = [list(lst) for lst in neighbor_table(R, C)]
+    else:
+        nbrs = neighbor_table(R, C, order_spec)
+    trans = move_automaton(prune_depth)
 
-    for depth in range(max_depth+1):
-        res, finished = dls(start, depth, "", {start})
-        if res is not None:
-            return res
-    return None
\ No newline at end of file
+    board = list(unpack(start, R, C))
+    goal_board = list(unpack(goal, R, C))
+    goal_blank = goal_board.index(0)
+    nodes = 0
+    generated = 0
+    dups = 0
+    reached = 0
+    iterations = []
+    if stats is not None:
+        stats.begin('search')
+    try:
+        for limit in range(max_depth + 1):
+            reached = limit
+            if randomize:
+                for lst in nbrs:
+                    random.shuffle(lst)
+            nodes += 1
+            iter_nodes = 1
+            if max_nodes and nodes > max_nodes:
+                return None
+            if start == goal:
+                return ''
+            if limit == 0:
+                iterations.append({'threshold': limit, 'nodes': iter_nodes})
+                if report:
+                    report(limit, iter_nodes)
+                continue
+            # cel może leżeć tylko na głębokości `limit` - płytsze poziomy
+            # sprawdziły poprzednie iteracje
+            last = limit - 1
+            moves = []
+            blanks = [board.index(0)]
+            fsm = [0]
+            pos = [0]
+            while True:
+                d = len(moves)
+                z = blanks[d]
+                nb = nbrs[z]
+                i = pos[d]
+                if i == len(nb):
+                    if d == 0:
+                        break
+                    pz = blanks[d - 1]
+                    board[z] = board[pz]
+                    board[pz] = 0
+                    moves.pop()
+                    blanks.pop()
+                    fsm.pop()
+                    pos.pop()
+                    continue
+                pos[d] = i + 1
+                m, n = nb[i]
+                generated += 1
+                q = trans[fsm[d]][m]
+                if q < 0:
+                    dups += 1
+                    continue
+                if d == last and n != goal_blank:
+                    continue  # liść, w którym puste pole nie jest na miejscu - nie wchodzimy
+                nodes += 1
+                iter_nodes += 1
+                if max_nodes and nodes > max_nodes:
+                    return None
+                if d == last:
+                    board[z] = board[n]
+                    board[n] = 0
+                    if board == goal_board:
+                        iterations.append({'threshold': limit, 'nodes': iter_nodes})
+                        if report:
+                            report(limit, iter_nodes)
+                        return ''.join(moves) + m
+                    board[n] = board[z]
+                    board[z] = 0
+                    continue
+                board[z] = board[n]
+                board[n] = 0
+                moves.append(m)
+                blanks.append(n)
+                fsm.append(q)
+                pos.append(0)
+            iterations.append({'threshold': limit, 'nodes': iter_nodes})
+            if report:
+                report(limit, iter_nodes)
+        return None
+    finally:
+        if stats is not None:
+            stats.expanded = nodes
+            stats.generated = generated
+            stats.duplicates = dups
+            stats.peak_open = reached + 1
+            stats.max_depth = reached
+            stats.extra['iterations'] = iterations
+            stats.end()
@@ -1,50 +1,203 @@
-# Uwaga: SMA* jest rozbudowanym algorytmem; poniżej szkic implementacji
-# zamiast pełnej, bezpiecznej implementacji produkcyjnej. Służy do porównań
-# w ćwiczeniach — ograniczamy liczbę przechowywanych węzłów (max_memory).
+# SMA* (Simplified Memory-bounded A*): A* z twardym limitem liczby węzłów
+# trzymanych w pamięci (max_memory).
+#
+# Drzewo przeszukiwania trzymamy jawnie (węzeł zna rodzica i dzieci). Gdy
+# pamięć jest pełna, usuwamy najgorszy liść (największe f, przy remisie
+# najpłytszy), a jego f zapamiętujemy w rodzicu (`forgotten`) - rodzic wraca
+# na listę otwartą i w razie potrzeby odtworzy zapomniane dziecko z tą samą
+# (podbitą) wartością f. Wartości f dzieci propagujemy w górę (backup), więc
+# f każdego węzła jest dolnym ograniczeniem na najlepsze rozwiązanie w jego
+# poddrzewie. Dzięki temu SMA* pozostaje zupełny i optymalny, o ile
+# rozwiązanie mieści się w limicie pamięci (długość < max_memory).
+#
+# Lista otwarta to struktura dwustronna: dwa kopce z leniwym usuwaniem
+# (wpis jest ważny, dopóki zgadza się wersja węzła). Kopiec minimum wybiera
+# węzeł do rozwinięcia (najmniejsze f, przy remisie najgłębszy), kopiec
+# maksimum - liść do usunięcia. Obie operacje są O(log n).
 
 
 import heapq
-from utils import gen_successors
+from utils import move_table
 
+INF = float('inf')
 
-class Node:
-    def __init__(self, state, path, g, f):
+
+class _Node:
+    __slots__ = ('state', 'g', 'f', 'parent', 'move', 'children', 'forgotten',
+                 'expanded', 'in_open', 'alive', 'ver', 'id')
+
+    def __init__(self, state, g, f, parent, move, node_id):
         self.state = state
-        self.path = path
         self.g = g
         self.f = f
-    def __lt__(self, other):
-        return self.f < other.f
+        self.parent = parent
+        self.move = move
+        self.children = []
+        self.forgotten = None   # ruch -> f zapomnianego dziecka
+        self.expanded = False
+        self.in_open = False
+        self.alive = True
+        self.ver = 0
+        self.id = node_id
+
+    def path(self):
+        out = []
+        node = self
+        while node.parent is not None:
+            out.append(node.move)
+            node = node.parent
+        out.reverse()
+        return ''.join(out)
+
+
+def sma_star(start, goal, R, C, heur_fn, goal_pos, order_spec=None, max_nodes=None, max_memory=10000, stats=None):
+    if max_memory < 1:
+        return None
+    if stats is not None:
+        stats.begin('setup')
+        heur_fn = stats.counted(heur_fn)
+    moves, mask = move_table(R, C, order_spec)
+    open_heap = []    # (klucz, -g, id, wersja, węzeł)
+    evict_heap = []   # (-klucz, g, id, wersja, węzeł) - tylko liście
+    counter = [0]
+    used = [0]
+    peak = [0]
+    evicted = [0]
+
+    def new_node(state, g, f, parent, move):
+        counter[0] += 1
+        used[0] += 1
+        if used[0] > peak[0]:
+            peak[0] = used[0]
+        return _Node(state, g, f, parent, move, counter[0])
 
+    def enqueue(node):
+        # klucz: własne f dla nierozwiniętego węzła, a dla rozwiniętego
+        # najlepsze f wśród zapomnianych dzieci (tylko je trzeba odtworzyć)
+        node.ver += 1
+        node.in_open = True
+        key = node.f if not node.expanded else min(node.forgotten.values())
+        heapq.heappush(open_heap, (key, -node.g, node.id, node.ver, node))
+        if not node.children and node.parent is not None:
+            heapq.heappush(evict_heap, (-key, node.g, node.id, node.ver, node))
 
-def sma_star(start, goal, R, C, heur_fn, goal_pos, order_spec=None, max_nodes=None, max_memory=10000):
-# bardzo uproszczona wersja: działanie podobne do A* z ograniczeniem rozmiaru open-listy
-    open_heap = []
-    f0 = heur_fn(start, R, C, goal_pos)
-    heapq.heappush(open_heap, (f0, 0, start, "", 0))
+    def backup(node):
+        # f węzła = min po dzieciach (w pamięci i zapomnianych), w górę drzewa
+        while node is not None and node.expanded:
+            best = min((c.f for c in node.children), default=INF)
+            if node.forgotten:
+                best = min(best, min(node.forgotten.values()))
+            if best == node.f:
+                break
+            node.f = best
+            if node.in_open and not node.children:
+                enqueue(node)   # zmienił się klucz liścia
+            node = node.parent
+
+    def evict_one(protect):
+        # najgorszy liść z listy otwartej; False, gdy nie ma czego usunąć
+        while evict_heap:
+            _, _, _, ver, leaf = heapq.heappop(evict_heap)
+            if (ver != leaf.ver or not leaf.alive or not leaf.in_open
+                    or leaf.children or leaf is protect):
+                continue
+            leaf.alive = False
+            leaf.in_open = False
+            used[0] -= 1
+            evicted[0] += 1
+            parent = leaf.parent
+            parent.children.remove(leaf)
+            if parent.forgotten is None:
+                parent.forgotten = {}
+            parent.forgotten[leaf.move] = leaf.f
+            enqueue(parent)
+            return True
+        return False
+
+    def compact():
+        # usuwamy nieaktualne wpisy, żeby kopce nie rosły ponad limit pamięci
+        open_heap[:] = [e for e in open_heap if e[4].alive and e[4].in_open and e[3] == e[4].ver]
+        heapq.heapify(open_heap)
+        evict_heap[:] = [e for e in evict_heap if e[4].alive and e[4].in_open and e[3] == e[4].ver and not e[4].children]
+        heapq.heapify(evict_heap)
+
+    root = new_node(start, 0, heur_fn(start, R, C, goal_pos), None, None)
+    enqueue(root)
     nodes = 0
-    tie = 0
-    visited = set()
-    while open_heap:
-        f, _, state, path, g = heapq.heappop(open_heap)
-        nodes += 1
-        if max_nodes and nodes > max_nodes:
-            return None
-        if state == goal:
-            return path
-        if state in visited:
-            continue
-        visited.add(state)
-        for m, ns in gen_successors(state, R, C, order_spec):
-            if ns in visited:
+    dups = 0
+    max_depth = 0
+    if stats is not None:
+        stats.begin('search')
+    try:
+        while open_heap:
+            key, _, _, ver, node = heapq.heappop(open_heap)
+            if ver != node.ver or not node.alive or not node.in_open:
                 continue
+            if key == INF:
+                return None
+            node.in_open = False
+            node.ver += 1
+            state = node.state
+            if state == goal:
+                if stats is not None:
+                    stats.begin('path')
+                return node.path()
+            nodes += 1
+            if max_nodes and nodes > max_nodes:
+                return None
+            if node.g > max_depth:
+                max_depth = node.g
+
+            g = node.g
             ng = g + 1
-            nf = ng + heur_fn(ns, R, C, goal_pos)
-            tie += 1
-            heapq.heappush(open_heap, (nf, tie, ns, path + m, ng))
-# memory control
-        if len(open_heap) > max_memory:
-# usuń element o największym f (najgorszy)
-            open_heap.sort(key=lambda x: (-x[0], x[1]))
-            open_heap.pop(0)
-    return None
\ No newline at end of file
+            if node.forgotten is None:
+                node.forgotten = {}
+            forgotten = node.forgotten
+            if node.expanded:
+                # odtwarzamy zapomniane dzieci z zapamiętanymi wartościami f
+                todo = list(forgotten.items())
+                forgotten.clear()
+            else:
+                todo = None
+                node.expanded = True
+            parent_state = node.parent.state if node.parent is not None else None
+            for m, shift, coef, dz in moves[state & mask]:
+                if todo is not None:
+                    old_f = next((f for fm, f in todo if fm == m), None)
+                    if old_f is None:
+                        continue
+                ns = state + ((state >> shift) & mask) * coef + dz
+                if ns == parent_state:
+                    dups += 1
+                    continue
+                if todo is not None:
+                    nf = old_f
+                elif ns != goal and ng >= max_memory - 1:
+                    # ścieżka przez to dziecko nie zmieści się w pamięci
+                    nf = INF
+                else:
+                    nf = max(node.f, ng + heur_fn(ns, R, C, goal_pos))
+                if used[0] >= max_memory and not evict_one(node):
+                    # nie ma miejsca nawet po usunięciu liści - w tym limicie
+                    # pamięci to dziecko jest nieosiągalne
+                    forgotten[m] = INF
+                    continue
+                child = new_node(ns, ng, nf, node, m)
+                node.children.append(child)
+                enqueue(child)
+            if forgotten:
+                enqueue(node)
+            backup(node)
+            if len(open_heap) + len(evict_heap) > 4 * max_memory + 64:
+                compact()
+        return None
+    finally:
+        if stats is not None:
+            stats.expanded = nodes
+            stats.generated = counter[0] - 1 + dups
+            stats.duplicates = dups
+            # SMA* trzyma całe drzewo - szczyt liczby węzłów w pamięci
+            stats.peak_open = peak[0]
+            stats.max_depth = max_depth
+            stats.extra['evictions'] = evicted[0]
+            stats.end()
@@ -0,0 +1,322 @@
+# Lokalna usługa rozwiązywania: serwer asyncio na gnieździe Unix albo porcie
+# localhost, przed stałą pulą procesów roboczych. Procesy startują raz (importy,
+# bazy wzorców z --preload, tablice heurystyk zapamiętane po goal_pos), więc
+# zapytanie nie płaci za start interpretera jak wywołanie main.py.
+#
+# Protokół: JSON lines w obie strony, wiele zapytań naraz na jednym połączeniu.
+#   zapytanie: {"id": 1, "R": 4, "C": 4, "tiles": [...], "strategy": "astar",
+#               "arg": "manhattan", "options": {"max_nodes": 100000},
+#               "deadline_ms": 2000, "stats": true}
+#     strategy - nazwa z rejestru main.STRATEGIES (bez 'hda', który sam
+#                tworzy procesy), arg - heurystyka albo kolejność ruchów,
+#     options  - opcje main.py pod nazwami argparse (max_depth, weight, ...).
+#   anulowanie: {"cancel": 1}
+#   odpowiedzi: {"id": 1, "event": "queued"}, {"id": 1, "event": "started"} i na
+#     koniec {"id": 1, "event": "result", "status": ..., ...} - pola jak w
+#     rekordzie batch.py (length, moves, time, nodes, stats), status także
+#     'timeout' (minął deadline_ms) albo 'cancelled'.
+# Rozwiązanie liczy batch.solve_record, czyli ta sama ścieżka co main.py
+# (run_strategy). Przerwanie trwającego zadania: sygnał SIGUSR1 do procesu,
+# którego obsługa rzuca wyjątek w silniku - proces zostaje ciepły. Bez SIGUSR1
+# (Windows) proces jest zabijany i startowany od nowa.
+
+
+import os
+import sys
+import json
+import signal
+import asyncio
+import argparse
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+import batch
+from main import build_parser, STRATEGIES
+
+_CANCEL_SIGNAL = getattr(signal, 'SIGUSR1', None)
+
+# strategie, których nie uruchamiamy w procesie roboczym
+_EXCLUDED = ('hda',)
+
+
+def _base_args():
+    """Domyślne opcje main.py bez wybranej strategii."""
+    defaults = vars(build_parser().parse_args(['--constructive']))
+    for name in STRATEGIES:
+        defaults[name] = False if name == 'constructive' else None
+    defaults.update(validate=None, batch=None, time_limit=None, save_viewer=None, open_viewer=False)
+    return defaults
+
+
+_DEFAULTS = _base_args()
+_OPTIONS = frozenset(k for k in _DEFAULTS if k not in STRATEGIES) - {
+    'validate', 'batch', 'workers', 'time_limit', 'unordered', 'chunksize', 'output',
+    'save_viewer', 'open_viewer', 'stats', 'randomize'}
+
+
+def build_args(req):
+    """Namespace opcji main.py dla zapytania; ValueError przy błędnym zapytaniu."""
+    name = req.get('strategy')
+    if name not in STRATEGIES or name in _EXCLUDED:
+        names = ', '.join(n for n in STRATEGIES if n not in _EXCLUDED)
+        raise ValueError(f"nieznana strategia {name!r}; dostępne: {names}")
+    args = argparse.Namespace(**_DEFAULTS)
+    if name == 'constructive':
+        args.constructive = True
+    else:
+        value = req.get('arg')
+        if not isinstance(value, str) or not value:
+            raise ValueError(f"strategia {name!r} wymaga 'arg' (heurystyka albo kolejność ruchów)")
+        setattr(args, name, value)
+    for key, value in (req.get('options') or {}).items():
+        key = key.replace('-', '_')
+        if key not in _OPTIONS:
+            raise ValueError(f"nieznana opcja {key!r}")
+        setattr(args, key, value)
+    args.stats = 'json' if req.get('stats') else None
+    return args
+
+
+# --- proces roboczy ---
+
+def _on_cancel(signum, frame):
+    raise batch._TimeLimit()
+
+
+def _worker_main(conn, preload):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if _CANCEL_SIGNAL is not None:
+        signal.signal(_CANCEL_SIGNAL, _on_cancel)
+    import main  # noqa: F401 - rejestr strategii i heurystyki od razu w pamięci
+    for name in preload:
+        from patterndb import get_pdb
+        get_pdb(name, 4, 4, batch.goal_pos_for(4, 4))
+    while True:
+        try:
+            job = conn.recv()
+        except batch._TimeLimit:
+            continue      # spóźniony sygnał dla zadania, które już się skończyło
+        except EOFError:
+            return
+        if job is None:
+            return
+        args, task = job
+        try:
+            batch._ARGS = args
+            result = batch.solve_record(task)
+        except batch._TimeLimit:
+            result = {'status': 'timeout'}
+        except Exception as e:
+            result = {'status': 'error', 'error': str(e)}
+        # sygnał w trakcie wysyłania przerwałby zapis do potoku w połowie
+        if _CANCEL_SIGNAL is not None:
+            signal.pthread_sigmask(signal.SIG_BLOCK, {_CANCEL_SIGNAL})
+        conn.send(result)
+        if _CANCEL_SIGNAL is not None:
+            try:
+                signal.pthread_sigmask(signal.SIG_UNBLOCK, {_CANCEL_SIGNAL})
+            except batch._TimeLimit:
+                pass
+
+
+class _Worker:
+    def __init__(self, preload):
+        self.preload = preload
+        self.job = None
+        self.spawn()
+
+    def spawn(self):
+        self.conn, child = multiprocessing.Pipe()
+        self.proc = multiprocessing.Process(target=_worker_main, args=(child, self.preload), daemon=True)
+        self.proc.start()
+        child.close()
+
+    def interrupt(self):
+        if _CANCEL_SIGNAL is not None:
+            os.kill(self.proc.pid, _CANCEL_SIGNAL)
+        else:
+            self.proc.terminate()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.proc.join(1)
+        if self.proc.is_alive():
+            self.proc.terminate()
+
+
+# --- serwer ---
+
+class _Job:
+    def __init__(self, key, req, args, emit):
+        self.key = key
+        self.id = req.get('id')
+        self.task = (key[1], json.dumps({'id': self.id, 'R': req.get('R'), 'C': req.get('C'), 'tiles': req.get('tiles')}))
+        self.args = args
+        self.emit = emit
+        self.worker = None
+        self.reason = None     # 'timeout' / 'cancelled' po przerwaniu
+        self.done = False
+        self.timer = None
+
+
+class SolveService:
+    """Kolejka zapytań i pula `workers` ciepłych procesów."""
+
+    def __init__(self, workers=None, preload=()):
+        self.workers = [_Worker(tuple(preload)) for _ in range(workers or os.cpu_count() or 1)]
+        self.queue = asyncio.Queue()
+        self.jobs = {}
+        self.counter = 0
+        self.executor = ThreadPoolExecutor(max_workers=len(self.workers))
+        self.tasks = [asyncio.ensure_future(self._run(w)) for w in self.workers]
+
+    def submit(self, conn_id, req, emit):
+        """Przyjmuje zapytanie (słownik); błędy zapytania zgłasza od razu jako wynik."""
+        self.counter += 1
+        key = (conn_id, self.counter)
+        try:
+            args = build_args(req)
+        except ValueError as e:
+            emit({'id': req.get('id'), 'event': 'result', 'status': 'error', 'error': str(e)})
+            return
+        job = _Job(key, req, args, emit)
+        self.jobs[key] = job
+        deadline = req.get('deadline_ms')
+        if deadline is not None:
+            job.timer = asyncio.get_running_loop().call_later(deadline / 1000.0, self.cancel, job, 'timeout')
+        emit({'id': job.id, 'event': 'queued'})
+        self.queue.put_nowait(job)
+
+    def cancel(self, job, reason='cancelled'):
+        if job.done or job.reason is not None:
+            return
+        job.reason = reason
+        if job.worker is not None:
+            job.worker.interrupt()
+        else:
+            self._finish(job, {'status': reason})
+
+    def cancel_id(self, conn_id, rec_id):
+        for job in list(self.jobs.values()):
+            if job.key[0] == conn_id and job.id == rec_id:
+                self.cancel(job)
+
+    def cancel_connection(self, conn_id):
+        for job in list(self.jobs.values()):
+            if job.key[0] == conn_id:
+                self.cancel(job)
+
+    def _finish(self, job, result):
+        job.done = True
+        self.jobs.pop(job.key, None)
+        if job.timer is not None:
+            job.timer.cancel()
+        if job.reason is not None and result.get('status') in ('timeout', 'error'):
+            result = {'status': job.reason}
+        result.pop('index', None)
+        result.update(id=job.id, event='result')
+        job.emit(result)
+
+    async def _run(self, worker):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            if job.done:
+                continue
+            job.worker = worker
+            worker.job = job
+            job.emit({'id': job.id, 'event': 'started'})
+            try:
+                worker.conn.send((job.args, job.task))
+                result = await loop.run_in_executor(self.executor, worker.conn.recv)
+            except (EOFError, OSError):
+                # proces zabity (anulowanie bez SIGUSR1) albo padł - nowy
+                worker.proc.join()
+                worker.spawn()
+                result = {'status': 'error', 'error': 'proces roboczy zakończył się'}
+            worker.job = None
+            self._finish(job, result)
+
+    async def handle(self, reader, writer):
+        """Obsługa jednego połączenia (JSON lines)."""
+        conn_id = id(writer)
+
+        def emit(obj):
+            if not writer.is_closing():
+                writer.write((json.dumps(obj) + '\n').encode('utf-8'))
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    req = json.loads(line)
+                    if not isinstance(req, dict):
+                        raise ValueError("oczekiwano obiektu JSON")
+                except ValueError as e:
+                    emit({'event': 'result', 'status': 'error', 'error': str(e)})
+                    continue
+                if 'cancel' in req:
+                    self.cancel_id(conn_id, req['cancel'])
+                else:
+                    self.submit(conn_id, req, emit)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.cancel_connection(conn_id)
+            writer.close()
+
+    def close(self):
+        for task in self.tasks:
+            task.cancel()
+        for worker in self.workers:
+            worker.stop()
+        self.executor.shutdown(wait=False)
+
+
+async def serve(args):
+    service = SolveService(args.workers, [p for p in (args.preload or '').split(',') if p])
+    if args.socket:
+        server = await asyncio.start_unix_server(service.handle, path=args.socket)
+        where = args.socket
+    else:
+        server = await asyncio.start_server(service.handle, '127.0.0.1', args.port)
+        where = f"127.0.0.1:{args.port}"
+    print(f"Usługa: {where}, procesy: {len(service.workers)}", file=sys.stderr)
+    try:
+        # SIGTERM: jak Ctrl+C - zamykamy procesy robocze i usuwamy gniazdo
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except (NotImplementedError, AttributeError):
+        pass
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+def build_service_parser():
+    parser = argparse.ArgumentParser(description="Lokalna usługa rozwiązywania (JSON lines przez gniazdo).")
+    where = parser.add_mutually_exclusive_group(required=True)
+    where.add_argument('--socket', type=str, metavar='PATH', help="Ścieżka gniazda Unix.")
+    where.add_argument('--port', type=int, help="Port TCP na 127.0.0.1.")
+    parser.add_argument('--workers', type=int, default=None, help="Liczba procesów roboczych (domyślnie liczba rdzeni).")
+    parser.add_argument('--preload', type=str, default=None, metavar='pdb555,pdb663', help="Bazy wzorców ładowane przy starcie procesów.")
+    return parser
+
+
+if __name__ == '__main__':
+    # python service.py --socket /tmp/puzzle.sock --workers 4 --preload pdb555
+    try:
+        asyncio.run(serve(build_service_parser().parse_args()))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
@@ -1,3 +1,6 @@
+import sys
+from array import array
+
 MOVES = {
 'U': (-1, 0),
 'D': (1, 0),
@@ -5,6 +8,8 @@ MOVES = {
 'R': (0, 1)
 }
 
+INVERSE = {'L': 'R', 'R': 'L', 'U': 'D', 'D': 'U'}
+
 
 def idx_to_rc(idx, C):
     return divmod(idx, C)
@@ -14,7 +19,56 @@ def rc_to_idx(r, c, C):
     return r * C + c
 
 
-def goal_state(R, C):
+# Stan spakowany w jedną liczbę całkowitą: płytka z pola i zajmuje `bits` bitów
+# zaczynając od bitu bits*(i+1), a najniższe `bits` bitów to indeks pustego pola
+# (cache - nie trzeba go szukać). Dla 4x4 to 16 półbajtów (64 bity) + 4 bity.
+def tile_bits(R, C):
+    bits = 4
+    while (1 << bits) < R * C:
+        bits *= 2
+    return bits
+
+
+def pack(tiles):
+    """Krotka/lista płytek -> stan spakowany."""
+    n = len(tiles)
+    bits = 4
+    while (1 << bits) < n:
+        bits *= 2
+    s = 0
+    for val in reversed(tiles):
+        s = (s << bits) | val
+    return (s << bits) | list(tiles).index(0)
+
+
+_HEX = {ch: int(ch, 16) for ch in '0123456789abcdef'}
+
+
+def unpack(state, R, C):
+    """Stan spakowany -> krotka płytek (kolejność pól)."""
+    n = R * C
+    bits = tile_bits(R, C)
+    if bits == 4:
+        return tuple(map(_HEX.__getitem__, ('%0*x' % (n, state >> 4))[::-1]))
+    raw = (state >> bits).to_bytes(n * bits // 8, 'little')
+    if bits == 8:
+        return tuple(raw)
+    arr = array('H' if bits == 16 else 'I')
+    arr.frombytes(raw)
+    if sys.byteorder == 'big':
+        arr.byteswap()
+    return tuple(arr)
+
+
+def blank_idx(state, R, C):
+    return state & ((1 << tile_bits(R, C)) - 1)
+
+
+def goal_tiles(R, C):
     vals = list(range(1, R*C))
     vals.append(0)
-    return tuple(vals)
\ No newline at end of file
+    return tuple(vals)
+
+
+def goal_state(R, C):
+    return pack(goal_tiles(R, C))
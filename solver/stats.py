@@ -0,0 +1,127 @@
+# Statystyki przeszukiwania wspólne dla wszystkich silników.
+#
+# Silnik dostaje opcjonalny obiekt SearchStats (stats=None -> nic nie mierzymy).
+# Liczniki trzyma w zmiennych lokalnych i przepisuje je do obiektu w bloku
+# finally, więc koszt w pętli głównej to tylko zwykłe inkrementacje.
+
+
+from time import perf_counter
+
+
+class SearchStats:
+    """Liczniki jednego przebiegu przeszukiwania.
+
+    expanded        - rozwinięte węzły (to, co dotąd silniki liczyły jako `nodes`)
+    generated       - wygenerowani następnicy (łącznie z odrzuconymi duplikatami)
+    duplicates      - następnicy/węzły odrzucone jako już odwiedzone lub nieaktualne
+    peak_open       - największy rozmiar listy otwartej (stosu, kolejki, frontu)
+    peak_closed     - największy rozmiar zbioru odwiedzonych (None - silnik go nie ma)
+    max_depth       - największa osiągnięta głębokość
+    heuristic_calls - liczba wyliczeń heurystyki, heuristic_time - łączny czas
+                      tych z nich, które zmierzono (heuristic_timed; wyliczeń
+                      przyrostowych z tablicy kosztów nie mierzymy)
+    phases          - czasy faz w sekundach (setup, search, path, ...)
+    extra           - dane specyficzne dla silnika (np. iteracje IDA*)
+    """
+
+    def __init__(self):
+        self.expanded = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.peak_open = 0
+        self.peak_closed = None
+        self.max_depth = 0
+        self.heuristic_calls = 0
+        self.heuristic_time = 0.0
+        self.heuristic_timed = 0
+        self.solution_length = None
+        self.phases = {}
+        self.extra = {}
+        self._phase = None
+        self._phase_t0 = 0.0
+
+    # zgodność wstecz: stats['nodes'] to liczba rozwiniętych węzłów
+    def __getitem__(self, key):
+        if key == 'nodes':
+            return self.expanded
+        return self.to_dict()[key]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def begin(self, name):
+        """Kończy bieżącą fazę i zaczyna fazę `name`."""
+        now = perf_counter()
+        if self._phase is not None:
+            self.phases[self._phase] = self.phases.get(self._phase, 0.0) + now - self._phase_t0
+        self._phase = name
+        self._phase_t0 = now
+
+    def end(self):
+        self.begin(None)
+
+    def counted(self, heur_fn):
+        """Opakowuje heurystykę tak, by liczyła wywołania i ich czas."""
+        def heuristic(state, R, C, goal_pos):
+            t0 = perf_counter()
+            value = heur_fn(state, R, C, goal_pos)
+            self.heuristic_time += perf_counter() - t0
+            self.heuristic_calls += 1
+            self.heuristic_timed += 1
+            return value
+        return heuristic
+
+    def counted_batch(self, batch_fn):
+        """Jak counted, dla heurystyki wektorowej (lista stanów -> lista h)."""
+        def heuristic(states):
+            t0 = perf_counter()
+            values = batch_fn(states)
+            self.heuristic_time += perf_counter() - t0
+            self.heuristic_calls += len(states)
+            self.heuristic_timed += len(states)
+            return values
+        return heuristic
+
+    def ebf(self):
+        """Efektywny współczynnik rozgałęzienia b*: N = b* + b*^2 + ... + b*^d.
+
+        N to liczba wygenerowanych węzłów, d - długość rozwiązania (a bez
+        rozwiązania - największa osiągnięta głębokość).
+        """
+        d = self.solution_length if self.solution_length is not None else self.max_depth
+        n = self.generated
+        if not d or n <= 0:
+            return None
+        if n <= d:
+            return 1.0
+
+        def total(b):
+            return sum(b ** i for i in range(1, d + 1))
+
+        lo, hi = 1.0, max(1.0, n ** (1.0 / d))   # b*^d <= N
+        for _ in range(100):
+            mid = (lo + hi) / 2
+            if total(mid) < n:
+                lo = mid
+            else:
+                hi = mid
+        return round((lo + hi) / 2, 4)
+
+    def to_dict(self):
+        return {
+            'nodes_expanded': self.expanded,
+            'nodes_generated': self.generated,
+            'duplicates_pruned': self.duplicates,
+            'peak_open': self.peak_open,
+            'peak_closed': self.peak_closed,
+            'max_depth': self.max_depth,
+            'solution_length': self.solution_length,
+            'effective_branching_factor': self.ebf(),
+            'heuristic_calls': self.heuristic_calls,
+            'heuristic_time_s': round(self.heuristic_time, 6),
+            'phases_s': {name: round(t, 6) for name, t in self.phases.items()},
+            **self.extra,
+        }
@@ -66,6 +66,7 @@ def get_test_cases():
     puzzles = {
         'Easy': {
             'BFS': "4 4\n1 0 2 3\n4 5 6 7\n8 9 10 11\n12 13 14 15\n",
+            'BiBFS': "4 4\n1 0 2 3\n4 5 6 7\n8 9 10 11\n12 13 14 15\n",
             'DFS': "4 4\n1 0 2 3\n4 5 6 7\n8 9 10 11\n12 13 14 15\n",
             'IDFS': "4 4\n1 0 2 3\n4 5 6 7\n8 9 10 11\n12 13 14 15\n",
             'BF': "4 4\n1 0 2 3\n4 5 6 7\n8 9 10 11\n12 13 14 15\n",
@@ -74,6 +75,7 @@ def get_test_cases():
         },
         'Medium': {
             'BFS': "4 4\n1 2 3 4\n5 6 7 8\n9 10 11 12\n13 14 0 15\n",
+            'BiBFS': "4 4\n1 2 3 4\n5 6 7 8\n9 10 11 12\n13 14 0 15\n",
             'DFS': "4 4\n1 2 3 4\n5 6 7 8\n9 10 11 12\n13 14 0 15\n",
             'IDFS': "4 4\n1 2 3 4\n5 6 7 8\n9 10 11 12\n13 14 0 15\n",
             'BF': "4 4\n1 2 3 4\n5 6 7 8\n9 10 11 12\n13 14 0 15\n",
@@ -82,6 +84,7 @@ def get_test_cases():
         },
         'Hard': {
             'BFS': "4 4\n5 1 2 3\n4 6 7 8\n9 10 11 12\n13 14 0 15\n",
+            'BiBFS': "4 4\n5 1 2 3\n4 6 7 8\n9 10 11 12\n13 14 0 15\n",
             'DFS': "4 4\n5 1 2 3\n4 6 7 8\n9 10 11 12\n13 14 0 15\n",
             'IDFS': "4 4\n5 1 2 3\n4 6 7 8\n9 10 11 12\n13 14 0 15\n",
             'BF': "4 4\n5 1 2 3\n4 6 7 8\n9 10 11 12\n13 14 0 15\n",
@@ -90,7 +93,7 @@ def get_test_cases():
         }
     }
     
-    heuristics = ['0', 'misplaced', 'manhattan']
+    heuristics = ['0', 'misplaced', 'manhattan', 'linear', 'walking']
     tests = {}
     
     # BFS - bez heurystyk, tylko różne kolejności
@@ -101,6 +104,14 @@ def get_test_cases():
             "BFS", ["-b", "DULR"], heuristic=None, difficulty=difficulty
         ))
     
+    # Dwukierunkowy BFS - bez heurystyk, tylko różne kolejności
+    tests['BiBFS'] = []
+    for difficulty in ['Easy', 'Medium', 'Hard']:
+        tests['BiBFS'].append(TestCase(
+            f"BiBFS ({difficulty})", puzzles[difficulty]['BiBFS'],
+            "BiBFS", ["-B", "DULR"], heuristic=None, difficulty=difficulty
+        ))
+    
     # DFS - bez heurystyk, tylko różne kolejności
     tests['DFS'] = []
     for difficulty in ['Easy', 'Medium', 'Hard']:
@@ -172,7 +183,7 @@ def main():
     # ==================== UNINFORMED SEARCH ====================
     print_test_section("1. UNINFORMED SEARCH (No Heuristics)")
     
-    for algo in ['BFS', 'DFS', 'IDFS']:
+    for algo in ['BFS', 'BiBFS', 'DFS', 'IDFS']:
         for test in test_cases[algo]:
             success, moves, elapsed = run_test(test, main_script)
             print_test_result(test.name, test.difficulty, success, moves, elapsed)
@@ -212,10 +223,11 @@ def main():
     
     # Porządek wyświetlania
     display_order = [
-        'BFS', 'DFS', 'IDFS',
+        'BFS', 'BiBFS', 'DFS', 'IDFS',
         'Best-First (h=0)', 'Best-First (h=misplaced)', 'Best-First (h=manhattan)',
-        'A* (h=0)', 'A* (h=misplaced)', 'A* (h=manhattan)',
-        'SMA* (h=0)', 'SMA* (h=misplaced)', 'SMA* (h=manhattan)'
+        'Best-First (h=linear)', 'Best-First (h=walking)',
+        'A* (h=0)', 'A* (h=misplaced)', 'A* (h=manhattan)', 'A* (h=linear)', 'A* (h=walking)',
+        'SMA* (h=0)', 'SMA* (h=misplaced)', 'SMA* (h=manhattan)', 'SMA* (h=linear)', 'SMA* (h=walking)'
     ]
     
     for key in display_order:
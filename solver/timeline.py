@@ -0,0 +1,88 @@
+# Zapis rozwiązania dla viewerów (viewer.py i viewer/viewer.js): klatki
+# kluczowe co K ruchów i spakowane ruchy, zamiast napisu ruchów i kopii planszy
+# dla każdego kroku.
+#
+# Klucz 'timeline' w JSON z --save-viewer:
+#   every      - K, odstęp klatek kluczowych,
+#   keyframes  - plansze po krokach 0, K, 2K, ... (listy płytek),
+#   moves      - ruchy pustego pola po 2 bity (L=0, R=1, U=2, D=3), ruch i
+#                w bajcie i // 4 na bitach 2 * (i % 4), całość w base64.
+# Stan po kroku t: klatka t // K i co najwyżej K - 1 ruchów, więc skok w dowolne
+# miejsce (także wstecz) kosztuje O(K), a pamięć to O(L / K * R*C + L / 4).
+# Domyślne K ~ sqrt(L * R*C) wyrównuje rozmiar klatek i ruchów.
+
+
+import math
+import base64
+from state import MOVES
+
+MOVE_CODES = 'LRUD'
+_CODE = {m: i for i, m in enumerate(MOVE_CODES)}
+
+
+def default_every(length, R, C):
+    return max(32, math.isqrt(length * R * C))
+
+
+def build_timeline(R, C, initial, moves, every=None):
+    """Słownik 'timeline' dla ruchów `moves` (napis albo strumień porcji napisów)."""
+    length = len(moves)
+    if every is None:
+        every = default_every(length, R, C)
+    board = list(initial)
+    z = board.index(0)
+    step = {m: dr * C + dc for m, (dr, dc) in MOVES.items()}
+    keyframes = [list(board)]
+    packed = bytearray((length + 3) // 4)
+    i = 0
+    for chunk in moves:
+        for m in chunk:
+            packed[i >> 2] |= _CODE[m] << ((i & 3) * 2)
+            n = z + step[m]
+            board[z] = board[n]
+            board[n] = 0
+            z = n
+            i += 1
+            if not i % every:
+                keyframes.append(list(board))
+    return {
+        'every': every,
+        'keyframes': keyframes,
+        'moves': base64.b64encode(bytes(packed)).decode('ascii'),
+    }
+
+
+class Timeline:
+    """Odczyt zapisu 'timeline': move(i) i state_at(krok) w O(K)."""
+
+    def __init__(self, R, C, length, data):
+        self.R = R
+        self.C = C
+        self.length = length
+        self.every = data['every']
+        self.keyframes = data['keyframes']
+        self.packed = base64.b64decode(data['moves'])
+        self.step = {m: dr * C + dc for m, (dr, dc) in MOVES.items()}
+
+    @classmethod
+    def from_moves(cls, R, C, initial, moves, every=None):
+        return cls(R, C, len(moves), build_timeline(R, C, initial, moves, every))
+
+    def __len__(self):
+        return self.length
+
+    def move(self, i):
+        """Ruch pustego pola w kroku i (0 <= i < len)."""
+        return MOVE_CODES[(self.packed[i >> 2] >> ((i & 3) * 2)) & 3]
+
+    def state_at(self, t):
+        """Lista płytek po t ruchach."""
+        k = t // self.every
+        board = list(self.keyframes[k])
+        z = board.index(0)
+        for i in range(k * self.every, t):
+            n = z + self.step[self.move(i)]
+            board[z] = board[n]
+            board[n] = 0
+            z = n
+        return board
@@ -0,0 +1,1553 @@
+#!/usr/bin/env python3
+"""
+Testy zachowania modułów solvera - wywołania funkcji w tym samym procesie,
+bez uruchamiania main.py (to robią tests.py i comprehensive_tests.py).
+Każdy test to funkcja bez argumentów, która przy błędzie rzuca AssertionError.
+
+Uruchomienie: python unit_tests.py [fragment nazwy testu]
+"""
+
+import sys
+import time
+import traceback
+
+from state import pack, goal_state
+from utils import apply_moves
+
+TESTS = []
+
+
+def test(fn):
+    TESTS.append(fn)
+    return fn
+
+
+def _instance(R, C, walk, seed):
+    """(start, goal, goal_pos) - stan po `walk` losowych ruchach od celu."""
+    import random
+    from main import get_goal_pos
+    from state import goal_tiles
+    from scramble import random_walk
+    goal = goal_state(R, C)
+    return random_walk(goal, R, C, walk, random.Random(seed))[0], goal, get_goal_pos(goal_tiles(R, C))
+
+
+def _distances_from(goal, R, C, depth):
+    """Dokładne odległości od celu (BFS) dla stanów do głębokości `depth`."""
+    from utils import gen_successors
+    dist = {goal: 0}
+    layer = [goal]
+    for d in range(1, depth + 1):
+        nxt = []
+        for state in layer:
+            for _, ns in gen_successors(state, R, C):
+                if ns not in dist:
+                    dist[ns] = d
+                    nxt.append(ns)
+        layer = nxt
+    return dist
+
+
+# --- stan spakowany ---
+
+@test
+def test_pack_unpack_roundtrip():
+    import random
+    from state import unpack, blank_idx, tile_bits
+    rng = random.Random(0)
+    # 4, 8 i 16 bitów na płytkę
+    for R, C, bits in ((1, 2, 4), (3, 3, 4), (4, 4, 4), (5, 5, 8), (16, 16, 8), (17, 17, 16)):
+        assert tile_bits(R, C) == bits, (R, C)
+        for _ in range(5):
+            tiles = list(range(R * C))
+            rng.shuffle(tiles)
+            state = pack(tiles)
+            assert unpack(state, R, C) == tuple(tiles), (R, C)
+            assert blank_idx(state, R, C) == tiles.index(0)
+            assert state < 1 << bits * (R * C + 1)
+    assert pack(list(range(9))) != pack([1, 0] + list(range(2, 9)))
+
+
+@test
+def test_move_table_successors_match_tile_swaps():
+    import random
+    from state import unpack, MOVES
+    from utils import gen_successors, iter_successors
+    rng = random.Random(1)
+    for R, C in ((2, 3), (4, 4), (5, 5), (17, 17)):
+        for _ in range(5):
+            tiles = list(range(R * C))
+            rng.shuffle(tiles)
+            state = pack(tiles)
+            z = tiles.index(0)
+            expected = []
+            for m in 'UDLR':
+                dr, dc = MOVES[m]
+                r, c = z // C + dr, z % C + dc
+                if 0 <= r < R and 0 <= c < C:
+                    swapped = list(tiles)
+                    swapped[z], swapped[r * C + c] = swapped[r * C + c], 0
+                    expected.append((m, tuple(swapped)))
+            got = [(m, unpack(ns, R, C)) for m, ns in gen_successors(state, R, C, 'UDLR')]
+            assert got == expected, (R, C, tiles)
+            assert list(iter_successors(state, R, C, 'UDLR')) == gen_successors(state, R, C, 'UDLR')
+            # kolejność losowa - te same następniki
+            assert sorted(gen_successors(state, R, C, 'R')) == sorted(gen_successors(state, R, C, 'UDLR'))
+
+
+@test
+def test_apply_moves_rejects_illegal_move():
+    R, C = 3, 3
+    goal = goal_state(R, C)
+    assert apply_moves(apply_moves(goal, R, C, 'LLUURD'), R, C, 'ULDDRR') == goal
+    for moves in ('D', 'LLL', 'X'):
+        try:
+            apply_moves(goal, R, C, moves)
+        except ValueError:
+            continue
+        raise AssertionError(moves)
+
+
+@test
+def test_move_history_paths():
+    from history import MoveHistory
+    hist = MoveHistory()
+    a = hist.add(0, 'L')
+    b = hist.add(a, 'U')
+    c = hist.add(a, 'D')
+    d = hist.add(c, 'R')
+    assert hist.path(0) == '' and hist.path(b) == 'LU' and hist.path(d) == 'LDR'
+    assert len(hist) == 5
+
+
+@test
+def test_uninformed_engines_return_valid_paths():
+    from main import get_heuristic_fn
+    from search_bfs import bfs
+    from search_dfs import dfs
+    from search_bestfirst import best_first
+    manhattan = get_heuristic_fn('manhattan')
+    for R, C in ((2, 3), (3, 3)):
+        for seed in range(4):
+            start, goal, goal_pos = _instance(R, C, 16, seed)
+            paths = [bfs(start, goal, R, C, 'DULR'), best_first(start, goal, R, C, manhattan, goal_pos)]
+            if R * C <= 6:
+                # DFS bez limitu głębokości - na 3x3 ścieżki mają dziesiątki tysięcy ruchów
+                paths.append(dfs(start, goal, R, C, 'LDUR'))
+            for path in paths:
+                assert path is not None and apply_moves(start, R, C, path) == goal, (R, C, seed, path)
+    assert bfs(goal, goal, R, C) == '' and dfs(goal, goal, R, C) == ''
+
+
+# --- walidacja i rozwiązywalność ---
+
+_LINE_RECORDS = [
+    ('1 4 1 2 0 3', 'valid'),
+    ('1 4 2 3 1 0', 'unsolvable'),    # parzystość się zgadza, kolejność nie
+    ('4 1 1 2 0 3', 'valid'),
+    ('4 1 3 1 2 0', 'unsolvable'),
+    ('1 1 0', 'valid'),
+    ('3 3 1 2 3 4 5 6 7 0 8', 'valid'),
+    ('3 3 2 1 3 4 5 6 7 8 0', 'unsolvable'),
+]
+
+
+@test
+def test_validate_line_boards():
+    import validate
+    records = [(i, line) for i, (line, _) in enumerate(_LINE_RECORDS)]
+    expected = [status for _, status in _LINE_RECORDS]
+    saved = validate.np
+    try:
+        for np in {saved, None}:
+            validate.np = np
+            got = [res['status'] for res in validate.validate_chunk(records)]
+            assert got == expected, (np is not None, got)
+    finally:
+        validate.np = saved
+
+
+@test
+def test_inversion_count_and_parity_match_brute_force():
+    import random
+    from utils import inversion_count, permutation_parity
+    rng = random.Random(4)
+    for n in (1, 2, 9, 16, 50):
+        for _ in range(20):
+            perm = list(range(n))
+            rng.shuffle(perm)
+            brute = sum(1 for i in range(n) for j in range(i + 1, n) if perm[i] > perm[j])
+            assert permutation_parity(perm) == brute & 1, perm
+            # inversion_count pomija puste pole (0)
+            tiles = [x for x in perm if x]
+            assert inversion_count(perm) == sum(1 for i in range(len(tiles)) for j in range(i + 1, len(tiles))
+                                                if tiles[i] > tiles[j]), perm
+
+
+@test
+def test_is_solvable_matches_reachability():
+    import itertools
+    from utils import is_solvable
+    for R, C in ((2, 3), (3, 2)):
+        reachable = _distances_from(goal_state(R, C), R, C, 40)
+        for tiles in itertools.permutations(range(R * C)):
+            state = pack(tiles)
+            assert is_solvable(state, R, C) == (state in reachable), (R, C, tiles)
+    # cel inny niż domyślny: puste pole na początku
+    R, C = 2, 3
+    goal = pack((0, 1, 2, 3, 4, 5))
+    reachable = _distances_from(goal, R, C, 40)
+    for tiles in itertools.permutations(range(R * C)):
+        state = pack(tiles)
+        assert is_solvable(state, R, C, goal) == (state in reachable), tiles
+
+
+@test
+def test_validate_vectorized_matches_scalar():
+    import random
+    import validate
+    from scramble import random_solvable
+    rng = random.Random(8)
+    records = []
+    for R, C in ((2, 2), (3, 3), (4, 4), (1, 5), (5, 1), (2, 7), (20, 20)):
+        for _ in range(30):
+            tiles = list(random_solvable(R, C, rng))
+            kind = rng.randrange(5)
+            if kind == 1 and R * C > 2:
+                i = tiles.index(1)
+                j = tiles.index(2)
+                tiles[i], tiles[j] = 2, 1                    # zła parzystość
+            elif kind == 2:
+                tiles[rng.randrange(R * C)] = tiles[rng.randrange(R * C)]   # możliwy duplikat
+            elif kind == 3:
+                tiles[rng.randrange(R * C)] = rng.choice((-1, R * C, 1 << 70))
+            records.append(f"{R} {C} " + ' '.join(map(str, tiles)))
+    records += ['2 2 1 2 3', '{"R": 2, "C": 2, "tiles": [1, 2, 3, 0], "id": "x"}', '0 0', 'a b']
+    records = list(enumerate(records))
+    saved = validate.np
+    try:
+        validate.np = None
+        scalar = validate.validate_chunk(records)
+        validate.np = saved
+        vectorized = validate.validate_chunk(records)
+    finally:
+        validate.np = saved
+    assert scalar == vectorized
+    statuses = {res['status'] for res in scalar}
+    assert statuses == {'valid', 'unsolvable', 'error'}, statuses
+    assert scalar[-3]['id'] == 'x' and scalar[-3]['status'] == 'valid'
+
+
+@test
+def test_run_validate_streams_in_chunks():
+    import io
+    import json
+    import os
+    import tempfile
+    from contextlib import redirect_stderr
+    import validate
+    from main import build_parser
+    lines = ['# plik testowy', '3 3 1 2 3 4 5 6 7 0 8', '', '3 3 2 1 3 4 5 6 7 8 0', '3 3 1 1 3 4 5 6 7 8 0'] * 3
+    saved = validate._CHUNK
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'in.txt')
+        out = os.path.join(tmp, 'out.jsonl')
+        with open(src, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        validate._CHUNK = 2
+        try:
+            with redirect_stderr(io.StringIO()) as err:
+                validate.run_validate(build_parser().parse_args(['--validate', src, '--output', out]))
+        finally:
+            validate._CHUNK = saved
+        with open(out) as f:
+            results = [json.loads(line) for line in f]
+    assert [r['index'] for r in results] == list(range(9))
+    assert [r['status'] for r in results] == ['valid', 'unsolvable', 'error'] * 3
+    assert 'poprawne 3, nierozwiązywalne 3, błędne 3' in err.getvalue()
+
+
+@test
+def test_is_solvable_line_boards():
+    from utils import is_solvable
+    assert is_solvable(pack((1, 0, 2, 3)), 1, 4)
+    assert not is_solvable(pack((2, 3, 1, 0)), 1, 4)
+    assert not is_solvable(pack((3, 1, 2, 0)), 4, 1)
+    assert is_solvable(goal_state(4, 4), 4, 4)
+
+
+# --- statystyki ---
+
+@test
+def test_search_stats_ebf_and_phases():
+    from stats import SearchStats
+    stats = SearchStats()
+    stats.generated, stats.solution_length = 14, 3    # 2 + 4 + 8
+    assert stats.ebf() == 2.0
+    stats.generated = 3
+    assert stats.ebf() == 1.0
+    stats.solution_length, stats.max_depth = None, 0
+    assert stats.ebf() is None
+    h = stats.counted(lambda s, R, C, gp: s % 3)
+    assert [h(s, 3, 3, None) for s in range(5)] == [0, 1, 2, 0, 1]
+    assert stats.heuristic_calls == stats.heuristic_timed == 5
+    assert stats.counted_batch(lambda states: [0] * len(states))([1, 2, 3]) == [0, 0, 0]
+    assert stats.heuristic_calls == 8
+    stats.begin('a')
+    stats.begin('b')
+    stats.begin('a')
+    stats.end()
+    assert set(stats.phases) == {'a', 'b'} and stats['nodes'] == stats.expanded
+    assert stats.get('missing', 7) == 7 and stats['phases_s'].keys() == {'a', 'b'}
+
+
+@test
+def test_every_strategy_fills_search_stats():
+    import io
+    from main import build_parser, run_strategy
+    from stats import SearchStats
+    R, C = 3, 3
+    start, goal, goal_pos = _instance(R, C, 12, 3)
+    for argv in (['-b', 'DULR'], ['-B', 'DULR'], ['-d', 'DULR', '--max-nodes', '1000'], ['-i', 'DULR'],
+                 ['-f', 'manhattan'], ['-a', 'manhattan'], ['-s', 'manhattan'], ['-A', 'manhattan'],
+                 ['-W', 'manhattan'], ['-m', 'manhattan'], ['-H', 'manhattan', '--workers', '2']):
+        stats = SearchStats()
+        path = run_strategy(build_parser().parse_args(argv), start, goal, R, C, goal_pos, log=io.StringIO(), stats=stats)
+        data = stats.to_dict()
+        assert 'search' in data['phases_s'] and stats._phase is None, argv
+        assert 0 < data['nodes_expanded'] <= data['nodes_generated'], (argv, data)
+        assert (data['heuristic_calls'] > 0) == (argv[1] == 'manhattan'), argv
+        if path is not None:
+            assert apply_moves(start, R, C, path) == goal, argv
+        else:
+            assert argv[0] == '-d'
+
+
+# --- benchmark ---
+
+@test
+def test_benchmark_percentile_and_cases():
+    from benchmark import percentile, make_cases
+    values = list(range(1, 21))
+    assert percentile(values, 95) == 19 and percentile(values, 50) == 10
+    assert percentile([5], 95) == 5 and percentile(values, 100) == 20
+    assert make_cases('Easy', 3, 0) == make_cases('Easy', 3, 0)
+    assert make_cases('Easy', 3, 0) != make_cases('Medium', 3, 0)
+
+
+@test
+def test_benchmark_json_report():
+    import io
+    import json
+    import os
+    import tempfile
+    from contextlib import redirect_stdout
+    import benchmark
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, 'bench.json')
+        with redirect_stdout(io.StringIO()) as report:
+            benchmark.main(['--algos', 'BFS', 'A*', 'IDA*', '--heuristics', 'manhattan', 'linear',
+                            '--difficulties', 'Easy', '--cases', '2', '--warmup', '0', '--repeat', '2',
+                            '--json', out])
+        with open(out) as f:
+            payload = json.load(f)
+    assert 'A*' in report.getvalue()
+    rows = {(r['algorithm'], r['heuristic']): r for r in payload['results']}
+    assert set(rows) == {('BFS', None), ('A*', 'manhattan'), ('A*', 'linear'), ('IDA*', 'manhattan'), ('IDA*', 'linear')}
+    lengths = {r['avg_solution_length'] for r in rows.values()}
+    # wszystkie trzy silniki są optymalne - ta sama średnia długość
+    assert len(lengths) == 1, lengths
+    for r in rows.values():
+        assert r['solved'] == r['cases'] == 2 and r['repeat'] == 2
+        assert r['p95_time_s'] >= r['median_time_s'] > 0 and r['peak_memory_bytes'] > 0
+    assert len(payload['puzzles']['Easy']) == 2
+
+
+# --- tryb wsadowy ---
+
+@test
+def test_batch_parse_and_iter_records():
+    import io
+    from batch import parse_record, iter_records
+    assert parse_record('2 2 1 2 3 0') == (None, 2, 2, [1, 2, 3, 0])
+    assert parse_record('{"id": "a", "R": 1, "C": 2, "tiles": [0, 1]}') == ('a', 1, 2, [0, 1])
+    for bad in ('2', '2 2 1 2 3', '{"R": 2, "C": 2}', 'x y'):
+        try:
+            parse_record(bad)
+        except (ValueError, KeyError):
+            continue
+        raise AssertionError(bad)
+    text = '# komentarz\n\n1 2 0 1\n  \n1 2 1 0\n'
+    assert list(iter_records(io.StringIO(text))) == [(0, '1 2 0 1\n'), (1, '1 2 1 0\n')]
+
+
+@test
+def test_batch_solve_record_statuses():
+    import batch
+    from main import build_parser
+    batch._init_worker(build_parser().parse_args(['-a', 'manhattan', '--batch', '-', '--stats', 'json']))
+    res = batch.solve_record((0, '{"id": 7, "R": 3, "C": 3, "tiles": [1, 2, 3, 4, 5, 6, 0, 7, 8]}'))
+    assert res['id'] == 7 and res['status'] == 'solved' and res['moves'] == 'RR', res
+    assert res['stats']['solution_length'] == 2
+    assert batch.solve_record((1, '3 3 2 1 3 4 5 6 7 8 0'))['status'] == 'unsolvable'
+    assert batch.solve_record((2, '2 2 1 1 2 0'))['status'] == 'error'
+    assert batch.solve_record((3, 'abc'))['status'] == 'error'
+    # błąd silnika (pdb tylko dla 4x4) dotyczy jednego rekordu
+    batch._init_worker(build_parser().parse_args(['-a', 'pdb555', '--batch', '-']))
+    assert batch.solve_record((4, '3 3 1 2 3 4 5 6 7 0 8'))['status'] == 'error'
+    batch._init_worker(build_parser().parse_args(['-b', 'LRUD', '--batch', '-', '--time-limit', '0.05']))
+    res = batch.solve_record((5, '4 4 0 15 14 13 12 11 10 9 8 7 6 5 4 3 2 1'))
+    assert res['status'] == 'timeout' and res['length'] == -1, res
+
+
+@test
+def test_batch_run_orders_results_for_any_worker_count():
+    import io
+    import json
+    import os
+    import tempfile
+    from contextlib import redirect_stderr
+    from batch import run_batch
+    from main import build_parser
+    lines = ['3 3 1 2 3 4 5 6 7 0 8', '3 3 2 1 3 4 5 6 7 8 0', '3 3 1 2 3 4 0 5 7 8 6', '1 3 0 1 2']
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'in.txt')
+        with open(src, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        outputs = []
+        for workers in ('1', '2'):
+            out = os.path.join(tmp, f'out{workers}.jsonl')
+            args = build_parser().parse_args(['-a', 'manhattan', '--batch', src, '--workers', workers, '--output', out])
+            with redirect_stderr(io.StringIO()):
+                run_batch(args)
+            with open(out) as f:
+                outputs.append([json.loads(line) for line in f])
+    for results in outputs:
+        assert [r['index'] for r in results] == [0, 1, 2, 3]
+        assert [r['status'] for r in results] == ['solved', 'unsolvable', 'solved', 'solved']
+    assert [r['moves'] for r in outputs[0]] == [r['moves'] for r in outputs[1]]
+
+
+# --- lista otwarta ---
+
+@test
+def test_bucket_queue_order_matches_reference():
+    import random
+    from openlist import BucketQueue, TIE_BREAKS
+    # klucz wyboru wśród wpisów (f, g, nr wstawienia): najmniejszy wygrywa
+    rank = {
+        'high-g': lambda e: (e[0], -e[1], -e[2]),
+        'lifo': lambda e: (e[0], -e[2]),
+        'fifo': lambda e: (e[0], e[2]),
+    }
+    for tie_break in TIE_BREAKS:
+        rng = random.Random(tie_break)
+        queue = BucketQueue(tie_break)
+        ref = []
+        for i in range(3000):
+            if ref and rng.random() < 0.45:
+                best = min(ref, key=rank[tie_break])
+                assert queue.peek_f() == best[0]
+                ref.remove(best)
+                assert queue.pop() == best, tie_break
+            else:
+                entry = (rng.randrange(20), rng.randrange(6), i)
+                queue.push(entry[0], entry[1], entry)
+                ref.append(entry)
+            assert len(queue) == len(ref)
+    try:
+        BucketQueue().pop()
+    except IndexError:
+        pass
+    else:
+        raise AssertionError('pop z pustej listy')
+    try:
+        BucketQueue('random')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('nieznana reguła remisów')
+
+
+@test
+def test_make_open_list_falls_back_to_heap():
+    from openlist import make_open_list, BucketQueue, HeapQueue
+    assert isinstance(make_open_list(3), BucketQueue)
+    for f0, tie_break in ((2.5, 'high-g'), (-1, 'high-g'), (3, 'heap')):
+        queue = make_open_list(f0, tie_break)
+        assert isinstance(queue, HeapQueue), (f0, tie_break)
+        for f in (f0 + 2, f0, f0 + 1):
+            queue.push(f, 0, f)
+        assert queue.peek_f() == f0 and [queue.pop() for _ in range(3)] == [f0, f0 + 1, f0 + 2]
+
+
+@test
+def test_astar_optimal_for_every_tie_break():
+    from main import get_heuristic_fn
+    from search_bfs import bfs
+    from search_astar import astar
+    R, C = 3, 3
+    h = get_heuristic_fn('manhattan')
+    for seed in range(4):
+        start, goal, goal_pos = _instance(R, C, 30, seed)
+        optimal = len(bfs(start, goal, R, C))
+        for tie_break in ('high-g', 'lifo', 'fifo', 'heap'):
+            path = astar(start, goal, R, C, h, goal_pos, tie_break=tie_break)
+            assert len(path) == optimal and apply_moves(start, R, C, path) == goal, (seed, tie_break)
+
+
+# --- bazy wzorców ---
+
+@test
+def test_pdb_rank_unrank_is_a_bijection():
+    from patterndb import rank, unrank, _num_placements
+    n, k = 9, 3
+    size = _num_placements(n, k)
+    seen = set()
+    for r in range(size):
+        pos = unrank(r, n, k)
+        assert len(set(pos)) == k and rank(pos, n) == r, (r, pos)
+        seen.add(tuple(pos))
+    assert len(seen) == size
+
+
+@test
+def test_pdb_table_roundtrip_and_admissible():
+    import tempfile
+    import patterndb
+    from state import unpack
+    from search_bfs import bfs
+    R, C = 3, 3
+    saved = patterndb.PDB_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        patterndb.PDB_DIR = tmp
+        try:
+            _, goal, goal_pos = _instance(R, C, 0, 0)
+            partition = [(1, 2, 4, 5), (3, 6, 7, 8)]
+            for tiles in partition:
+                table = patterndb.build_table(R, C, tiles, goal_pos)
+                patterndb.save_table(patterndb.table_path(R, C, tiles, goal_pos), R, C, tiles, goal_pos, table)
+            db = patterndb.AdditivePDB(R, C, partition, goal_pos, build=False)
+            for seed in range(6):
+                start = _instance(R, C, 25, seed)[0]
+                pos = [0] * (R * C)
+                for idx, val in enumerate(unpack(start, R, C)):
+                    pos[val] = idx
+                value = db.value(pos)
+                assert value <= len(bfs(start, goal, R, C)), seed
+            assert db.value([goal_pos[t] for t in range(R * C)]) == 0
+            try:
+                patterndb.PatternDB(R, C, (1, 2), goal_pos, build=False)
+            except FileNotFoundError:
+                pass
+            else:
+                raise AssertionError('brak pliku bazy powinien być błędem')
+            try:
+                patterndb.AdditivePDB(R, C, [(1, 2), (2, 3)], goal_pos)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError('nakładające się wzorce powinny być błędem')
+        finally:
+            patterndb.PDB_DIR = saved
+
+
+@test
+def test_pdb_heuristics_dominate_manhattan():
+    from main import get_heuristic_fn
+    from search_idastar import idastar
+    R, C = 4, 4
+    manhattan = get_heuristic_fn('manhattan')
+    for seed in range(3):
+        start, goal, goal_pos = _instance(R, C, 40, seed)
+        optimal = len(idastar(start, goal, R, C, manhattan, goal_pos))
+        for hid in ('pdb555', 'pdb663'):
+            h = get_heuristic_fn(hid)(start, R, C, goal_pos)
+            assert manhattan(start, R, C, goal_pos) <= h <= optimal, (seed, hid, h, optimal)
+    try:
+        get_heuristic_fn('pdb555')(goal_state(3, 3), 3, 3, _instance(3, 3, 0, 0)[2])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('pdb555 poza 4x4 powinno być błędem')
+
+
+# --- rejestr strategii ---
+
+_IMPORTED_AFTER_RUN = """
+import sys, runpy
+sys.argv = ['main.py'] + sys.argv[1:]
+try:
+    runpy.run_path('main.py', run_name='__main__')
+finally:
+    print(' '.join(sorted(m for m in sys.modules if m.startswith(('search_', 'heuristics', 'numpy')))), file=sys.stderr)
+"""
+
+
+@test
+def test_cli_imports_only_selected_engine():
+    import os
+    import subprocess
+    here = os.path.dirname(os.path.abspath(__file__))
+    # konstrukcja kończy mały prostokąt przez IDA*
+    for argv, expected in ((['-b', 'DULR'], 'search_bfs'),
+                           (['-a', 'manhattan'], 'heuristics search_astar'),
+                           (['-c'], 'heuristics search_constructive search_idastar')):
+        proc = subprocess.run([sys.executable, '-c', _IMPORTED_AFTER_RUN] + argv, cwd=here, text=True,
+                              input='4 4\n1 2 3 4\n5 6 7 8\n9 10 11 12\n13 14 0 15\n', capture_output=True)
+        assert proc.returncode == 0 and proc.stdout.split()[:2] == ['1', 'R'], (argv, proc.stdout, proc.stderr)
+        assert proc.stderr.strip().splitlines()[-1] == expected, (argv, proc.stderr)
+
+
+@test
+def test_strategy_registry_matches_cli_flags():
+    import main
+    parser = main.build_parser()
+    dests = {action.dest for action in parser._actions}
+    assert set(main.STRATEGIES) <= dests
+    assert set(main.OPTIMAL_STRATEGIES) <= set(main.STRATEGIES)
+    assert set(main.EXACT_STRATEGIES) <= set(main.OPTIMAL_STRATEGIES)
+    assert main.selected_strategy(parser.parse_args(['-A', 'linear'])) == 'idastar'
+    assert main.selected_strategy(parser.parse_args(['-c'])) == 'constructive'
+    assert main.selected_strategy(parser.parse_args(['--validate', 'x'])) is None
+    for hid in main.HEURISTICS:
+        assert callable(main.get_heuristic_fn(hid)), hid
+    try:
+        main.get_heuristic_fn('euclid')
+    except ValueError as e:
+        assert "'manhattan'" in str(e)
+    else:
+        raise AssertionError('nieznana heurystyka')
+
+
+# --- heurystyki ---
+
+@test
+def test_table_heuristics_admissible_and_consistent():
+    from main import get_heuristic_fn
+    from utils import gen_successors
+    R, C = 3, 3
+    _, goal, goal_pos = _instance(R, C, 0, 0)
+    dist = _distances_from(goal, R, C, 14)
+    manhattan = get_heuristic_fn('manhattan')
+    for hid in ('linear', 'walking'):
+        h = get_heuristic_fn(hid)
+        for state, d in dist.items():
+            value = h(state, R, C, goal_pos)
+            assert value <= d, (hid, state, value, d)
+            if hid == 'linear':
+                assert value >= manhattan(state, R, C, goal_pos)
+            for _, ns in gen_successors(state, R, C):
+                assert abs(h(ns, R, C, goal_pos) - value) <= 1, (hid, state)
+        assert h(goal, R, C, goal_pos) == 0
+
+
+@test
+def test_linear_conflict_line_costs():
+    from heuristics import _line_conflicts, _line_table
+    # kod linii: cyfry w systemie (n+1), n - płytka spoza linii lub puste pole
+    def key(digits, n):
+        return sum(d * (n + 1) ** i for i, d in enumerate(digits))
+    assert _line_conflicts(key((0, 1, 2), 3), 3) == 0
+    assert _line_conflicts(key((2, 1, 0), 3), 3) == 2
+    assert _line_conflicts(key((1, 3, 0), 3), 3) == 1
+    assert _line_conflicts(key((4, 2, 4, 0), 4), 4) == 1
+    # długie linie liczone leniwie - te same wartości
+    assert _line_table(9)[key((8, 7, 9, 0, 1, 2, 3, 4, 5), 9)] == 2
+
+
+@test
+def test_heuristic_tables_keyed_by_goal_content():
+    import heuristics
+    from main import get_heuristic_fn, get_goal_pos
+    R, C = 3, 3
+    standard = _instance(R, C, 0, 0)[2]
+    blank_first = (0, 1, 2, 3, 4, 5, 6, 7, 8)
+    other = get_goal_pos(blank_first)
+    for hid in ('manhattan', 'linear', 'walking'):
+        h = get_heuristic_fn(hid)
+        # cel z pustym polem na początku: h(cel) = 0 dla jego goal_pos, nie dla domyślnego
+        assert h(pack(blank_first), R, C, other) == 0, hid
+        assert h(pack(blank_first), R, C, standard) > 0, hid
+        assert h(goal_state(R, C), R, C, dict(standard)) == 0, hid
+    # równy cel w nowym słowniku trafia w ten sam wpis cache
+    tables = heuristics._tables_for(heuristics._LinearConflictTables, R, C, dict(other))
+    assert heuristics._tables_for(heuristics._LinearConflictTables, R, C, dict(other)) is tables
+    try:
+        get_heuristic_fn('walking')(goal_state(5, 5), 5, 5, get_goal_pos(range(25)))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('walking distance tylko do 4x4')
+
+
+@test
+def test_batch_heuristics_match_scalar():
+    import random
+    import heuristics_batch
+    from main import get_heuristic_fn, get_goal_pos
+    from state import goal_tiles
+    if heuristics_batch.np is None:
+        return   # bez NumPy nie ma wersji wektorowej
+    rng = random.Random(5)
+    for R, C, ids in ((3, 3, ('0', 'misplaced', 'manhattan')), (4, 4, ('manhattan', 'pdb555', 'pdb663')),
+                      (5, 5, ('misplaced', 'manhattan')), (16, 16, ('manhattan',))):
+        goal_pos = get_goal_pos(goal_tiles(R, C))
+        states = []
+        for _ in range(20):
+            tiles = list(range(R * C))
+            rng.shuffle(tiles)
+            states.append(pack(tiles))
+        for hid in ids:
+            fn = get_heuristic_fn(hid)
+            batch = heuristics_batch.make_batch_heuristic(fn, R, C, goal_pos)
+            assert batch(states) == [fn(s, R, C, goal_pos) for s in states], (R, C, hid)
+            assert batch([]) == []
+    goal_pos = get_goal_pos(goal_tiles(4, 4))
+    assert heuristics_batch.make_batch_heuristic(get_heuristic_fn('linear'), 4, 4, goal_pos) is None
+    assert heuristics_batch.make_batch_heuristic(get_heuristic_fn('manhattan'), 17, 17, get_goal_pos(goal_tiles(17, 17))) is None
+
+
+@test
+def test_batched_expansion_keeps_results():
+    import heuristics_batch
+    from main import get_heuristic_fn
+    from search_astar import astar
+    from search_bestfirst import best_first
+    R, C = 4, 4
+    h = get_heuristic_fn('manhattan')
+    saved = heuristics_batch.np
+    try:
+        # z NumPy partie, bez NumPy zwykłe rozwijanie - wynik ten sam
+        for np in {saved, None}:
+            heuristics_batch.np = np
+            for seed in range(3):
+                start, goal, goal_pos = _instance(R, C, 40, seed)
+                optimal = len(astar(start, goal, R, C, h, goal_pos))
+                for k in (2, 16):
+                    path = astar(start, goal, R, C, h, goal_pos, batch_size=k)
+                    assert len(path) == optimal and apply_moves(start, R, C, path) == goal, (np is None, seed, k)
+                    path = best_first(start, goal, R, C, h, goal_pos, batch_size=k)
+                    assert apply_moves(start, R, C, path) == goal
+    finally:
+        heuristics_batch.np = saved
+
+
+# --- silniki ---
+
+@test
+def test_incremental_heuristics_match_full_recompute():
+    import random
+    from main import get_heuristic_fn
+    from state import unpack
+    from utils import neighbor_table
+    from heuristics import make_incremental
+    R, C = 4, 4
+    start, _, goal_pos = _instance(R, C, 60, 1)
+    nbrs = neighbor_table(R, C)
+    for hid in ('0', 'misplaced', 'manhattan', 'linear', 'walking', 'pdb555'):
+        fn = get_heuristic_fn(hid)
+        inc = make_incremental(fn, R, C, goal_pos)
+        board = list(unpack(start, R, C))
+        hs = [inc.reset(board)]
+        trail = []
+        rng = random.Random(2)
+        # ścieżka w głąb z powrotami - push/pop jak w IDA*
+        for step in range(200):
+            if trail and rng.random() < 0.3:
+                z, n, tile = trail.pop()
+                board[n], board[z] = tile, 0
+                if inc.table is None:
+                    inc.pop()
+                hs.pop()
+            else:
+                z = board.index(0)
+                _, n = rng.choice(nbrs[z])
+                tile = board[n]
+                board[z], board[n] = tile, 0
+                hs.append(inc.push(board, tile, n, z, hs[-1]))
+                trail.append((z, n, tile))
+            assert hs[-1] == fn(pack(board), R, C, goal_pos), (hid, step)
+
+
+@test
+def test_idastar_matches_bfs_length():
+    from main import get_heuristic_fn
+    from stats import SearchStats
+    from search_bfs import bfs
+    from search_idastar import idastar
+    R, C = 3, 3
+    for seed in range(4):
+        start, goal, goal_pos = _instance(R, C, 30, seed)
+        optimal = len(bfs(start, goal, R, C))
+        for hid in ('misplaced', 'manhattan', 'linear', 'walking'):
+            bounds = []
+            stats = SearchStats()
+            path = idastar(start, goal, R, C, get_heuristic_fn(hid), goal_pos,
+                           report=lambda b, n: bounds.append(b), stats=stats)
+            assert len(path) == optimal, (seed, hid, path)
+            assert apply_moves(start, R, C, path) == goal
+            # progi rosną, ostatni to długość rozwiązania
+            assert bounds == sorted(set(bounds)) and bounds[-1] == optimal, bounds
+            assert len(stats.extra['iterations']) == len(bounds)
+    start, goal, goal_pos = _instance(R, C, 30, 0)
+    assert idastar(start, goal, R, C, get_heuristic_fn('0'), goal_pos, max_nodes=50) is None
+
+@test
+def test_bibfs_matches_bfs_length():
+    from search_bfs import bfs
+    from search_bibfs import bibfs
+    for R, C, walk in ((3, 3, 40), (2, 4, 30), (1, 5, 6)):
+        for seed in range(5):
+            start, goal, _ = _instance(R, C, walk, seed)
+            path = bibfs(start, goal, R, C)
+            assert len(path) == len(bfs(start, goal, R, C)), (R, C, seed)
+            assert apply_moves(start, R, C, path) == goal
+    # 2x2 z zamienionymi płytkami - obie połowy przestrzeni się wyczerpują
+    assert bibfs(pack((2, 1, 3, 0)), goal_state(2, 2), 2, 2) is None
+
+
+@test
+def test_sma_star_optimal_within_memory_limit():
+    from main import get_heuristic_fn
+    from stats import SearchStats
+    from search_bfs import bfs
+    from search_sma import sma_star
+    R, C = 3, 3
+    for seed, walk, hid in ((0, 30, 'manhattan'), (1, 30, 'manhattan'), (2, 12, '0')):
+        start, goal, goal_pos = _instance(R, C, walk, seed)
+        optimal = len(bfs(start, goal, R, C))
+        for memory in (optimal + 2, 50, 10000):
+            stats = SearchStats()
+            path = sma_star(start, goal, R, C, get_heuristic_fn(hid), goal_pos, max_memory=memory, stats=stats)
+            assert path is not None and len(path) == optimal, (seed, hid, memory, path)
+            assert apply_moves(start, R, C, path) == goal
+            assert stats.peak_open <= memory, (memory, stats.peak_open)
+            if memory < 100:
+                assert stats.extra['evictions'] > 0
+    # ścieżka dłuższa niż limit pamięci - brak rozwiązania zamiast pętli
+    start, goal, goal_pos = _instance(R, C, 30, 0)
+    assert sma_star(start, goal, R, C, get_heuristic_fn('manhattan'), goal_pos, max_memory=5) is None
+
+
+@test
+def test_iddfs_counts_only_visited_nodes():
+    from utils import neighbor_table
+    from search_iddfs import iddfs
+    R, C = 3, 3
+    start = pack((4, 1, 3, 7, 2, 6, 0, 5, 8))
+    per_limit = {}
+    path = iddfs(start, goal_state(R, C), R, C, max_depth=10, report=lambda d, n: per_limit.setdefault(d, n))
+    assert path == 'UURDDR', path
+    nbrs = neighbor_table(R, C)
+    goal_blank = R * C - 1
+
+    def visited(z, prev, depth, limit):
+        # węzeł na głębokości `depth`; liście (depth == limit) tylko z pustym na miejscu celu
+        if depth == limit:
+            return 1 if z == goal_blank else 0
+        total = 1
+        for _, n in nbrs[z]:
+            if n != prev:
+                total += visited(n, z, depth + 1, limit)
+        return total
+    for limit in range(1, len(path)):
+        assert per_limit[limit] == visited(6, None, 0, limit), (limit, per_limit[limit])
+
+
+@test
+def test_move_automaton_keeps_a_shortest_path_to_every_state():
+    from movefsm import duplicate_sequences, move_automaton
+    from utils import neighbor_table
+    assert duplicate_sequences(2) == {'LR', 'RL', 'UD', 'DU'}
+    R, C, depth = 3, 3, 9
+    dist = _distances_from(goal_state(R, C), R, C, depth)
+    nbrs = neighbor_table(R, C)
+    for prune_depth in (2, 6, 8):
+        trans = move_automaton(prune_depth)
+        best = {}
+
+        def walk(board, z, q, d):
+            state = pack(board)
+            if best.get(state, depth + 1) > d:
+                best[state] = d
+            if d == depth:
+                return
+            for m, n in nbrs[z]:
+                nq = trans[q][m]
+                if nq < 0:
+                    continue
+                board[z], board[n] = board[n], 0
+                walk(board, n, nq, d + 1)
+                board[n], board[z] = board[z], 0
+        board = list(range(1, R * C)) + [0]
+        walk(board, R * C - 1, 0, 0)
+        # odcięte ciągi mają zamienniki - każdy stan nadal osiągalny najkrótszą drogą
+        assert best == dist, prune_depth
+
+
+@test
+def test_iddfs_pruning_keeps_optimal_length():
+    from stats import SearchStats
+    from search_iddfs import iddfs
+    R, C = 3, 3
+    start, goal, _ = _instance(R, C, 30, 0)
+    expanded = []
+    for prune_depth in (2, 8):
+        stats = SearchStats()
+        path = iddfs(start, goal, R, C, max_depth=30, stats=stats, prune_depth=prune_depth)
+        assert len(path) == 18 and apply_moves(start, R, C, path) == goal, path
+        expanded.append(stats.expanded)
+    assert expanded[1] < expanded[0], expanded
+    assert iddfs(start, goal, R, C, max_depth=10) is None
+
+
+@test
+def test_hda_matches_astar_and_logs_fallback():
+    import io
+    import random
+    from main import get_heuristic_fn, get_goal_pos
+    from state import goal_tiles
+    from scramble import random_walk
+    from stats import SearchStats
+    from search_astar import astar
+    from search_hda import hda_star
+    R, C = 4, 4
+    goal = goal_state(R, C)
+    goal_pos = get_goal_pos(goal_tiles(R, C))
+    h = get_heuristic_fn('manhattan')
+    start = random_walk(goal, R, C, 40, random.Random(3))[0]
+    optimal = len(astar(start, goal, R, C, h, goal_pos))
+    stats = SearchStats()
+    assert len(hda_star(start, goal, R, C, h, goal_pos, stats=stats, workers=2)) == optimal
+    assert stats.extra['workers'] == 2 and stats.expanded > 0
+    log = io.StringIO()
+    assert len(hda_star(start, goal, R, C, h, goal_pos, workers=1, log=log)) == optimal
+    assert 'A*' in log.getvalue()
+
+
+@test
+def test_hda_owner_spreads_states_evenly():
+    from utils import gen_successors
+    from search_hda import owner_of
+    R, C = 4, 4
+    states = list(_distances_from(goal_state(R, C), R, C, 10))
+    for workers in (2, 3, 4, 8):
+        counts = [0] * workers
+        for state in states:
+            counts[owner_of(state, workers)] += 1
+        # sąsiednie stany różnią się kilkoma bitami - mimo to rozkład jest równy
+        assert max(counts) < 1.2 * len(states) / workers, (workers, counts)
+    state = states[-1]
+    owners = {owner_of(ns, 4) for _, ns in gen_successors(state, R, C)}
+    assert len(owners) > 1
+
+
+# --- cache rozwiązań ---
+
+def _solved(R, C, walk, seed):
+    from search_bfs import bfs
+    start, goal, _ = _instance(R, C, walk, seed)
+    return start, bfs(start, goal, R, C)
+
+
+@test
+def test_cache_store_lookup_and_suffixes():
+    import os
+    import tempfile
+    from cache import SolutionCache, _key
+    R, C = 3, 3
+    start, moves = _solved(R, C, 30, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SolutionCache(os.path.join(tmp, 'c.sqlite'))
+        try:
+            assert cache.lookup(R, C, start) is None
+            cache.store(R, C, start, moves)
+            state = start
+            for i in range(len(moves) + 1):
+                # każdy stan na ścieżce ma zapamiętany optymalny sufiks
+                assert cache.lookup(R, C, state) == moves[i:], i
+                if i < len(moves):
+                    state = apply_moves(state, R, C, moves[i])
+            assert cache.lookup(R, C, goal_state(R, C)) == ''
+            assert cache.lookup(3, 4, start) is None
+            # dłuższa ścieżka nie nadpisuje krótszej
+            cache.store(R, C, start, 'LR' + moves)
+            assert cache.lookup(R, C, start) == moves
+            # usunięty środek łańcucha - start bez wpisu, dalsza część nadal działa
+            mid = apply_moves(start, R, C, moves[:len(moves) // 2])
+            cache.db.execute('DELETE FROM positions WHERE state = ?', (_key(mid),))
+            assert cache.lookup(R, C, start) is None
+            assert cache.lookup(R, C, apply_moves(mid, R, C, moves[len(moves) // 2])) == moves[len(moves) // 2 + 1:]
+        finally:
+            cache.close()
+        # nowe połączenie - ExactTable tylko z pełnych łańcuchów
+        cache = SolutionCache(os.path.join(tmp, 'c.sqlite'))
+        try:
+            exact = cache.exact_table(R, C)
+            assert start not in exact and mid not in exact
+            tail = apply_moves(start, R, C, moves[:-3])
+            assert exact.dist(tail) == 3 and exact.path(tail) == moves[-3:]
+            assert exact.dist(start) is None
+        finally:
+            cache.close()
+
+
+@test
+def test_cache_evicts_least_recently_used():
+    import os
+    import tempfile
+    from cache import SolutionCache
+    R, C = 3, 3
+    old_start, old_moves = _solved(R, C, 30, 2)
+    new_start, new_moves = _solved(R, C, 30, 3)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SolutionCache(os.path.join(tmp, 'c.sqlite'), max_entries=len(new_moves) + 1)
+        try:
+            cache.store(R, C, old_start, old_moves)
+            cache.lookup(R, C, old_start)
+            # znacznik LRU z time.time() - drugi zapis musi być późniejszy
+            t0 = cache.db.execute('SELECT max(used) FROM positions').fetchone()[0]
+            while time.time() <= t0:
+                pass
+            cache._writes = 0   # wymuszamy sprawdzenie limitu przy tym zapisie
+            cache.store(R, C, new_start, new_moves)
+            count = cache.db.execute('SELECT COUNT(*) FROM positions').fetchone()[0]
+            assert count == len(new_moves) + 1, count
+            assert cache.lookup(R, C, new_start) == new_moves
+            assert cache.lookup(R, C, old_start) is None
+        finally:
+            cache.close()
+
+
+@test
+def test_cache_used_only_by_optimal_strategies():
+    import io
+    import os
+    import tempfile
+    import cache as cache_mod
+    from main import build_parser, run_strategy
+    R, C = 3, 3
+    start, goal, goal_pos = _instance(R, C, 30, 4)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'c.sqlite')
+        try:
+            def run(*argv):
+                log = io.StringIO()
+                args = build_parser().parse_args(list(argv) + ['--cache', path])
+                return run_strategy(args, start, goal, R, C, goal_pos, log=log), log.getvalue()
+            first, log = run('-a', 'manhattan')
+            assert 'cache' not in log
+            second, log = run('-A', 'linear')
+            assert second == first and 'Rozwiązanie z cache' in log
+            # zachłanne Best-First nie czyta ani nie zapisuje cache
+            greedy, log = run('-f', 'manhattan')
+            assert 'Cache pominięty' in log and len(greedy) >= len(first)
+            near = apply_moves(start, R, C, first[:4])
+            assert cache_mod.get_cache(path).lookup(R, C, near) == first[4:]
+        finally:
+            opened = cache_mod._OPEN.pop(path, None)
+            if opened is not None:
+                opened.close()
+
+
+# --- przeszukiwanie anytime i wiązkowe ---
+
+@test
+def test_ara_star_improves_to_optimal_with_valid_bounds():
+    from main import get_heuristic_fn
+    from stats import SearchStats
+    from search_astar import astar
+    from search_ara import ara_star
+    R, C = 4, 4
+    h = get_heuristic_fn('manhattan')
+    for seed in range(4):
+        start, goal, goal_pos = _instance(R, C, 40, seed)
+        optimal = len(astar(start, goal, R, C, h, goal_pos))
+        reports = []
+        stats = SearchStats()
+        path = ara_star(start, goal, R, C, h, goal_pos, weight=3.0, stats=stats,
+                        report=lambda w, length, bound: reports.append((w, length, bound)))
+        assert len(path) == optimal and apply_moves(start, R, C, path) == goal, seed
+        lengths = [r[1] for r in reports]
+        assert lengths == sorted(lengths, reverse=True) and lengths[-1] == optimal
+        # ograniczenie suboptymalności nigdy nie zaniża nadmiaru
+        assert all(length <= bound * optimal + 1e-9 for _, length, bound in reports), reports
+        assert stats.extra['bound'] == 1.0 and stats.extra['solutions'][-1]['length'] == optimal
+        # przerwane wcześnie - najlepsze dotąd rozwiązanie z poprawnym ograniczeniem
+        stats = SearchStats()
+        early = ara_star(start, goal, R, C, h, goal_pos, max_nodes=40, weight=5.0, stats=stats)
+        if early is not None:
+            assert apply_moves(start, R, C, early) == goal
+            assert len(early) <= stats.extra['bound'] * optimal + 1e-9, (seed, len(early), stats.extra)
+
+
+@test
+def test_ara_star_deadline_stops_search():
+    from main import get_heuristic_fn
+    from search_ara import ara_star
+    R, C = 5, 5
+    start, goal, goal_pos = _instance(R, C, 200, 1)
+    t0 = time.perf_counter()
+    path = ara_star(start, goal, R, C, get_heuristic_fn('manhattan'), goal_pos, weight=1.0, deadline_ms=100)
+    # zegar sprawdzany co _CLOCK_EVERY rozwinięć - zapas na ostatnią porcję
+    assert time.perf_counter() - t0 < 1.0
+    assert path is None or apply_moves(start, R, C, path) == goal
+
+
+@test
+def test_beam_search_width_bounds_memory():
+    from main import get_heuristic_fn
+    from stats import SearchStats
+    from search_bfs import bfs
+    from search_beam import beam_search
+    manhattan = get_heuristic_fn('manhattan')
+    R, C = 3, 3
+    for seed in range(3):
+        # wiązka szersza niż każda warstwa to BFS - długość optymalna
+        start, goal, goal_pos = _instance(R, C, 30, seed)
+        path = beam_search(start, goal, R, C, manhattan, goal_pos, width=10 ** 6)
+        assert len(path) == len(bfs(start, goal, R, C)), seed
+    R, C = 6, 6
+    start, goal, goal_pos = _instance(R, C, 150, 0)
+    for width, order in ((30, None), (30, 'RLUD')):
+        stats = SearchStats()
+        path = beam_search(start, goal, R, C, get_heuristic_fn('linear'), goal_pos, order, width=width, stats=stats)
+        assert path is not None and apply_moves(start, R, C, path) == goal, (width, order)
+        assert stats.peak_open <= 4 * width and stats.peak_closed <= width * stats.max_depth + 1, stats.to_dict()
+    assert beam_search(start, goal, R, C, manhattan, goal_pos, width=50, max_depth=5) is None
+
+
+# --- rozwiązanie konstrukcyjne ---
+
+@test
+def test_constructive_stream_constructs_once():
+    import random
+    import search_constructive
+    from scramble import random_solvable
+    R, C = 7, 9
+    goal = goal_state(R, C)
+    start = pack(random_solvable(R, C, random.Random(11)))
+    runs = [0]
+    construct = search_constructive.constructive_moves
+
+    def counted(*args):
+        runs[0] += 1
+        return construct(*args)
+    search_constructive.constructive_moves = counted
+    try:
+        stream = search_constructive.constructive_solve(start, goal, R, C)
+        length = len(stream)
+        moves = str(stream)
+        # dwie iteracje naraz czytają ten sam zapis niezależnie
+        first, second = iter(stream), iter(stream)
+        assert ''.join(a + b for a, b in zip(first, second)) == ''.join(c + c for c in stream)
+    finally:
+        search_constructive.constructive_moves = construct
+    assert runs[0] == 1, runs
+    assert len(moves) == length and apply_moves(start, R, C, moves) == goal
+
+
+@test
+def test_constructive_solves_any_shape():
+    import random
+    from scramble import random_solvable
+    from search_constructive import constructive_solve
+    rng = random.Random(3)
+    for R, C in ((2, 2), (2, 5), (5, 2), (3, 3), (4, 7), (7, 4), (1, 6), (6, 1), (12, 12)):
+        goal = goal_state(R, C)
+        for _ in range(5):
+            start = pack(random_solvable(R, C, rng))
+            moves = str(constructive_solve(start, goal, R, C))
+            assert apply_moves(start, R, C, moves) == goal, (R, C)
+    assert str(constructive_solve(goal_state(4, 4), goal_state(4, 4), 4, 4)) == ''
+
+
+@test
+def test_constructive_rejects_unsolvable_and_foreign_goal():
+    from utils import UnsolvableError
+    from search_constructive import constructive_solve
+    R, C = 3, 3
+    # zła parzystość wychodzi dopiero na końcu konstrukcji - przy iteracji
+    stream = constructive_solve(pack((2, 1, 3, 4, 5, 6, 7, 8, 0)), goal_state(R, C), R, C)
+    try:
+        str(stream)
+    except UnsolvableError:
+        pass
+    else:
+        raise AssertionError('niewykonalna plansza')
+    try:
+        str(constructive_solve(goal_state(R, C), pack(range(R * C)), R, C))
+    except ValueError as e:
+        assert not isinstance(e, UnsolvableError)
+    else:
+        raise AssertionError('cel z pustym polem na początku')
+
+
+@test
+def test_constructive_rejects_out_of_order_line():
+    from utils import UnsolvableError
+    from search_constructive import constructive_solve
+    for R, C, tiles in ((1, 4, (2, 3, 1, 0)), (4, 1, (3, 1, 2, 0))):
+        try:
+            constructive_solve(pack(tiles), goal_state(R, C), R, C)
+        except UnsolvableError:
+            continue
+        raise AssertionError((R, C, tiles))
+    assert str(constructive_solve(pack((1, 0, 2, 3)), goal_state(1, 4), 1, 4)) == 'RR'
+
+
+# --- generator instancji ---
+
+@test
+def test_scramble_random_solvable_shapes():
+    import random
+    from utils import is_solvable
+    from scramble import random_solvable
+    rng = random.Random(7)
+    for R, C in ((1, 1), (1, 2), (2, 1), (1, 6), (5, 1), (2, 2), (3, 4), (4, 4)):
+        for _ in range(50):
+            tiles = random_solvable(R, C, rng)
+            assert sorted(tiles) == list(range(R * C)), (R, C, tiles)
+            assert is_solvable(pack(tiles), R, C), (R, C, tiles)
+
+
+@test
+def test_scramble_instance_depends_on_seed_and_index_only():
+    from scramble import generate
+    whole = list(generate(3, 3, 10, seed=5))
+    assert list(generate(3, 3, 4, seed=5, first=6)) == whole[6:]
+    assert list(generate(3, 3, 10, seed=6)) != whole
+    walks = list(generate(4, 4, 5, seed=1, walk=30))
+    assert walks == list(generate(4, 4, 5, seed=1, walk=30))
+
+
+@test
+def test_scramble_random_walk_never_backtracks():
+    import random
+    from state import INVERSE
+    from scramble import random_walk
+    rng = random.Random(9)
+    for R, C in ((3, 3), (4, 4), (2, 5)):
+        goal = goal_state(R, C)
+        state, seq = random_walk(goal, R, C, 200, rng)
+        assert len(seq) == 200 and apply_moves(goal, R, C, ''.join(seq)) == state
+        assert all(INVERSE[a] != b for a, b in zip(seq, seq[1:])), (R, C)
+    # plansza 1x2 - cofnięcie to jedyny ruch
+    assert random_walk(goal_state(1, 2), 1, 2, 3, rng)[1] == ['L', 'R', 'L']
+
+
+@test
+def test_scramble_random_solvable_is_uniform():
+    import random
+    from collections import Counter
+    from scramble import random_solvable
+    rng = random.Random(10)
+    counts = Counter(tuple(random_solvable(2, 2, rng)) for _ in range(12000))
+    # 2x2: 12 stanów rozwiązywalnych, każdy ~1000 razy
+    assert len(counts) == 12 and min(counts.values()) > 850 and max(counts.values()) < 1150, counts
+
+
+@test
+def test_scramble_write_read_roundtrip():
+    import io
+    import os
+    import tempfile
+    from batch import parse_record
+    from scramble import generate, write_instances, read_instances
+    for R, C in ((4, 4), (17, 17)):
+        instances = list(generate(R, C, 5, seed=2))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'corpus.bin')
+            with open(path, 'wb') as f:
+                write_instances(f, instances, R, C, 'bin', count=len(instances))
+            rr, cc, records = read_instances(path)
+            assert (rr, cc) == (R, C) and list(records) == instances
+        for fmt in ('jsonl', 'text'):
+            out = io.StringIO()
+            write_instances(out, instances, R, C, fmt, first=10)
+            parsed = [parse_record(line) for line in out.getvalue().splitlines()]
+            assert [p[3] for p in parsed] == instances and all(p[1:3] == (R, C) for p in parsed)
+            if fmt == 'jsonl':
+                assert [p[0] for p in parsed] == list(range(10, 15))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bad.bin')
+        with open(path, 'wb') as f:
+            f.write(b'XXXX' + bytes(12))
+        try:
+            read_instances(path)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('zły nagłówek')
+
+
+# --- zapis dla viewerów ---
+
+@test
+def test_timeline_seeks_to_any_step():
+    import random
+    from state import unpack
+    from timeline import Timeline, build_timeline
+    from scramble import random_walk
+    R, C = 4, 4
+    goal = goal_state(R, C)
+    # ruchy błądzenia prowadzą od celu - to on jest planszą początkową
+    moves = ''.join(random_walk(goal, R, C, 301, random.Random(12))[1])
+    initial = list(unpack(goal, R, C))
+    expected = [list(initial)]
+    state = goal
+    for m in moves:
+        state = apply_moves(state, R, C, m)
+        expected.append(list(unpack(state, R, C)))
+    for every in (None, 1, 7, 64, 1000):
+        timeline = Timeline.from_moves(R, C, initial, moves, every)
+        assert len(timeline) == len(moves)
+        assert ''.join(timeline.move(i) for i in range(len(moves))) == moves
+        # skoki w przód i wstecz, także na klatkach kluczowych i na końcu
+        for t in list(range(len(moves), -1, -1)) + [0, 64, 128, 301, 5]:
+            assert timeline.state_at(t) == expected[t], (every, t)
+    # strumień porcji daje ten sam zapis co napis
+    chunks = [moves[i:i + 50] for i in range(0, len(moves), 50)]
+
+    class Stream(list):
+        def __len__(self):
+            return len(moves)
+    assert build_timeline(R, C, initial, Stream(chunks), 32) == build_timeline(R, C, initial, moves, 32)
+    empty = Timeline.from_moves(R, C, initial, '')
+    assert len(empty) == 0 and empty.state_at(0) == initial
+
+
+@test
+def test_viewer_loads_saved_timeline():
+    import io
+    import json
+    import os
+    import tempfile
+    from contextlib import redirect_stderr
+    from main import build_parser, export_viewer
+    from search_constructive import constructive_solve
+    from viewer import load_viewer_json
+    from state import unpack
+    R, C = 6, 6
+    start, goal, _ = _instance(R, C, 200, 5)
+    stream = constructive_solve(start, goal, R, C)
+    moves = str(stream)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'viewer.json')
+        args = build_parser().parse_args(['-c', '--save-viewer', path, '--viewer-keyframes', '16'])
+        with redirect_stderr(io.StringIO()):
+            export_viewer(args, R, C, start, stream)
+        with open(path) as f:
+            assert 'solution_moves' not in json.load(f)
+        rr, cc, initial, timeline = load_viewer_json(path)
+        # starszy format z napisem ruchów
+        legacy = os.path.join(tmp, 'legacy.json')
+        with open(legacy, 'w') as f:
+            json.dump({'R': R, 'C': C, 'initial': initial, 'solution_moves': moves}, f)
+        old = load_viewer_json(legacy)[3]
+    assert (rr, cc) == (R, C) and initial == list(unpack(start, R, C))
+    assert len(timeline) == len(old) == len(moves) and timeline.every == 16
+    for t in (0, 1, 15, 16, len(moves) // 2, len(moves)):
+        assert timeline.state_at(t) == old.state_at(t), t
+    assert timeline.state_at(len(moves)) == list(unpack(goal, R, C))
+
+
+# --- usługa rozwiązywania ---
+
+_HARD_4X4 = [0, 15, 14, 13, 12, 11, 10, 9, 8, 7, 6, 5, 4, 3, 2, 1]
+
+
+@test
+def test_service_build_args_validates_requests():
+    from service import build_args
+    args = build_args({'strategy': 'astar', 'arg': 'linear', 'options': {'max-nodes': 10, 'tie_break': 'fifo'}, 'stats': True})
+    assert args.astar == 'linear' and args.bfs is None and args.max_nodes == 10 and args.tie_break == 'fifo'
+    assert args.stats == 'json' and args.batch is None
+    assert build_args({'strategy': 'constructive'}).constructive is True
+    for req in ({'strategy': 'hda', 'arg': 'manhattan'}, {'strategy': 'nope', 'arg': 'x'}, {'strategy': 'astar'},
+                {'strategy': 'bfs', 'arg': 'DULR', 'options': {'workers': 4}},
+                {'strategy': 'bfs', 'arg': 'DULR', 'options': {'output': '/tmp/x'}}):
+        try:
+            build_args(req)
+        except ValueError:
+            continue
+        raise AssertionError(req)
+
+
+@test
+def test_service_solves_cancels_and_times_out():
+    import asyncio
+    from service import SolveService
+
+    async def scenario():
+        service = SolveService(workers=1)
+        events = {}
+        done = {}
+
+        def emit(obj):
+            events.setdefault(obj.get('id'), []).append(obj['event'])
+            if obj['event'] == 'result':
+                done[obj['id']].set_result(obj)
+
+        def submit(rec_id, **req):
+            done[rec_id] = asyncio.get_running_loop().create_future()
+            service.submit('c', dict(id=rec_id, R=4, C=4, **req), emit)
+            return done[rec_id]
+        try:
+            pid = service.workers[0].proc.pid
+            quick = dict(tiles=list(range(1, 15)) + [0, 15], strategy='astar', arg='manhattan')
+            assert (await submit(1, **quick))['moves'] == 'R'
+            # długi BFS anulowany w trakcie, drugie zadanie czeka w kolejce i też jest anulowane
+            slow = submit(2, tiles=_HARD_4X4, strategy='bfs', arg='DULR')
+            queued = submit(3, tiles=_HARD_4X4, strategy='bfs', arg='DULR')
+            while events.get(2, [])[-1:] != ['started']:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.2)
+            service.cancel_id('c', 3)
+            service.cancel_id('c', 2)
+            assert (await slow)['status'] == 'cancelled' and (await queued)['status'] == 'cancelled'
+            assert events[3] == ['queued', 'result']
+            timed = await submit(4, tiles=_HARD_4X4, strategy='bfs', arg='DULR', deadline_ms=300)
+            assert timed['status'] == 'timeout', timed
+            # proces roboczy nadal ciepły - ten sam pid, kolejne zadanie działa
+            result = await submit(5, stats=True, **quick)
+            assert result['status'] == 'solved' and result['stats']['solution_length'] == 1
+            assert service.workers[0].proc.pid == pid
+            error = await submit(6, tiles=[1, 1], strategy='astar', arg='manhattan')
+            assert error['status'] == 'error'
+            assert events[1] == ['queued', 'started', 'result']
+        finally:
+            service.close()
+    asyncio.run(asyncio.wait_for(scenario(), 60))
+
+
+@test
+def test_service_socket_protocol():
+    import asyncio
+    import json
+    import os
+    import tempfile
+    from service import SolveService
+
+    async def scenario(path):
+        service = SolveService(workers=1)
+        server = await asyncio.start_unix_server(service.handle, path=path)
+        try:
+            reader, writer = await asyncio.open_unix_connection(path)
+            lines = [{'id': 'a', 'R': 3, 'C': 3, 'tiles': [1, 2, 3, 4, 5, 6, 7, 0, 8], 'strategy': 'idastar', 'arg': 'linear'},
+                     {'id': 'b', 'R': 3, 'C': 3, 'tiles': [1, 2, 3, 4, 5, 6, 7, 8, 0], 'strategy': 'astar'}]
+            writer.write(b''.join(json.dumps(req).encode() + b'\n' for req in lines) + b'not json\n')
+            await writer.drain()
+            results = {}
+            while len(results) < 3:
+                obj = json.loads(await reader.readline())
+                if obj['event'] == 'result':
+                    results[obj.get('id')] = obj
+            writer.close()
+            return results
+        finally:
+            server.close()
+            await server.wait_closed()
+            service.close()
+    with tempfile.TemporaryDirectory() as tmp:
+        results = asyncio.run(asyncio.wait_for(scenario(os.path.join(tmp, 's.sock')), 60))
+    assert results['a']['status'] == 'solved' and results['a']['moves'] == 'R'
+    assert results['b']['status'] == 'error' and results[None]['status'] == 'error'
+
+
+# --- profilowanie ---
+
+@test
+def test_profiled_run_counts_open_list_and_reports():
+    import io
+    import os
+    import pstats
+    import tempfile
+    import openlist
+    import profiling
+    from main import get_heuristic_fn
+    from search_astar import astar
+    from stats import SearchStats
+    R, C = 3, 3
+    start, goal, goal_pos = _instance(R, C, 30, 1)
+    h = get_heuristic_fn('manhattan')
+    reference = astar(start, goal, R, C, h, goal_pos)
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ('cprofile', 'sample'):
+            out = os.path.join(tmp, 'profile.' + mode)
+            stats = SearchStats()
+            log = io.StringIO()
+            stats.begin('search')
+            path = profiling.run_profiled(mode, out, lambda: astar(start, goal, R, C, h, goal_pos, stats=stats), stats, log)
+            stats.end()
+            assert path == reference and openlist.PROFILE_WRAP is None, mode
+            report = log.getvalue()
+            # pop zdejmuje każdy rozwinięty węzeł (i pomijane duplikaty), push - start i każdego dodanego następnika
+            line = next(l for l in report.splitlines() if 'lista otwarta' in l)
+            push, pop = (int(line.split(kind + ' ')[1].split(',')[0]) for kind in ('push', 'pop'))
+            assert pop >= stats.expanded > 0 and push >= pop, (mode, line)
+            assert f"rozwinięte węzły:         {stats.expanded}" in report and f"Zrzut: {out}" in report
+            assert report.startswith(f"--- Profil ({mode},")
+            if mode == 'cprofile':
+                assert pstats.Stats(out).total_calls > 0
+            else:
+                with open(out, encoding='utf-8') as f:
+                    for row in f:
+                        stack, n = row.rsplit(' ', 1)
+                        assert stack and int(n) > 0
+
+
+@test
+def test_counted_queue_wraps_only_while_profiling():
+    import io
+    import openlist
+    import profiling
+    from collections import Counter
+    counts = Counter()
+    queue = profiling._CountedQueue(openlist.make_open_list(0, 'heap'), counts)
+    for f in (3, 1, 2):
+        queue.push(f, 0, f)
+    assert queue.peek_f() == 1 and [queue.pop() for _ in range(3)] == [1, 2, 3] and len(queue) == 0
+    assert counts == Counter(push=3, pop=3, peek=1)
+    assert not isinstance(openlist.make_open_list(0, 'heap'), profiling._CountedQueue)
+
+    def boom():
+        assert isinstance(openlist.make_open_list(0, 'heap'), profiling._CountedQueue)
+        raise KeyError('x')
+    try:
+        profiling.run_profiled('cprofile', None, boom, None, io.StringIO())
+    except KeyError:
+        pass
+    else:
+        raise AssertionError('wyjątek z fn() nie został przekazany')
+    assert openlist.PROFILE_WRAP is None
+
+
+def main():
+    pattern = sys.argv[1] if len(sys.argv) > 1 else ''
+    selected = [fn for fn in TESTS if pattern in fn.__name__]
+    print("=" * 100)
+    print(f"{'Test Name':<60} | {'Status':<6} | {'Time (ms)':<12}")
+    print("-" * 100)
+    failed = 0
+    for fn in selected:
+        t0 = time.time()
+        try:
+            fn()
+            ok, error = True, None
+        except Exception:
+            ok, error = False, traceback.format_exc().strip().splitlines()[-1]
+        elapsed = (time.time() - t0) * 1000
+        failed += not ok
+        status = "✓ PASS" if ok else "✗ FAIL"
+        print(f"{fn.__name__:<60} | {status:<6} | {elapsed:<12.2f}")
+        if error:
+            print(f"    {error}")
+    print("=" * 100)
+    print(f"Passed: {len(selected) - failed}/{len(selected)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,8 @@
 import sys
-from state import idx_to_rc, rc_to_idx, MOVES
-import random
+from state import idx_to_rc, rc_to_idx, MOVES, tile_bits, pack, unpack, goal_state
 
 
-# Wczytuje R i C, a następnie R*C liczb
+# Wczytuje R i C, a następnie R*C liczb; zwraca stan spakowany (patrz state.pack)
 def read_input():
     try:
         # Czytamy R i C z pierwszej linii
@@ -20,12 +19,16 @@ def read_input():
             print(f"Error: expected {R * C} numbers for the puzzle, got {len(data)}", file=sys.stderr)
             sys.exit(1)
         arr = list(map(int, data))
-        
+        error = check_tiles(arr, R, C)
+        if error is not None:
+            print(f"Error: {error}", file=sys.stderr)
+            sys.exit(1)
+
         # W kontekście 15-tki (4x4), upewniamy się, że to 4x4
         if R != 4 or C != 4:
             print("Warning: This project focuses on the 15-puzzle (4x4). R and C were read, but R=4 and C=4 are assumed.", file=sys.stderr)
         
-        return R, C, tuple(arr)
+        return R, C, pack(arr)
 
     except EOFError:
         print("No input", file=sys.stderr)
@@ -34,78 +37,188 @@ def read_input():
         print("Invalid input format (expected integers)", file=sys.stderr)
         sys.exit(1)
 
+# Tablice ruchów liczone raz na (R, C, kolejność). Dla pustego pola z:
+#   neighbor_table[z] = [(ruch, pole docelowe n), ...]
+#   move_table[z]     = [(ruch, przesunięcie płytki n, współczynnik, zmiana z), ...]
+# Stan jest spakowany (patrz state.pack): przesunięcie płytki t z pola n na z to
+#   ns = s + t * ((1 << bits*(z+1)) - (1 << bits*(n+1))) + (n - z)
+# więc następnik to jedno przesunięcie, maska, mnożenie i dwa dodawania.
+_NEIGHBOR_TABLES = {}
+_MOVE_TABLES = {}
+
+
+def _order(order_spec):
+    if order_spec and order_spec[0] == 'R':
+        return ('L', 'R', 'U', 'D'), True
+    return (tuple(order_spec) if order_spec else ('L', 'R', 'U', 'D')), False
+
+
+class _ShuffledMoves:
+    """Kolejność 'R...': przy każdym rozwinięciu losowa permutacja ruchów."""
+
+    def __init__(self, table):
+        import random  # leniwie - losowa kolejność to rzadki przypadek, a import kosztuje przy starcie CLI
+        self.table = table
+        self.shuffle = random.shuffle
+
+    def __getitem__(self, z):
+        lst = list(self.table[z])
+        self.shuffle(lst)
+        return lst
+
+    def __len__(self):
+        return len(self.table)
+
+
+def neighbor_table(R, C, order_spec=None):
+    order, randomize = _order(order_spec)
+    key = (R, C, order)
+    table = _NEIGHBOR_TABLES.get(key)
+    if table is None:
+        table = []
+        for idx in range(R * C):
+            zr, zc = idx_to_rc(idx, C)
+            lst = []
+            for m in order:
+                dr, dc = MOVES[m]
+                nr, nc = zr + dr, zc + dc
+                if 0 <= nr < R and 0 <= nc < C:
+                    lst.append((m, rc_to_idx(nr, nc, C)))
+            table.append(tuple(lst))
+        _NEIGHBOR_TABLES[key] = table
+    return _ShuffledMoves(table) if randomize else table
+
+
+def move_table(R, C, order_spec=None):
+    """Zwraca (tablica ruchów, maska pustego pola) dla stanów spakowanych."""
+    order, randomize = _order(order_spec)
+    bits = tile_bits(R, C)
+    key = (R, C, order)
+    table = _MOVE_TABLES.get(key)
+    if table is None:
+        table = []
+        for z, lst in enumerate(neighbor_table(R, C, ''.join(order))):
+            table.append(tuple((m, bits * (n + 1), (1 << bits * (z + 1)) - (1 << bits * (n + 1)), n - z)
+                               for m, n in lst))
+        _MOVE_TABLES[key] = table
+    return (_ShuffledMoves(table) if randomize else table), (1 << bits) - 1
+
+
+def iter_successors(state, R, C, order_spec=None):
+    """Generator par (ruch, następnik) - bez budowania listy."""
+    table, mask = move_table(R, C, order_spec)
+    for m, shift, coef, dz in table[state & mask]:
+        yield m, state + ((state >> shift) & mask) * coef + dz
+
+
 # generowanie następców (order_spec: np. 'DULR' lub 'R...' dla losowego)
 def gen_successors(state, R, C, order_spec=None):
-    zero_idx = state.index(0)
-    zr, zc = idx_to_rc(zero_idx, C)
-    if order_spec and order_spec[0] == 'R':
-        order = ['L','R','U','D']
-        random.shuffle(order)
-    else:
-        order = list(order_spec) if order_spec else ['L','R','U','D']
-    succ = []
-    for m in order:
-        dr, dc = MOVES[m]
-        nr, nc = zr + dr, zc + dc
-        if 0 <= nr < R and 0 <= nc < C:
-            nidx = rc_to_idx(nr, nc, C)
-            lst = list(state)
-            lst[zero_idx], lst[nidx] = lst[nidx], lst[zero_idx]
-            succ.append((m, tuple(lst)))
-    return succ
-
-
-# inwersje i sprawdzenie wykonalności (specjalizacja 4x4 działa poprawnie)
+    table, mask = move_table(R, C, order_spec)
+    return [(m, state + ((state >> shift) & mask) * coef + dz)
+            for m, shift, coef, dz in table[state & mask]]
+
+
+def apply_moves(state, R, C, moves):
+    """Stan po wykonaniu ciągu ruchów; ValueError dla ruchu poza planszę."""
+    table, mask = move_table(R, C)
+    for m in moves:
+        for mm, shift, coef, dz in table[state & mask]:
+            if mm == m:
+                state = state + ((state >> shift) & mask) * coef + dz
+                break
+        else:
+            raise ValueError(f"Niedozwolony ruch {m!r}")
+    return state
+
+
+# Inwersje i sprawdzenie wykonalności. Liczba inwersji: drzewo Fenwicka,
+# O(n log n). is_solvable potrzebuje tylko parzystości, więc liczy ją z rozkładu
+# na cykle (O(n)): permutacja "pole -> pole docelowe płytki" musi mieć tę samą
+# parzystość co odległość Manhattan pustego pola od jego pola docelowego (każdy
+# ruch to jedna transpozycja i krok pustego pola). To ten sam niezmiennik co
+# klasyczna reguła "inwersje + wiersz pustego pola" i działa dla dowolnego celu.
 def inversion_count(state):
+    """Liczba inwersji w sekwencji płytek (0 pomijane)."""
     arr = [x for x in state if x != 0]
+    if not arr:
+        return 0
+    size = max(arr) + 1
+    tree = [0] * (size + 1)
     inv = 0
-    for i in range(len(arr)):
-        for j in range(i+1, len(arr)):
-            if arr[i] > arr[j]:
-                inv += 1
+    for seen, x in enumerate(arr):
+        # ile z dotąd widzianych jest <= x
+        i = x
+        le = 0
+        while i > 0:
+            le += tree[i]
+            i &= i - 1
+        inv += seen - le
+        i = x
+        while i <= size:
+            tree[i] += 1
+            i += i & -i
     return inv
 
 
+def permutation_parity(perm):
+    """Parzystość permutacji 0..n-1 (0 - parzysta, 1 - nieparzysta) z rozkładu na cykle."""
+    n = len(perm)
+    seen = bytearray(n)
+    cycles = 0
+    for i in range(n):
+        if not seen[i]:
+            cycles += 1
+            while not seen[i]:
+                seen[i] = 1
+                i = perm[i]
+    return (n - cycles) & 1
+
+
+def check_tiles(tiles, R, C):
+    """Komunikat błędu, gdy `tiles` nie jest permutacją 0..R*C-1, inaczej None."""
+    n = R * C
+    if len(tiles) != n:
+        return f"oczekiwano {n} liczb planszy, otrzymano {len(tiles)}"
+    seen = bytearray(n)
+    for t in tiles:
+        if not 0 <= t < n:
+            return f"płytka {t} spoza zakresu 0..{n - 1}"
+        if seen[t]:
+            return f"płytka {t} występuje więcej niż raz"
+        seen[t] = 1
+    return None
+
+
+class UnsolvableError(ValueError):
+    """Stanu nie da się doprowadzić do celu (wykryte dopiero przez silnik)."""
+
+
+def line_solvable(tiles, goal):
+    """Plansza 1xN / Nx1: płytek nie da się przestawić, tylko przesunąć puste
+    pole, więc kolejność płytek (bez pustego) musi być taka jak w celu."""
+    return [t for t in tiles if t] == [t for t in goal if t]
+
+
 def is_solvable(state, R, C, goal=None):
-    inv = inversion_count(state)
-    if C % 2 == 1:
-        if goal is None:
-            return inv % 2 == 0
-        else:
-            return (inv % 2) == (inversion_count(goal) % 2)
-    else:
-        zr, _ = idx_to_rc(state.index(0), C)
-        blank_row_from_bottom = R - zr
-        if goal is None:
-            return (inv + blank_row_from_bottom) % 2 == 0
-        else:
-            g_inv = inversion_count(goal)
-            gr, _ = idx_to_rc(goal.index(0), C)
-            g_blank_row_from_bottom = R - gr
-            return ((inv + blank_row_from_bottom) % 2) == ((g_inv + g_blank_row_from_bottom) % 2)
+    """Czy z `state` da się dojść do `goal` (domyślnie goal_state(R, C))."""
+    tiles = unpack(state, R, C)
+    goal = unpack(goal, R, C) if goal is not None else unpack(goal_state(R, C), R, C)
+    if R == 1 or C == 1:
+        return line_solvable(tiles, goal)
+    where = [0] * (R * C)
+    for idx, t in enumerate(goal):
+        where[t] = idx
+    zr, zc = idx_to_rc(tiles.index(0), C)
+    gr, gc = idx_to_rc(where[0], C)
+    return permutation_parity([where[t] for t in tiles]) == (abs(zr - gr) + abs(zc - gc)) & 1
 
 
 def generate_shuffled(goal_state, R, C, moves):
     """Generuje stan przez wykonanie dokładnie `moves` losowych ruchów zaczynając od `goal_state`.
 
     Zwraca krotkę (shuffled_state, move_sequence) gdzie move_sequence to list of move chars.
-    Zapobiegamy natychmiastowemu cofnięciu ruchu wybierając losowy następcę, ale unikając odwrotności poprzedniego ruchu.
+    Ruchy nie cofają poprzedniego (chyba że to jedyny ruch); losuje moduł random,
+    więc random.seed() daje powtarzalny wynik. Korpusy instancji: scramble.py.
     """
-    state = list(goal_state)
-    prev_move = None
-    seq = []
-    inverse = {'L': 'R', 'R': 'L', 'U': 'D', 'D': 'U'}
-
-    for _ in range(moves):
-        succ = gen_successors(tuple(state), R, C, order_spec='R')
-        # succ is list of (move_char, state_tuple)
-        # filtrowanie cofnięć
-        filtered = [s for s in succ if prev_move is None or s[0] != inverse.get(prev_move)]
-        if not filtered:
-            filtered = succ
-        move, new_state = random.choice(filtered)
-        state = list(new_state)
-        seq.append(move)
-        prev_move = move
-
-    return tuple(state), seq
\ No newline at end of file
+    from scramble import random_walk  # scramble importuje utils
+    return random_walk(goal_state, R, C, moves)
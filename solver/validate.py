@@ -0,0 +1,146 @@
+# Walidacja wsadowa: sprawdza cały plik łamigłówek (format jak w batch.py) bez
+# rozwiązywania - czy rekord daje się sparsować, czy płytki są permutacją
+# 0..R*C-1 i czy stan jest rozwiązywalny względem goal_state(R, C).
+#
+# Plik czytamy strumieniowo porcjami po _CHUNK rekordów, więc pamięć nie zależy
+# od liczby rekordów. Z NumPy każda porcja jest sprawdzana wektorowo w grupach
+# o tym samym (R, C):
+#   - zbiór płytek: posortowane wiersze porównane z 0..n-1,
+#   - parzystość: permutacja "pole -> pole docelowe płytki"; liczbę cykli
+#     dostajemy przez podwajanie wskaźników (etykieta = najmniejsze pole cyklu,
+#     log2(n) kroków), czyli O(n log n) na rekord bez pętli Pythona.
+#   - plansze 1xN / Nx1: parzystość nie wystarcza (płytek nie da się
+#     przestawić) - płytki bez pustego pola muszą stać w kolejności celu.
+# Bez NumPy te same sprawdzenia robią check_tiles i permutation_parity z utils.
+# Wyjście: jedna linia JSON na rekord (status valid / unsolvable / error),
+# podsumowanie na stderr.
+
+
+import sys
+import json
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from batch import iter_records, parse_record
+from state import goal_tiles
+from utils import check_tiles, permutation_parity, line_solvable
+
+_CHUNK = 4096
+
+
+def validate_chunk(records):
+    """Lista (indeks, linia) -> lista słowników wyniku w tej samej kolejności."""
+    results = []
+    groups = {}
+    for index, line in records:
+        result = {'index': index}
+        results.append(result)
+        try:
+            rec_id, R, C, tiles = parse_record(line)
+        except (ValueError, KeyError, TypeError) as e:
+            result.update(status='error', error=str(e))
+            continue
+        if rec_id is not None:
+            result['id'] = rec_id
+        result.update(R=R, C=C)
+        if R < 1 or C < 1:
+            result.update(status='error', error='R i C muszą być dodatnie')
+            continue
+        groups.setdefault((R, C), []).append((result, tiles))
+    for (R, C), items in groups.items():
+        if np is not None and R * C > 1:
+            _check_vectorized(R, C, items)
+        else:
+            for result, tiles in items:
+                _check_one(R, C, result, tiles)
+    return results
+
+
+def _check_one(R, C, result, tiles):
+    error = check_tiles(tiles, R, C)
+    if error is not None:
+        result.update(status='error', error=error)
+        return
+    if R == 1 or C == 1:
+        result['status'] = 'valid' if line_solvable(tiles, goal_tiles(R, C)) else 'unsolvable'
+        return
+    n = R * C
+    # cel: płytka t na polu t-1, puste pole na ostatnim
+    perm = [t - 1 if t else n - 1 for t in tiles]
+    zr, zc = divmod(tiles.index(0), C)
+    dist = (R - 1 - zr) + (C - 1 - zc)
+    result['status'] = 'valid' if permutation_parity(perm) == dist & 1 else 'unsolvable'
+
+
+def _check_vectorized(R, C, items):
+    n = R * C
+    try:
+        a = np.array([tiles for _, tiles in items], dtype=np.int64)
+    except OverflowError:
+        for result, tiles in items:
+            _check_one(R, C, result, tiles)
+        return
+    cells = np.arange(n)
+    ok = (np.sort(a, axis=1) == cells).all(axis=1)
+    for k in np.flatnonzero(~ok):
+        result, tiles = items[k]
+        result.update(status='error', error=check_tiles(tiles, R, C))
+    rows = np.flatnonzero(ok)
+    if not len(rows):
+        return
+    a = a[rows]
+    if R == 1 or C == 1:
+        # w każdym wierszu dokładnie jedno 0 - po usunięciu zostaje n-1 płytek
+        solvable = (a[a != 0].reshape(len(rows), n - 1) == cells[1:]).all(axis=1)
+        for k, good in zip(rows, solvable.tolist()):
+            items[k][0]['status'] = 'valid' if good else 'unsolvable'
+        return
+    perm = np.where(a == 0, n - 1, a - 1)
+    label = np.broadcast_to(cells, a.shape).copy()
+    step = 1
+    while step < n:
+        label = np.minimum(label, np.take_along_axis(label, perm, axis=1))
+        perm = np.take_along_axis(perm, perm, axis=1)
+        step *= 2
+    cycles = (label == cells).sum(axis=1)
+    z = np.argmin(a, axis=1)
+    dist = (R - 1 - z // C) + (C - 1 - z % C)
+    solvable = ((n - cycles) & 1) == (dist & 1)
+    for k, good in zip(rows, solvable.tolist()):
+        items[k][0]['status'] = 'valid' if good else 'unsolvable'
+
+
+def run_validate(args):
+    """Obsługa --validate: pisze JSON lines z wynikiem dla każdego rekordu."""
+    source = sys.stdin if args.validate == '-' else open(args.validate, 'r', encoding='utf-8')
+    out = sys.stdout if not args.output else open(args.output, 'w', encoding='utf-8')
+    counts = {'valid': 0, 'unsolvable': 0, 'error': 0}
+    t0 = time.perf_counter()
+    try:
+        chunk = []
+        for task in iter_records(source):
+            chunk.append(task)
+            if len(chunk) == _CHUNK:
+                _write(validate_chunk(chunk), out, counts)
+                chunk = []
+        if chunk:
+            _write(validate_chunk(chunk), out, counts)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - t0
+    total = sum(counts.values())
+    print(f"Walidacja: {total} rekordów, poprawne {counts['valid']}, nierozwiązywalne {counts['unsolvable']}, "
+          f"błędne {counts['error']} w {elapsed:.3f} s", file=sys.stderr)
+
+
+def _write(results, out, counts):
+    for res in results:
+        counts[res['status']] += 1
+        out.write(json.dumps(res) + '\n')
@@ -1,8 +1,9 @@
 # viewer.py
 import sys
 import time
-from state import idx_to_rc, rc_to_idx, MOVES
-from utils import read_input, gen_successors # Wykorzystujemy te same funkcje pomocnicze
+from state import idx_to_rc, rc_to_idx, MOVES, unpack
+from utils import read_input, apply_moves # Wykorzystujemy te same funkcje pomocnicze
+from timeline import Timeline
 
 def apply_move(state, move, R, C):
     """Zwraca nowy stan po wykonaniu pojedynczego ruchu."""
@@ -36,22 +37,49 @@ def print_state(state, R, C):
         print(row_str + "|")
     print("+" + "----" * C + "+")
 
+def load_viewer_json(path):
+    """(R, C, plansza startowa, Timeline) z pliku main.py --save-viewer.
+
+    Starsze pliki (napis 'solution_moves' zamiast 'timeline') też działają.
+    """
+    import json
+    with open(path, 'r', encoding='utf-8') as f:
+        obj = json.load(f)
+    R, C, initial = obj['R'], obj['C'], obj['initial']
+    if 'timeline' in obj:
+        return R, C, initial, Timeline(R, C, max(obj['solution_length'], 0), obj['timeline'])
+    return R, C, initial, Timeline.from_moves(R, C, initial, obj.get('solution_moves', ''))
+
+
 def viewer_main():
     """Główna funkcja viewera."""
-    if len(sys.argv) < 3:
+    if len(sys.argv) < 2 or (len(sys.argv) < 3 and not sys.argv[1].endswith('.json')):
         print("Użycie: python3 viewer.py <ścieżka_do_pliku_wejściowego> <ciąg_ruchów>")
+        print("        python3 viewer.py <plik_z_main.py_--save-viewer.json>")
         print("np. python3 viewer.py input.txt DDRR")
         sys.exit(1)
         
     input_file_path = sys.argv[1]
-    solution_path = sys.argv[2].strip()
 
     # Wczytanie stanu początkowego z pliku
     try:
-        with open(input_file_path, 'r') as f:
-            # Prowizoryczne wczytywanie, musimy nadpisać stdin dla read_input
-            sys.stdin = f
-            R, C, current_state = read_input()
+        if len(sys.argv) < 3:
+            R, C, current_state, timeline = load_viewer_json(input_file_path)
+            current_state = tuple(current_state)
+        else:
+            solution_path = sys.argv[2].strip()
+            with open(input_file_path, 'r') as f:
+                # Prowizoryczne wczytywanie, musimy nadpisać stdin dla read_input
+                sys.stdin = f
+                R, C, start = read_input()
+            try:
+                apply_moves(start, R, C, solution_path)
+            except ValueError as e:
+                print(f"Błąd: {e}. Przerywam.", file=sys.stderr)
+                sys.exit(1)
+            # viewer pracuje na krotkach płytek
+            current_state = unpack(start, R, C)
+            timeline = Timeline.from_moves(R, C, current_state, solution_path)
     except FileNotFoundError:
         print(f"Błąd: Nie znaleziono pliku {input_file_path}", file=sys.stderr)
         sys.exit(1)
@@ -59,60 +87,45 @@ def viewer_main():
         # Przywrócenie stdin do standardowego wejścia
         sys.stdin = sys.__stdin__
 
-    print(f"--- START WIZUALIZACJI (Ruchów: {len(solution_path)}) ---")
-    print(f"Ruch: Start (0/{len(solution_path)})")
+    total = len(timeline)
+    print(f"--- START WIZUALIZACJI (Ruchów: {total}) ---")
+    print(f"Ruch: Start (0/{total})")
     print_state(current_state, R, C)
     
-    # Opcja dla interaktywnego przejścia lub przejścia ze skokami (jak w poleceniu)
-    
+    # Enter - jeden ruch; J<liczba> - skok (także wstecz) od najbliższej klatki
+    # kluczowej, czyli O(K) ruchów zamiast odtwarzania od bieżącego kroku
     step = 0
     # Główna pętla viewera
-    while step < len(solution_path):
-        next_move = solution_path[step]
-        
+    while step < total:
         # Oczekiwanie na akcję użytkownika (Enter - następny ruch, J<liczba> - skok)
         user_input = input("Wciśnij [Enter] (następny ruch), [J<liczba>] (skok), lub [Q] (wyjdź): ").strip().upper()
         
         if user_input == 'Q':
             break
         
-        target_step = step + 1 # Domyślnie - następny krok
-        
         if user_input.startswith('J'):
             try:
                 # Wczytanie docelowego kroku do skoku
                 jump_target = int(user_input[1:])
-                if 0 <= jump_target <= len(solution_path):
-                    target_step = jump_target
-                else:
-                    print(f"Niepoprawny numer kroku dla skoku. Podaj liczbę od 0 do {len(solution_path)}.", file=sys.stderr)
-                    continue
             except ValueError:
                 print("Niepoprawny format skoku. Użyj formatu J<liczba> (np. J5).", file=sys.stderr)
                 continue
-        
-        # Iteracyjne wykonanie ruchów do osiągnięcia target_step
-        while step < target_step:
-            if step >= len(solution_path):
-                break # Doszliśmy do końca
-                
-            next_move = solution_path[step]
-            
-            new_state, success = apply_move(current_state, next_move, R, C)
-            if success:
-                current_state = new_state
-                step += 1
-            else:
-                print(f"Błąd: Niepoprawny ruch '{next_move}' w kroku {step+1}. Przerywam.", file=sys.stderr)
-                return
+            if not 0 <= jump_target <= total:
+                print(f"Niepoprawny numer kroku dla skoku. Podaj liczbę od 0 do {total}.", file=sys.stderr)
+                continue
+            step = jump_target
+            current_state = tuple(timeline.state_at(step))
+        else:
+            current_state, _ = apply_move(current_state, timeline.move(step), R, C)
+            step += 1
 
         # Wyświetlenie aktualnego stanu po skoku/kroku
-        print(f"\n--- KROK {step}/{len(solution_path)} ---")
+        print(f"\n--- KROK {step}/{total} ---")
         if step > 0:
-            print(f"Ostatni ruch: {solution_path[step-1]}")
+            print(f"Ostatni ruch: {timeline.move(step - 1)}")
         print_state(current_state, R, C)
         
-        if step == len(solution_path):
+        if step == total:
             print("\n--- ROZWIĄZANIE OSIĄGNIĘTE ---")
 
 
@@ -2,8 +2,15 @@
 const MOVES = { U: [-1, 0], D: [1, 0], L: [0, -1], R: [0, 1] };
 
 let R = 4, C = 4;
-let states = []; // sequence of states (each is array)
+// Timeline (same format as solver/timeline.py): keyframe boards every K moves
+// plus moves packed 2 bits each (L=0, R=1, U=2, D=3). Seeking replays at most
+// K-1 moves from the nearest keyframe; Next/Prev apply or undo one move.
+const MOVE_CODES = 'LRUD';
+const INVERSE = { L: 'R', R: 'L', U: 'D', D: 'U' };
+let timeline = null; // {every, keyframes, packed (Uint8Array), length}
+let board = null;    // current board (array), mutated in place
 let cur = 0;
+const FROM_FILE = '(moves loaded from the saved timeline)';
 let timer = null;
 
 const el = id => document.getElementById(id);
@@ -43,40 +50,65 @@ function renderGrid(state){
 	}
 }
 
-function applyMoveToState(stateArr, move){
-	// stateArr is array of length R*C
+function moveAt(i){
+	return MOVE_CODES[(timeline.packed[i >> 2] >> ((i & 3) * 2)) & 3];
+}
+
+function applyInPlace(stateArr, move){
+	// returns false if the move leaves the board
 	const zeroIdx = stateArr.indexOf(0);
 	const zr = Math.floor(zeroIdx / C), zc = zeroIdx % C;
 	const [dr, dc] = MOVES[move] || [0,0];
 	const nr = zr + dr, nc = zc + dc;
-	if(nr < 0 || nr >= R || nc < 0 || nc >= C) return null;
+	if(nr < 0 || nr >= R || nc < 0 || nc >= C) return false;
 	const nidx = nr * C + nc;
-	const copy = stateArr.slice();
-	copy[zeroIdx] = copy[nidx];
-	copy[nidx] = 0;
-	return copy;
+	stateArr[zeroIdx] = stateArr[nidx];
+	stateArr[nidx] = 0;
+	return true;
+}
+
+function defaultEvery(length){
+	return Math.max(32, Math.floor(Math.sqrt(length * R * C)));
 }
 
-function buildStates(initial, moves){
-	const seq = [];
-	seq.push(initial.slice());
-	let curState = initial.slice();
+function buildTimeline(initial, moves){
+	// moves typed by hand: stop at the first move that leaves the board
+	const every = defaultEvery(moves.length);
+	const keyframes = [initial.slice()];
+	const packed = new Uint8Array((moves.length + 3) >> 2);
+	const work = initial.slice();
+	let n = 0;
 	for(const m of moves){
-		const ns = applyMoveToState(curState, m);
-		if(ns === null) break;
-		seq.push(ns);
-		curState = ns;
+		if(!applyInPlace(work, m)) break;
+		packed[n >> 2] |= MOVE_CODES.indexOf(m) << ((n & 3) * 2);
+		n++;
+		if(n % every === 0) keyframes.push(work.slice());
 	}
-	return seq;
+	return { every, keyframes, packed, length: n };
+}
+
+function decodeTimeline(obj){
+	// 'timeline' key written by main.py --save-viewer
+	const raw = atob(obj.moves);
+	const packed = new Uint8Array(raw.length);
+	for(let i=0;i<raw.length;i++) packed[i] = raw.charCodeAt(i);
+	return { every: obj.every, keyframes: obj.keyframes, packed, length: 0 };
+}
+
+function stateAt(t){
+	const k = Math.floor(t / timeline.every);
+	const s = timeline.keyframes[k].slice();
+	for(let i=k*timeline.every;i<t;i++) applyInPlace(s, moveAt(i));
+	return s;
 }
 
 function updateStatus(){
-	el('status').textContent = `Step ${cur}/${states.length-1}`;
+	el('status').textContent = `Step ${cur}/${timeline.length}`;
 }
 
 function showCur(){
-	if(states.length === 0) return;
-	renderGrid(states[cur]);
+	if(!timeline) return;
+	renderGrid(board);
 	el('jumpIdx').value = cur;
 	updateStatus();
 }
@@ -86,44 +118,55 @@ function doLoad(){
 	if(!init){ alert('Cannot parse initial input. Use format: first line "R C" then R rows of C numbers.'); return; }
 	const out = parseSolverOutput(el('solverOutput').value);
 	const moves = out.moves || '';
+	if(moves === FROM_FILE && timeline){ seek(0); return; }
 	// validate moves
 	if(!/^[UDLR]*$/.test(moves)){
 		alert('Moves contain invalid characters. Only U,D,L,R allowed.');
 		return;
 	}
-	states = buildStates(init, moves);
+	timeline = buildTimeline(init, moves);
+	board = init.slice();
 	cur = 0;
 	showCur();
 }
 
 function doReset(){
-	if(states.length>0){ cur = 0; showCur(); }
+	if(timeline){ seek(0); }
+}
+
+function seek(t){
+	board = stateAt(t);
+	cur = t; showCur();
 }
 
 function stepNext(){
-	if(states.length === 0) return;
-	if(cur < states.length-1) cur++; showCur();
+	if(!timeline) return;
+	if(cur < timeline.length){ applyInPlace(board, moveAt(cur)); cur++; }
+	showCur();
 }
 
 function stepPrev(){
-	if(states.length === 0) return;
-	if(cur > 0) cur--; showCur();
+	if(!timeline) return;
+	if(cur > 0){ cur--; applyInPlace(board, INVERSE[moveAt(cur)]); }
+	showCur();
 }
 
 function playPause(){
+	if(!timeline) return;
 	if(timer){ clearInterval(timer); timer = null; el('playBtn').textContent = '► Play'; return; }
 	const interval = parseInt(el('speed').value) || 300;
 	el('playBtn').textContent = '❚❚ Pause';
 	timer = setInterval(()=>{
-		if(cur >= states.length-1){ clearInterval(timer); timer=null; el('playBtn').textContent = '► Play'; return; }
-		cur++; showCur();
+		if(cur >= timeline.length){ clearInterval(timer); timer=null; el('playBtn').textContent = '► Play'; return; }
+		stepNext();
 	}, interval);
 }
 
 function jumpTo(){
+	if(!timeline) return;
 	const v = parseInt(el('jumpIdx').value) || 0;
-	if(v < 0 || v >= states.length) { alert('Index out of range'); return; }
-	cur = v; showCur();
+	if(v < 0 || v > timeline.length) { alert('Index out of range'); return; }
+	seek(v);
 }
 
 // Wire events
@@ -188,7 +231,18 @@ function loadFromPayload(obj){
 			}
 			el('initialInput').value = firstLine + '\n' + rows.join('\n');
 		}
+		if(obj.timeline){
+			// keyframe format: load directly, never builds the move string
+			R = obj.R; C = obj.C;
+			timeline = decodeTimeline(obj.timeline);
+			timeline.length = Math.max(obj.solution_length, 0);
+			el('solverOutput').value = `${timeline.length}\n${FROM_FILE}`;
+			window.__viewer_payload_loaded = true;
+			seek(0);
+			return;
+		}
 		if(typeof obj.solution_moves === 'string'){
+			// older files: plain move string
 			const moves = obj.solution_moves || '';
 			const n = moves.length >= 0 ? moves.length : (obj.solution_length || 0);
 			el('solverOutput').value = `${n}\n${moves}`;